@@ -0,0 +1,249 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+import anyio
+import uvicorn
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from exports import monitor_schema, result_schema, result_tables, export_stream, EXPORT_FORMATS
+from ranking import RANKING_CRITERIA, RANK_TOP_K
+from reports import render_report, ReportError
+from service import MonitorService, AnalysisError, SearchError, ANALYSIS_CONTEXTS
+
+load_dotenv()
+
+# Blocking service calls (Serper, Gemini, caches) running at once in worker threads
+API_WORKERS = int(os.getenv("API_WORKERS", "32"))
+
+# Worker processes rendering PDF reports
+API_PDF_WORKERS = int(os.getenv("API_PDF_WORKERS", "2"))
+
+
+# Run a blocking service call in a worker thread without blocking the event loop
+async def blocking(request, fn, *args, **kwargs):
+    return await anyio.to_thread.run_sync(partial(fn, *args, **kwargs), limiter=request.app.state.limiter)
+
+
+async def json_body(request):
+    body = await request.json()
+    if not isinstance(body, dict):
+        raise ValueError("Corpul cererii trebuie să fie un obiect JSON")
+    return body
+
+
+def string_list(body, key):
+    values = body.get(key) or []
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError(f"'{key}' trebuie să fie o listă de șiruri")
+    return values
+
+
+# A list of [title, sections] pairs, sections mapping section names to texts
+def structured_analysis(analysis):
+    return isinstance(analysis, list) and all(
+        isinstance(entry, list) and len(entry) == 2 and isinstance(entry[0], str) and isinstance(entry[1], dict)
+        and all(isinstance(text, str) for text in entry[1].values())
+        for entry in analysis)
+
+
+# Export format requested in the body ("parquet", "arrow", "csv"), or None for JSON
+def export_format(body):
+    fmt = body.get("format")
+    if fmt is not None and fmt not in EXPORT_FORMATS:
+        raise ValueError(f"'format' trebuie să fie unul dintre: {', '.join(EXPORT_FORMATS)}")
+    return fmt
+
+
+# Stream an export as it is encoded, chunk by chunk (in a worker thread)
+def export_response(tables, fmt, schema, file_stem):
+    mime, extension = EXPORT_FORMATS[fmt]
+    return StreamingResponse(export_stream(tables, fmt, schema), media_type=mime,
+                             headers={"Content-Disposition": f'attachment; filename="{file_stem}{extension}"'})
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "catalog_version": request.app.state.service.catalog.version})
+
+
+# Categories with their specifications, the spec emojis, the shops, the analysis
+# types and the ranking criteria
+async def catalog(request):
+    service = request.app.state.service
+    current = service.catalog
+    return JSONResponse({
+        "version": current.version,
+        "categories": current.specs,
+        "options": current.options,
+        "shops": service.shops,
+        "analysis_types": list(ANALYSIS_CONTEXTS),
+        "ranking_criteria": list(RANKING_CRITERIA),
+    })
+
+
+# Search with the filters of the search tab. Body: the selection keys of
+# MonitorService.selection_query(), plus use_cache (default true) and
+# optimize (null, "sequential" or "speculative") and format (null for JSON,
+# or an export format for the results with their typed spec columns).
+async def search(request):
+    body = await json_body(request)
+    if body.get("optimize") not in (None, "sequential", "speculative"):
+        raise ValueError("'optimize' trebuie să fie null, \"sequential\" sau \"speculative\"")
+    fmt = export_format(body)
+    selection = {key: value for key, value in body.items() if key not in ("use_cache", "optimize", "format")}
+    outcome = await blocking(request, request.app.state.service.search, selection,
+                             use_cache=bool(body.get("use_cache", True)), optimize=body.get("optimize"))
+    if fmt is not None:
+        return export_response(result_tables(outcome["results"] + (outcome.get("extra") or [])), fmt,
+                               result_schema(), "rezultate_cautare")
+    return JSONResponse(outcome)
+
+
+# Comparison table. Body: categories, specs and format (null for JSON, or
+# an export format for a row per monitor with its typed spec columns).
+async def compare(request):
+    body = await json_body(request)
+    categories, specs = string_list(body, "categories"), string_list(body, "specs")
+    fmt = export_format(body)
+    if fmt is not None:
+        return export_response(request.app.state.service.comparison_tables(categories, specs), fmt,
+                               monitor_schema(specs), "monitoare_comparate")
+    frame = request.app.state.service.comparison(categories, specs)
+    return JSONResponse({"columns": list(frame.columns), "rows": frame.values.tolist()})
+
+
+# Weighted ranking of the catalog. Body: weights (ranking criterion -> weight), k.
+async def rank(request):
+    body = await json_body(request)
+    weights = body.get("weights") or {}
+    if not isinstance(weights, dict):
+        raise ValueError("'weights' trebuie să fie un obiect criteriu -> pondere")
+    k = body.get("k", RANK_TOP_K)
+    if not isinstance(k, int) or isinstance(k, bool) or k < 1:
+        raise ValueError("'k' trebuie să fie un număr întreg pozitiv")
+    service = request.app.state.service
+    table = service.ranking_table(service.rank(weights, k), weights)
+    return JSONResponse({"columns": list(table.columns), "rows": table.values.tolist()})
+
+
+# Gemini analysis. Body: categories, options, analysis_type, use_cache.
+# With analysis_types (a list) or per_category, the analyses of every type
+# (for every category on its own with per_category) are asked as structured
+# sections, concurrently or in one call with single_call.
+async def analyze(request):
+    body = await json_body(request)
+    service = request.app.state.service
+    if "analysis_types" in body or body.get("per_category"):
+        categories = string_list(body, "categories")
+        analysis_types = string_list(body, "analysis_types") or [body.get("analysis_type", "Analiză generală")]
+        groups = [[category] for category in categories] if body.get("per_category") else [categories]
+        requests = [(analysis_type, group) for group in groups for analysis_type in analysis_types]
+        outcomes = await blocking(request, service.structured_analyses, requests, string_list(body, "options"),
+                                  use_cache=bool(body.get("use_cache", True)),
+                                  single_call=bool(body.get("single_call", False)))
+        return JSONResponse({"analyses": [
+            {"analysis_type": analysis_type, "categories": group, "sections": sections, "cached": cached}
+            for (analysis_type, group), (sections, cached) in zip(requests, outcomes)]})
+    specs_data, prompt = service.analysis_request(string_list(body, "categories"), string_list(body, "options"),
+                                                  body.get("analysis_type", "Analiză generală"))
+    outcome = await blocking(request, service.analysis_task, prompt, use_cache=bool(body.get("use_cache", True)),
+                             stream=False)
+    return JSONResponse({"specs_data": specs_data, **outcome})
+
+
+# PDF report. Body: kind ("specs" or "analysis"), categories, options and,
+# for an analysis report, the analysis: its text, or a list of [title,
+# sections] pairs of structured analyses (the sections of /analyze). Reports rendered before are
+# served from the report cache (X-Report-Cache: hit).
+async def report(request):
+    body = await json_body(request)
+    kind = body.get("kind", "specs")
+    if kind not in ("specs", "analysis"):
+        raise ValueError("'kind' trebuie să fie \"specs\" sau \"analysis\"")
+    if kind == "analysis" and not (isinstance(body.get("analysis"), str) or structured_analysis(body.get("analysis"))):
+        raise ValueError("Raportul de analiză necesită 'analysis': textul analizei sau o listă de [titlu, secțiuni]")
+
+    service = request.app.state.service
+    description = service.report(string_list(body, "categories"), string_list(body, "options"),
+                                 body.get("analysis") if kind == "analysis" else None)
+    pdf = await blocking(request, service.cached_report, description)
+    cache = "hit"
+    if pdf is None:
+        cache = "miss"
+        pdf = await asyncio.get_running_loop().run_in_executor(request.app.state.pdf_pool, render_report, description)
+        await blocking(request, service.store_report, description, pdf)
+    return Response(pdf, media_type="application/pdf", headers={"X-Report-Cache": cache})
+
+
+async def bad_request(request, exc):
+    return JSONResponse({"error": str(exc)}, status_code=400)
+
+
+async def upstream_error(request, exc):
+    return JSONResponse({"error": str(exc), "upstream": exc.text[:500]}, status_code=502)
+
+
+# Gemini answered, but not with the requested analysis
+async def bad_analysis(request, exc):
+    return JSONResponse({"error": str(exc)}, status_code=502)
+
+
+async def report_error(request, exc):
+    return JSONResponse({"error": str(exc)}, status_code=500)
+
+
+# JSON API over the search, comparison, analysis and report logic of the
+# Streamlit UI. It runs as its own process and shares the on-disk caches
+# (CACHE_DIR), the catalog and the shop index with the UI. Pass a service to
+# reuse one that is already built (e.g. pointed at local stand-ins).
+def create_app(service=None, workers=API_WORKERS, pdf_workers=API_PDF_WORKERS):
+    @asynccontextmanager
+    async def lifespan(app):
+        # Every request thread may wait on a Serper search at the same time
+        app.state.service = service or MonitorService(os.getenv("SERPER_API_KEY"), os.getenv("GEMINI_API_KEY"),
+                                                      search_workers=workers)
+        app.state.limiter = anyio.CapacityLimiter(workers)
+        # spawn: forking a multi-threaded server process is unsafe
+        app.state.pdf_pool = ProcessPoolExecutor(max_workers=pdf_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        try:
+            yield
+        finally:
+            app.state.pdf_pool.shutdown(cancel_futures=True)
+
+    return Starlette(
+        routes=[
+            Route("/health", health),
+            Route("/catalog", catalog),
+            Route("/search", search, methods=["POST"]),
+            Route("/compare", compare, methods=["POST"]),
+            Route("/rank", rank, methods=["POST"]),
+            Route("/analyze", analyze, methods=["POST"]),
+            Route("/report", report, methods=["POST"]),
+        ],
+        exception_handlers={ValueError: bad_request, SearchError: upstream_error, AnalysisError: bad_analysis,
+                            ReportError: report_error},
+        lifespan=lifespan,
+    )
+
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the monitor search JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,24 @@
 import streamlit as st
+import html
 import os
-import requests
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
-import webbrowser
 import pandas as pd
+import numpy as np
 import time
 import random
-import google.generativeai as genai
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-import io
+from functools import wraps
+from cache import DiskCache
+from spec_parser import filter_catalog, parse_hz, parse_ms, parse_resolution
+from enrichment import PageEnricher, merge_product
+from jobs import JobManager, QueueFull, current_job, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+from reports import analysis_report, render_report, spec_report, ANALYSIS_SECTIONS, ANALYSIS_SECTION_KEYS, MISSING_SECTION
+from exports import monitor_schema, monitor_tables, result_schema, result_tables, export_bytes, EXPORT_FORMATS
+from grid import comparison_page, page_count, spec_page, GRID_COLUMN_PAGE_SIZE, GRID_PAGE_SIZE, NAME_COLUMN
+from ranking import RANKING_CRITERIA, PRICE_CRITERION
+from service import MonitorService, SearchError, ANALYSIS_CONTEXTS, ANALYSIS_WEIGHTS
+from price_history import PRICE_TRACK_INTERVAL, UPDATED, UNCHANGED, NO_PRICE, FAILED as CHECK_FAILED
+from shop_index import domain_allowed, url_domain
+import profiler
 
 # Page configuration
 st.set_page_config(
@@ -22,8 +28,24 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# Opt-in rerun profiler: PROFILE=1 for every session, ?profile=1 for one
+def profiling_enabled():
+    return profiler.PROFILE or st.query_params.get("profile") == "1"
+
+# Start profiling a rerun of the script (or of a single fragment). A
+# requested cProfile dump applies to the next profiled rerun only. A profile
+# left on the thread by a rerun that never reached its end is discarded.
+def start_profile(label):
+    profiler.stop()
+    if not profiling_enabled():
+        return None
+    return profiler.start(label, cprofile=st.session_state.pop("profile_dump_requested", False))
+
+rerun_profile = start_profile("Rulare completă")
+
 # Custom CSS for styling
-st.markdown("""
+with profiler.span("CSS"):
+    st.markdown("""
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -117,182 +139,353 @@ load_dotenv()
 gemini_api_key = os.getenv("GEMINI_API_KEY")
 if not gemini_api_key:
     st.error("⚠️ GEMINI_API_KEY nu a fost găsit în fișierul .env")
-else:
-    # Configure Gemini
-    genai.configure(api_key=gemini_api_key)
 
 # Set Serper.dev API key
 serper_api_key = os.getenv("SERPER_API_KEY")
-SERPER_API_URL = "https://google.serper.dev/search"
-
-# Function to generate PDF using ReportLab
-def generate_pdf(selected_categories, selected_options, specs, options):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # Add title
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.purple,
-        spaceAfter=12
-    )
-    elements.append(Paragraph("Raport Specificatii Monitoare", title_style))
-    elements.append(Spacer(1, 12))
-
-    # Add date
-    date_style = ParagraphStyle(
-        'Date',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.grey
+
+# Search, analysis and report logic shared with the JSON API: pooled
+# upstream clients, on-disk caches, catalog, domain policy and shop index
+@st.cache_resource
+def get_service(serper_api_key, gemini_api_key):
+    return MonitorService(serper_api_key=serper_api_key, gemini_api_key=gemini_api_key)
+
+service = get_service(serper_api_key, gemini_api_key)
+clients = service.clients
+search_cache = service.search_cache
+gemini_cache = service.gemini_cache
+report_cache = service.report_cache
+domain_policy = service.domain_policy
+shop_index = service.shop_index
+
+# Online shops offered for restriction and searched individually in fan-out mode
+SHOP_OPTIONS = service.shops
+
+# Product page enrichment with a conditional-GET page cache; fetched pages
+# are also fed into the local shop index
+@st.cache_resource
+def get_page_enricher():
+    page_cache = DiskCache(
+        "pages",
+        ttl=int(os.getenv("PAGE_CACHE_TTL", str(7 * 24 * 3600))),
+        max_bytes=int(os.getenv("PAGE_CACHE_MAX_BYTES", str(20 * 1024 * 1024))),
+        normalize=False,
     )
-    elements.append(Paragraph(f"Generat la: {time.strftime('%d-%m-%Y %H:%M:%S')}", date_style))
-    elements.append(Spacer(1, 24))
-
-    # Add content for each category
-    for category in selected_categories:
-        # Add category header
-        cat_style = ParagraphStyle(
-            'Category',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.blue,
-            spaceAfter=8
-        )
-        elements.append(Paragraph(f"{category}", cat_style))
-        elements.append(Spacer(1, 8))
-
-        # Create table data
-        data = [["Specificatie", "Valoare"]]
-        for option in selected_options:
-            if option in specs[category]:
-                data.append([f"{option}", specs[category][option]])
-
-        # Create table
-        table = Table(data, colWidths=[200, 300])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (1, 0), colors.lavender),
-            ('TEXTCOLOR', (0, 0), (1, 0), colors.darkblue),
-            ('ALIGN', (0, 0), (1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-            ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
-
-        elements.append(table)
-        elements.append(Spacer(1, 20))
-
-    # Add footer
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.grey,
-        alignment=1  # Center alignment
+    return PageEnricher(
+        clients.session,
+        page_cache,
+        on_page=lambda url, html: shop_index.ingest_html(url, html, SHOP_OPTIONS),
     )
-    elements.append(Paragraph("© 2025 ionut.capota@processit.ro", footer_style))
-
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
-
-# Function for Google search using Serper.dev
-def google_search(query):
-    headers = {"X-API-KEY": serper_api_key}
-    # Add Romanian site restriction and language parameter
-    if "site:.ro" not in query:
-        query += " site:.ro"
-
-    # Add language restriction to Romanian
-    if "&lr=lang_ro" not in query:
-        query += " &lr=lang_ro"
-
-    # Explicitly exclude international sites
-    excluded_sites = [
-        "amazon.com", "ebay.com", "aliexpress.com", "walmart.com", "bestbuy.com",
-        "newegg.com", "bhphotovideo.com", "adorama.com", "currys.co.uk", "argos.co.uk",
-        "mediamarkt.de", "saturn.de", "fnac.com", "darty.com", "ldlc.com", "otto.de",
-        "conrad.de", "verkkokauppa.com", "komplett.no", "elkjop.no", "power.no",
-        "coolblue.nl", "bol.com", "mediamarkt.nl", "amazon.co.uk", "amazon.de",
-        "amazon.fr", "amazon.it", "amazon.es", "amazon.nl", "amazon.se", "anodos.ru",
-        "emag.bg"
-    ]
-
-    for site in excluded_sites:
-        if f"-site:{site}" not in query:
-            query += f" -site:{site}"
-
-    payload = {"q": query}
 
-    try:
-        with st.spinner("🔍 Cautare in progres..."):
-            response = requests.post(SERPER_API_URL, json=payload, headers=headers)
-        if response.status_code == 200:
-            st.success("✅ Cautare finalizata cu succes!")
-            # Filter results to only include Romanian domains
-            results = response.json()
-            if "organic" in results:
-                filtered_organic = []
-                for result in results["organic"]:
-                    link = result.get("link", "")
-                    domain = link.split('/')[2] if '/' in link else ""
-
-                    # Check if domain ends with .ro or is a known Romanian site
-                    if domain.endswith(".ro") or any(ro_site in domain for ro_site in [
-                        "emag", "pcgarage", "altex", "mediagalaxy", "cel", "evomag",
-                        "itgalaxy", "forit", "vexio", "dc-shop",
-                        "flanco", "nod", "probitz", "bsp-shop", "iiyama-eshop", 
-                        "soliton", "picxelit", "badabum"
-                    ]):
-                        filtered_organic.append(result)
-
-                results["organic"] = filtered_organic
-
-            return results
-        else:
-            st.error(f"❌ Eroare la interogarea API-ului Serper.dev: {response.status_code}")
-            st.write(f"Raspuns API: {response.text}")
-            return None
-    except Exception as e:
-        st.error(f"❌ A aparut o eroare: {e}")
-        return None
+page_enricher = get_page_enricher()
+
+# Monitor catalog, reloaded when the file changes
+catalog_store = service.catalog_store
+with profiler.span("Catalog (specificații)"):
+    catalog = catalog_store.get()
+    specs = catalog.specs
+    options = catalog.options
+
+if catalog_store.last_error:
+    st.warning(f"⚠️ Catalogul nu a putut fi reîncărcat, se folosește versiunea anterioară: {catalog_store.last_error}")
+
+# Process-wide background jobs: threads for searches and Gemini, processes for PDFs
+@st.cache_resource
+def get_job_manager():
+    return JobManager()
+
+job_manager = get_job_manager()
+
+# Seconds between status refreshes of a pending job
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+
+# Escape a field scraped from a shop page or returned by Serper.dev for the
+# card HTML; whitespace is collapsed so no blank line ends the HTML block
+def escape_field(value):
+    return html.escape(" ".join(str(value).split()))
+
+# Link target of a result card: only http(s) addresses are followed
+def result_href(link):
+    return escape_field(link) if str(link).lower().startswith(("http://", "https://")) else "#"
+
+# Function to render a single search result card; every field comes from
+# third-party pages and is escaped, only the layout is HTML
+def render_result_card(result):
+    price = ""
+    if isinstance(result.get("price"), (int, float)):
+        price = f"<p class='highlight'>💰 {result['price']:,.2f} RON</p>"
+    elif result.get("price"):
+        price = f"<p class='highlight'>💰 {escape_field(result['price'])}</p>"
+    specs = ""
+    if result.get("specs"):
+        specs = "<p>" + " · ".join(
+            f"<span class='spec-label'>{escape_field(key)}:</span> <span class='spec-value'>{escape_field(value)}</span>"
+            for key, value in list(result["specs"].items())[:6]
+        ) + "</p>"
+    st.markdown(f"""
+    <div class='card'>
+        <h3><a href="{result_href(result.get('link', ''))}" target="_blank" rel="noopener noreferrer">{escape_field(result.get('title', 'Fără titlu'))}</a></h3>
+        {price}
+        <p>{escape_field(result.get('snippet', 'Fără descriere'))}</p>
+        {specs}
+        <p><small>{escape_field(result.get('link', ''))}</small></p>
+    </div>
+    """, unsafe_allow_html=True)
 
-# Function to use Gemini for analyzing search results
-def analyze_with_gemini(query, specs_data):
+# Function to render search result cards; returns the results as shown
+def render_results(results):
+    for result in results:
+        render_result_card(result)
+    return results
+
+# Job fetching the product pages of the shown results (the first five of each
+# group) and merging price and specs into a copy of the search outcome; the
+# outcome enriched so far is published as progress after every page
+def enrich_outcome(outcome):
+    if "shops" in outcome:
+        groups = [list(shop["results"]) for shop in outcome["shops"]]
+    else:
+        groups = [list(outcome["results"]), list(outcome["extra"])]
+    shown = [(group, position) for group, results in enumerate(groups) for position in range(min(5, len(results)))]
+
+    def enriched():
+        if "shops" in outcome:
+            return {**outcome, "shops": [{**shop, "results": list(results)}
+                                         for shop, results in zip(outcome["shops"], groups)]}
+        return {**outcome, "results": list(groups[0]), "extra": list(groups[1])}
+
+    job = current_job()
+    if job is not None:
+        job.progress = enriched()
+    for position, product, status, error in page_enricher.enrich([groups[g][i] for g, i in shown]):
+        if product is not None:
+            group, index = shown[position]
+            groups[group][index] = merge_product(groups[group][index], product)
+            if job is not None:
+                job.progress = enriched()
+    return enriched()
+
+# Function to render a finished search outcome from any source; returns every
+# result with the shown ones as displayed
+def render_outcome(outcome, optimize=None):
+    if outcome["source"] == "index":
+        st.success(f"⚡ {len(outcome['results'])} rezultate din indexul local")
+        st.subheader("Rezultate căutare")
+        return render_results(outcome["results"][:5]) + outcome["results"][5:]
+    # Show search completed message
+    st.markdown("""
+    <div style="background-color: #e6f7e6; padding: 10px; border-radius: 5px; margin-bottom: 20px;">
+        <p>✅ Căutare finalizată cu succes!</p>
+    </div>
+    """, unsafe_allow_html=True)
+    if outcome["source"] == "fan_out":
+        return render_fan_out_outcome(outcome)
+    return render_search_outcome(outcome, optimize)
+
+# Function to render the partial results of a search job: the raw results
+# while Gemini is still optimizing the query, or the shops answered so far
+def render_search_progress(outcome):
+    if "shops" in outcome:
+        render_fan_out_outcome(outcome)
+        return
+    render_search_outcome(outcome)
+    st.caption("🤖 Se optimizează interogarea cu Gemini...")
+
+# Function to render the results of a fan-out search, shop by shop; returns
+# every result with the shown ones as displayed
+def render_fan_out_outcome(outcome):
+    if outcome["enhance_error"]:
+        st.warning(f"Nu s-a putut optimiza interogarea cu Gemini: {outcome['enhance_error']}")
+    elif outcome["enhanced_query"]:
+        cached_note = " (din cache)" if outcome["enhanced_cached"] else ""
+        st.info(f"🤖 Interogare optimizată de AI{cached_note}: {outcome['enhanced_query']}")
+
+    st.subheader("Rezultate căutare")
+    results = []
+    for shop in outcome["shops"]:
+        if shop["error"] is not None:
+            st.warning(f"⚠️ {shop['shop']}: căutarea a eșuat ({shop['error']})")
+            continue
+        st.markdown(f"<h4>🛒 {shop['shop']} <small>({shop['seconds']:.1f} s)</small></h4>", unsafe_allow_html=True)
+        if not shop["results"]:
+            st.caption("Niciun rezultat nou.")
+        results += render_results(shop["results"][:5]) + shop["results"][5:]
+
+    seconds = max((shop["seconds"] for shop in outcome["shops"]), default=0)
+    st.success(f"✅ {len(outcome['results'])} rezultate unice din {len(outcome['shops'])} magazine în {seconds:.1f} s")
+    return results
+
+# Function to render the results of a search job (partial results while the
+# job still runs); returns every result with the shown ones as displayed
+def render_search_outcome(outcome, optimize=None):
+    if optimize == "sequential":
+        if outcome["enhance_error"]:
+            st.warning(f"Nu s-a putut optimiza interogarea cu Gemini: {outcome['enhance_error']}")
+        elif outcome["enhanced_query"]:
+            cached_note = " (din cache)" if outcome["enhanced_cached"] else ""
+            st.info(f"🤖 Interogare optimizată de AI{cached_note}: {outcome['enhanced_query']}")
+
+    if outcome["cached"]:
+        st.success("✅ Rezultate servite din cache!")
+    else:
+        st.success("✅ Cautare finalizata cu succes!")
+
+    st.subheader("Rezultate căutare")
+    results = render_results(outcome["results"][:5]) + outcome["results"][5:]
+    extra = outcome["extra"]
+
+    if optimize != "speculative":
+        return results + extra
+    if outcome["enhance_error"]:
+        st.warning(f"Nu s-a putut optimiza interogarea cu Gemini: {outcome['enhance_error']}")
+    elif outcome["enhanced_query"]:
+        cached_note = " (din cache)" if outcome["enhanced_cached"] else ""
+        if not outcome["rewrite_searched"]:
+            st.caption(f"🤖 Interogarea optimizată de AI{cached_note} nu diferă semnificativ; nu s-a mai căutat din nou.")
+        else:
+            st.info(f"🤖 Interogare optimizată de AI{cached_note}: {outcome['enhanced_query']}")
+            if outcome["extra_error"]:
+                st.warning(f"⚠️ Căutarea cu interogarea optimizată a eșuat: {outcome['extra_error']}")
+            elif outcome["extra"]:
+                st.subheader("Rezultate suplimentare (interogare optimizată)")
+                extra = render_results(outcome["extra"][:5]) + outcome["extra"][5:]
+            else:
+                st.caption("Interogarea optimizată nu a adus rezultate noi.")
+    return results + extra
+
+# Function to render the analysis text received so far
+def render_analysis_progress(text):
+    st.markdown(text + " ▌")
+
+# Function to render the structured analyses finished so far
+def render_structured_progress(finished):
+    st.caption(f"🧩 {len(finished)} analize gata")
+    st.markdown(analysis_markdown([[analysis_title(*request), sections] for request, (sections, _) in finished]))
+
+# Title of one of several structured analyses
+def analysis_title(analysis_type, categories):
+    return f"{analysis_type} · {', '.join(categories)}"
+
+# Markdown of an analysis: free text as is, structured analyses (a list of
+# [title, sections]) section by section
+def analysis_markdown(analysis):
+    if isinstance(analysis, str):
+        return analysis
+    parts = []
+    for title, sections in analysis:
+        if len(analysis) > 1:
+            parts.append(f"#### {title}")
+        parts += [f"**{heading}**\n\n{sections.get(key) or MISSING_SECTION}"
+                  for key, heading in zip(ANALYSIS_SECTION_KEYS, ANALYSIS_SECTIONS)]
+    return "\n\n".join(parts)
+
+# Function to describe a job's state, queue position and timings
+def job_status_text(job):
+    if job.status == QUEUED:
+        return f"⏳ {job.label}: în coadă, poziția {job_manager.position(job.id)} ({job.wait_seconds:.1f} s)"
+    if job.status == RUNNING and job.throttled:
+        upstream, start = job.throttled
+        return (f"⏳ {job.label}: limita de cereri {upstream} este atinsă, pornește în "
+                f"~{max(0.0, start - time.time()):.0f} s (în lucru de {job.run_seconds:.1f} s)")
+    if job.status == RUNNING:
+        return f"⚙️ {job.label}: în lucru de {job.run_seconds:.1f} s (așteptare {job.wait_seconds:.1f} s)"
+    outcome = {DONE: "✅ finalizat", FAILED: "❌ eșuat", CANCELLED: "✖️ anulat"}[job.status]
+    return f"{job.label}: {outcome} în {job.run_seconds:.1f} s (așteptare {job.wait_seconds:.1f} s)"
+
+# Function to run work in the background job executor. The job ID and the
+# `context` needed to render its result are kept in the session state under
+# `slot`, so the job survives reruns of the script. While profiling, thread
+# jobs collect their spans in a profile of their own.
+def submit_job(slot, kind, fn, *args, label="", cpu=False, context=None, **kwargs):
+    previous = st.session_state.get(slot)
+    if previous:
+        job_manager.cancel(previous["id"])
+    if profiler.current() is not None and not cpu:
+        context = {**(context or {}), "profile": profiler.Profile(label)}
+        fn = profiler.bind(fn, context["profile"])
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        prompt = f"""
-        Analizeaza urmatoarele specificatii pentru {query}:
-
-        {specs_data}
-
-        Ofera-mi o analiza detaliata care sa includa:
-        1. Cele mai importante caracteristici
-        2. Avantajele acestor specificatii
-        3. Potentiale utilizari recomandate (gaming, design, office, etc.)
-        4. Recomandari de produse care ar putea indeplini aceste specificatii
-        """
-
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        st.error(f"❌ Eroare la utilizarea Gemini API: {e}")
-        return "Nu s-a putut realiza analiza cu Gemini. Verificați cheia API si conexiunea la internet."
+        job_id = job_manager.submit(kind, fn, *args, label=label, cpu=cpu, **kwargs)
+    except QueueFull:
+        st.error("❌ Serverul este ocupat. Încercați din nou în câteva secunde.")
+        return None
+    st.session_state[slot] = {"id": job_id, **(context or {})}
+    st.session_state.job_history = (st.session_state.get("job_history", []) + [job_id])[-10:]
+    return job_id
+
+# Fragment polling a pending job: shows its status and partial progress, and
+# reruns the app once the job has finished so the result can be rendered
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def watch_job(slot, render_progress=None):
+    pending = st.session_state.get(slot)
+    job = job_manager.get(pending["id"]) if pending else None
+    if job is None or job.done:
+        st.rerun()
+
+    st.caption(job_status_text(job))
+    if render_progress is not None and job.progress is not None:
+        render_progress(job.progress)
+    if st.button("✖️ Anulează", key=f"cancel_{slot}"):
+        job_manager.cancel(job.id)
+        st.rerun()
+
+# Function to collect the session's job stored under `slot`. Returns the
+# finished job and its context; while the job is pending its progress is
+# shown instead and (None, None) is returned.
+def finished_job(slot, render_progress=None):
+    pending = st.session_state.get(slot)
+    if not pending:
+        return None, None
+
+    job = job_manager.get(pending["id"])
+    if job is None:
+        del st.session_state[slot]
+        st.warning("⚠️ Rezultatul nu mai este disponibil. Reporniți operația.")
+        return None, None
+    if not job.done:
+        watch_job(slot, render_progress)
+        return None, None
+
+    del st.session_state[slot]
+    st.caption(job_status_text(job))
+    profile = profiler.current()
+    if profile is not None:
+        profile.add(f"{job.label} · așteptare în coadă", job.wait_seconds)
+        profile.add(f"{job.label} · execuție", job.run_seconds)
+        if "profile" in pending:
+            profile.merge(pending["profile"], prefix=f"{job.label} · ")
+    if job.status == CANCELLED:
+        return None, None
+    return job, pending
+
+# Function to request a PDF report. A report rendered before is served from
+# the report cache without ReportLab; otherwise it is rendered by a job in a
+# worker process. Either way the PDF is collected with finished_report(slot).
+def request_report(slot, report, context=None):
+    pdf = service.cached_report(report)
+    context = {"report": report, **(context or {})}
+    if pdf is not None:
+        st.session_state[slot] = {"pdf": pdf, **context}
+    else:
+        submit_job(slot, "pdf", render_report, report, label="Raport PDF", cpu=True, context=context)
+
+# Function to collect a requested report. Returns the PDF bytes, the request
+# context and whether the PDF came from the cache, or (None, None, False).
+def finished_report(slot):
+    pending = st.session_state.get(slot)
+    if pending and "pdf" in pending:
+        del st.session_state[slot]
+        return pending["pdf"], pending, True
+
+    job, context = finished_job(slot)
+    if job is None:
+        return None, None, False
+    if job.status == FAILED:
+        st.error(f"❌ Generarea PDF-ului a eșuat: {job.error}")
+        return None, None, False
+    service.store_report(context["report"], job.result)
+    return job.result, context, False
 
 # Sidebar with app info
-with st.sidebar:
+with st.sidebar, profiler.span("Bara laterală"):
     st.markdown("<h1 style='text-align: center;'>🖥️ Monitor Finder</h1>", unsafe_allow_html=True)
 
     # Instead of Lottie animation, use an emoji
@@ -314,12 +507,63 @@ with st.sidebar:
     st.markdown("### 📊 Statistici")
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric(label="Categorii", value="3")
+        st.metric(label="Categorii", value=str(len(catalog)))
     with col2:
-        st.metric(label="Specificații", value="22")
+        st.metric(label="Specificații", value=str(len(options)))
     with col3:
         st.metric(label="Utilizatori", value=str(random.randint(120, 500)))
 
+    # Search cache statistics
+    st.markdown("---")
+    st.markdown("### 🗄️ Cache căutări")
+    search_cache_stats = search_cache.stats()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(label="Hits", value=search_cache_stats["hits"])
+    with col2:
+        st.metric(label="Misses", value=search_cache_stats["misses"])
+    with col3:
+        st.metric(label="Intrări", value=search_cache_stats["entries"])
+    st.caption(f"Index local: {shop_index.stats()['listings']} anunțuri")
+    if st.button("🗑️ Golește cache", key="clear_search_cache"):
+        search_cache.clear()
+        st.success("✅ Cache golit!")
+
+    # Gemini answer cache inspection
+    with st.expander("🤖 Cache Gemini"):
+        gemini_cache_stats = gemini_cache.stats()
+        st.caption(
+            f"Hits: {gemini_cache_stats['hits']} · Misses: {gemini_cache_stats['misses']} · "
+            f"Intrări: {gemini_cache_stats['entries']} · {gemini_cache_stats['bytes'] / 1024:.1f} KB"
+        )
+        gemini_entries = gemini_cache.entries()
+        if gemini_entries:
+            st.dataframe(pd.DataFrame([
+                {
+                    "Prompt": entry["label"],
+                    "Creat": time.strftime('%d-%m-%Y %H:%M', time.localtime(entry["created"])),
+                    "KB": round(entry["bytes"] / 1024, 1),
+                }
+                for entry in gemini_entries
+            ]), hide_index=True)
+            entry_labels = {entry["key"]: entry["label"] for entry in gemini_entries}
+            entry_to_purge = st.selectbox("Intrare:", list(entry_labels), format_func=lambda key: entry_labels[key][:80])
+            if st.button("🗑️ Șterge intrarea", key="purge_gemini_entry"):
+                gemini_cache.remove(entry_to_purge)
+                st.success("✅ Intrare ștearsă!")
+        if st.button("🗑️ Golește cache Gemini", key="clear_gemini_cache"):
+            gemini_cache.clear()
+            st.success("✅ Cache Gemini golit!")
+
+    # Background jobs of this session and load of the shared executor
+    with st.expander("⚙️ Lucrări în fundal"):
+        job_stats = job_manager.stats()
+        st.caption(f"Server: {job_stats[QUEUED]} în coadă · {job_stats[RUNNING]} în lucru")
+        for job_id in reversed(st.session_state.get("job_history", [])):
+            job = job_manager.get(job_id)
+            if job is not None:
+                st.caption(job_status_text(job))
+
     # API status indicators
     st.markdown("---")
     st.markdown("### 🔑 Status API")
@@ -337,6 +581,62 @@ with st.sidebar:
         else:
             st.markdown("🔴 Gemini")
 
+    # Per-rerun timing breakdown, filled in once the rerun is over
+    if rerun_profile is not None:
+        st.markdown("---")
+        st.markdown("### ⏱️ Profilare")
+        st.button("📄 Salvează cProfile pentru o rulare", key="profile_dump",
+                  on_click=lambda: st.session_state.update(profile_dump_requested=True))
+        profile_panel = st.container()
+
+# Function to show a finished profile in `container`, with the durations
+# of the last reruns and, if requested, its cProfile dump
+def render_profile(profile, container):
+    with container:
+        with st.expander(f"{profile.label}: {profile.elapsed * 1000:.0f} ms", expanded=True):
+            rows = profile.rows()
+            if rows:
+                st.dataframe(pd.DataFrame([
+                    {"Secțiune": name, "Apeluri": count, "Total (ms)": round(total * 1000, 1),
+                     "Max (ms)": round(longest * 1000, 1)}
+                    for name, count, total, longest in rows
+                ]), hide_index=True)
+            for label, elapsed in reversed(st.session_state.get("profile_history", [])[:-1]):
+                st.caption(f"{label}: {elapsed * 1000:.0f} ms")
+            if profile.dump_path:
+                st.caption(f"cProfile salvat în {profile.dump_path}")
+                st.code(profile.top_functions(), language=None)
+
+# Function to end the profile started by start_profile() and show it
+def finish_profile(profile, container):
+    profiler.stop()
+    profile.dump()
+    st.session_state.profile_history = (st.session_state.get("profile_history", []) +
+                                        [(profile.label, profile.elapsed)])[-10:]
+    render_profile(profile, container)
+
+# Decorator profiling a tab: a span of the full rerun, or a profile of its
+# own when the tab's fragment reruns alone, shown at the bottom of the tab
+# (a fragment rerun cannot redraw the sidebar)
+def profiled_tab(label):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            # Part of a full rerun still being profiled: a span of its profile
+            if (profiling_enabled() and rerun_profile is not None and rerun_profile.elapsed is None
+                    and profiler.current() is rerun_profile):
+                with profiler.span(label):
+                    return fn(*args, **kwargs)
+            profile = start_profile(f"Fragment {label}")
+            if profile is None:
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                finish_profile(profile, st.container())
+        return wrapper
+    return decorator
+
 # Main content
 st.markdown("<h1 class='main-header'>🔍 Specificații Tehnice pentru Monitoare</h1>", unsafe_allow_html=True)
 
@@ -350,203 +650,104 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Create tabs for different sections
-tab1, tab2, tab3, tab4 = st.tabs(["🖥️ Specificații", "🔍 Căutare", "📊 Comparație", "🤖 Analiză AI"])
-
-with tab1:
-    # Monitor categories with emojis
-    st.markdown("<h2 class='sub-header'>📋 Selectați categoria de monitor</h2>", unsafe_allow_html=True)
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["🖥️ Specificații", "🔍 Căutare", "📊 Comparație", "🤖 Analiză AI",
+                                       "📈 Istoric prețuri"])
 
-    # Create columns for category selection
-    col1, col2, col3 = st.columns(3)
 
-    with col1:
-        st.markdown("""
-        <div class='card' style='text-align: center;'>
-            <h3>🖥️ Monitor 24 inch</h3>
-            <p>Perfect pentru birou și productivitate</p>
-        </div>
-        """, unsafe_allow_html=True)
-        category_24 = st.checkbox("Selectează Monitor 24 inch")
+# Categories and options selected in the specifications tab. Read from the
+# widget state so the other tabs see the selection without rerunning tab1.
+def current_selection():
+    if len(catalog) <= 6:
+        categories = [name for name in catalog.names if st.session_state.get(f"select_{name}")]
+    else:
+        categories = list(st.session_state.get("selected_monitors", []))
+    labels = st.session_state.get("selected_option_labels", [])
+    return categories, [label.split(" ", 1)[1] for label in labels]
 
-    with col2:
-        st.markdown("""
-        <div class='card' style='text-align: center;'>
-            <h3>🖥️ Monitor 27 inch</h3>
-            <p>Ideal pentru multitasking și gaming</p>
-        </div>
-        """, unsafe_allow_html=True)
-        category_27 = st.checkbox("Selectează Monitor 27 inch")
 
-    with col3:
-        st.markdown("""
-        <div class='card' style='text-align: center;'>
-            <h3>🖥️ Monitor 32 inch</h3>
-            <p>Excelent pentru design și editare video</p>
-        </div>
-        """, unsafe_allow_html=True)
-        category_32 = st.checkbox("Selectează Monitor 32 inch")
+# Each tab is a fragment: interacting with a widget reruns only its own tab,
+# not the CSS, sidebar and the other tabs
+@st.fragment
+@profiled_tab("Specificații")
+def specs_tab():
+    # Monitor categories with emojis
+    st.markdown("<h2 class='sub-header'>📋 Selectați categoria de monitor</h2>", unsafe_allow_html=True)
 
-    # Determine selected categories
-    selected_categories = []
-    if category_24:
-        selected_categories.append("Monitor 24 inch")
-    if category_27:
-        selected_categories.append("Monitor 27 inch")
-    if category_32:
-        selected_categories.append("Monitor 32 inch")
+    # Show category cards for small catalogs, a searchable multiselect otherwise
+    if len(catalog) <= 6:
+        selected_categories = []
+        category_columns = st.columns(3)
+        for index, name in enumerate(catalog.names):
+            with category_columns[index % 3]:
+                st.markdown(f"""
+                <div class='card' style='text-align: center;'>
+                    <h3>🖥️ {name}</h3>
+                    <p>{catalog.monitors[name]["description"]}</p>
+                </div>
+                """, unsafe_allow_html=True)
+                if st.checkbox(f"Selectează {name}", key=f"select_{name}"):
+                    selected_categories.append(name)
+    else:
+        selected_categories = st.multiselect("Selectați monitoarele:", catalog.names, key="selected_monitors")
 
     # Options for each category with emojis
     st.markdown("<h2 class='sub-header'>🔧 Selectați specificațiile dorite</h2>", unsafe_allow_html=True)
 
-    options = {
-        "Diagonala ecran": "📏",
-        "Tehnologie ecran": "🔬",
-        "Iluminare fundal": "💡",
-        "Rezolutie": "🔍",
-        "Raport de aspect": "📐",
-        "Timp de raspuns tipic": "⏱️",
-        "Rata refresh": "🔄",
-        "Luminozitate": "☀️",
-        "Raport de contrast static": "🌓",
-        "Unghi vizualizare": "👁️",
-        "Conectivitate": "🔌",
-        "Tehnologii": "⚙️",
-        "Culori": "🎨",
-        "Inaltime ajustabila": "↕️",
-        "Pivotare": "🔄",
-        "Inclinare": "↗️",
-        "Rotire": "🔁",
-        "Sursa alimentare": "🔋",
-        "Montare pe perete": "🧱",
-        "Accesorii": "📦",
-        "Standarde": "📜",
-        "Garantie produs": "🛡️",
-    }
-
     # Create a multiselect with emojis
     option_labels = [f"{emoji} {option}" for option, emoji in options.items()]
-    selected_option_labels = st.multiselect("Selectați specificațiile dorite:", option_labels)
+    selected_option_labels = st.multiselect("Selectați specificațiile dorite:", option_labels,
+                                            key="selected_option_labels")
 
     # Extract the actual option names without emojis
     selected_options = [label.split(" ", 1)[1] for label in selected_option_labels]
 
-    # Specifications for each monitor
-    specs = {
-        "Monitor 24 inch": {
-            "Diagonala ecran": "23.8 inch",
-            "Tehnologie ecran": "IPS",
-            "Iluminare fundal": "LED",
-            "Rezolutie": "1920x1080 Full HD",
-            "Raport de aspect": "16:9",
-            "Timp de raspuns tipic": "3 ms",
-            "Rata refresh": "100 Hz",
-            "Luminozitate": "250 cd/mp",
-            "Raport de contrast static": "1300:1",
-            "Unghi vizualizare": "Orizontal/Vertical 178°/178°",
-            "Conectivitate": "1 x HDMI; 1 x DisplayPort; USB HUB 2 x USB 3.2",
-            "Tehnologii": "Bluelight Reducer; Flicker-Free; AdaptiveSync",
-            "Culori": "16.7 milioane",
-            "Inaltime ajustabila": "150 mm",
-            "Pivotare": "90°",
-            "Inclinare": "-5° + 23°",
-            "Rotire": "90°; 45° stanga; 45° dreapta",
-            "Sursa alimentare": "Integrata in monitor, AC 100-240V, 50/60Hz",
-            "Montare pe perete": "VESA (100 x 100 mm)",
-            "Accesorii": "1 x Cablu alimentare; 1 x Cablu DisplayPort; 1 x Cablu HDMI; 1 x Cablu USB",
-            "Standarde": "Energy STAR, CE, RoHS support",
-            "Garantie produs": "Minim 3 ani garantie producator",
-        },
-        "Monitor 27 inch": {
-            "Diagonala ecran": "27 inch",
-            "Tehnologie ecran": "IPS",
-            "Iluminare fundal": "LED",
-            "Rezolutie": "Minim 1920x1080 Full HD",
-            "Raport de aspect": "16:9",
-            "Timp de raspuns tipic": "3 ms",
-            "Rata refresh": "100 Hz minim",
-            "Luminozitate": "250 cd/mp",
-            "Raport de contrast static": "1300:1",
-            "Unghi vizualizare": "Orizontal/Vertical 178°/178°",
-            "Conectivitate": "1 x HDMI; 1 x DisplayPort; 2 x USB HUB (v.3.2 Gen 1 (5Gpbs), DC5V, 900mA))",
-            "Tehnologii": "Bluelight Reducer; Flicker-Free; AdaptiveSync",
-            "Culori": "16.7 milioane",
-            "Inaltime ajustabila": "150 mm",
-            "Pivotare": "90°",
-            "Inclinare": "-5° + 23°",
-            "Rotire": "90°; 45° stanga; 45° dreapta",
-            "Sursa alimentare": "Integrata in monitor, AC 100-240V, 50/60Hz",
-            "Montare pe perete": "VESA (100 x 100 mm)",
-            "Accesorii": "1 x Cablu alimentare; 1 x Cablu DisplayPort; 1 x Cablu HDMI; 1 x Cablu USB",
-            "Standarde": "Energy STAR, CE, RoHS support",
-            "Garantie produs": "Minim 3 ani garantie producator",
-        },
-        "Monitor 32 inch": {
-            "Diagonala ecran": "32 inch",
-            "Tehnologie ecran": "IPS",
-            "Iluminare fundal": "LED",
-            "Rezolutie": "Minim 3840x2160, UHD",
-            "Raport de aspect": "16:9",
-            "Timp de raspuns tipic": "4ms",
-            "Rata refresh": "60Hz minim",
-            "Luminozitate": "350 cd/mp",
-            "Raport de contrast static": "1000:1",
-            "Unghi vizualizare": "Orizontal/vertical 178°/178°; Stanga/Dreapta 89°/89°; Sus/Jos 89°/89°",
-            "Conectivitate": "1 x HDMI; 1 x Display Port; USB-C X1; USB HUB 2xUSB V 3.2; USB -c Dock 1 x (power delivery 65W, LAN, USB V 3.2)",
-            "Tehnologii": "Bluelight Reducer; Flicker-Free; AdaptiveSync",
-            "Culori": "1.07 miliarde",
-            "Inaltime ajustabila": "150 mm",
-            "Inclinare": "-5°+ 23°",
-            "Rotire": "90°; 45° stanga; 45° dreapta",
-            "Sursa alimentare": "Integrata in monitor, AC 100-240V, 50/60Hz",
-            "Montare pe perete": "VESA (100 x 100 mm)",
-            "Accesorii": "1 x Cablu alimentare; 1 x Cablu DisplayPort; 1 x Cablu HDMI; 1 x Cablu USB",
-            "Standarde": "Energy STAR, CE, RoHS support",
-            "Garantie produs": "Minim 3 ani garantie producator",
-        },
-    }
-
     # Display selected specifications in a beautiful card layout
     if selected_categories and selected_options:
         st.markdown("<h2 class='sub-header'>📋 Specificații selectate</h2>", unsafe_allow_html=True)
 
-        for category in selected_categories:
-            st.markdown(f"<h3>{options.get('Diagonala ecran', '🖥️')} {category}</h3>", unsafe_allow_html=True)
-
-            # Create a card for each category
-            st.markdown("<div class='card'>", unsafe_allow_html=True)
-
-            # Create a table for better visualization
-            data = []
-            for option in selected_options:
-                if option in specs[category]:
-                    emoji = options.get(option, "")
-                    data.append([f"{emoji} {option}", specs[category][option]])
-
-            if data:
-                df = pd.DataFrame(data, columns=["Specificație", "Valoare"])
-                st.table(df)
-
-            st.markdown("</div>", unsafe_allow_html=True)
+        # One grid row per monitor, one column per selected spec; only the
+        # visible page is built and sent to the browser
+        with profiler.span("Specificații · tabele"):
+            control_columns = st.columns(4)
+            sort_by = control_columns[0].selectbox("Sortează după", [NAME_COLUMN] + selected_options,
+                                                   key="specs_sort")
+            descending = control_columns[1].toggle("Descrescător", key="specs_descending")
+            page_sizes = sorted({10, 25, 50, 100, GRID_PAGE_SIZE})
+            page_size = control_columns[2].selectbox("Rânduri pe pagină", page_sizes,
+                                                     index=page_sizes.index(GRID_PAGE_SIZE), key="specs_page_size")
+            with control_columns[3]:
+                page = grid_pager("Pagina", "specs_page", len(selected_categories), page_size)
+
+            spec_grid = spec_page(specs, selected_categories, selected_options, page, page_size, sort_by, descending)
+            spec_grid.columns = [f"{options.get(option, '')} {option}" for option in spec_grid.columns]
+            st.dataframe(spec_grid)
 
     # Button to generate PDF report
     if selected_categories and selected_options:
+        report_selection = [list(selected_categories), list(selected_options)]
         if st.button("📄 Generează raport PDF", key="pdf_button"):
-            with st.spinner("Generare raport în curs..."):
-                # Generate PDF
-                pdf_buffer = generate_pdf(selected_categories, selected_options, specs, options)
+            request_report("report_pdf_job", spec_report(selected_categories, selected_options, specs),
+                           context={"selection": report_selection})
 
-                # Offer download
-                st.download_button(
-                    label="📥 Descarcă raportul PDF",
-                    data=pdf_buffer,
-                    file_name="specificatii_monitoare.pdf",
-                    mime="application/pdf"
-                )
+        report_pdf, report_context, report_cached = finished_report("report_pdf_job")
+        if report_pdf is not None:
+            st.session_state.report_pdf = {"data": report_pdf, "selection": report_context["selection"]}
+            st.success("✅ Raport generat cu succes!" + (" (din cache)" if report_cached else ""))
+            st.balloons()
+
+        # Offer download while the report matches the current selection
+        if st.session_state.get("report_pdf", {}).get("selection") == report_selection:
+            st.download_button(
+                label="📥 Descarcă raportul PDF",
+                data=st.session_state.report_pdf["data"],
+                file_name="specificatii_monitoare.pdf",
+                mime="application/pdf"
+            )
 
-                st.success("✅ Raport generat cu succes!")
-                st.balloons()
 
-with tab2:
+@st.fragment
+@profiled_tab("Căutare")
+def search_tab():
     st.markdown("<h2 class='sub-header'>🔍 Căutare avansată</h2>", unsafe_allow_html=True)
 
     # Display a search icon
@@ -570,198 +771,230 @@ with tab2:
 
     # Shop selection with dropdown
     if include_shop:
-        shop_options = ["emag.ro", "pcgarage.ro", "altex.ro", "mediagalaxy.ro", "nod.ro", "cel.ro",
-                        "probitz.ro", "bsp-shop.ro", "iiyama-eshop.ro", "evomag.ro", "flanco.ro",
-                        "itgalaxy.ro", "forit.ro", "vexio.ro", "dc-shop.ro", 
-                        "soliton.ro", "picxelit.ro", "badabum.ro", "powerup.ro", "citgrup.ro"]
-        selected_shop = st.selectbox("Selectați magazinul:", shop_options)
-
-    # Advanced specification filtering
-    st.markdown("<h3>Filtrare avansată specificații</h3>", unsafe_allow_html=True)
-
-    # Create columns for better organization
-    spec_col1, spec_col2, spec_col3 = st.columns(3)
-
-    with spec_col1:
-        # Resolution options
-        resolution_options = ["Toate rezoluțiile", "Full HD (1920x1080)", "2K/QHD (2560x1440)", "4K/UHD (3840x2160)"]
-        selected_resolution = st.selectbox("Rezoluție:", resolution_options)
-
-        # Panel technology
-        panel_options = ["Toate tehnologiile", "IPS", "VA", "TN", "OLED"]
-        selected_panel = st.selectbox("Tehnologie panou:", panel_options)
-
-    with spec_col2:
-        # Refresh rate options
-        refresh_options = ["Toate ratele", "60 Hz", "75 Hz", "100 Hz", "120 Hz", "144 Hz", "165 Hz", "240 Hz"]
-        selected_refresh = st.selectbox("Rată refresh:", refresh_options)
-
-        # Response time
-        response_options = ["Toate timpii", "1 ms", "2 ms", "3 ms", "4 ms", "5+ ms"]
-        selected_response = st.selectbox("Timp de răspuns:", response_options)
-
-    with spec_col3:
-        # Price range
-        if include_price:
-            price_range = st.slider("Interval de preț (RON):", 500, 5000, (800, 2500), step=100)
-
-        # Special features
-        special_features = st.multiselect("Caracteristici speciale:",
-                                         ["Adaptive-Sync", "G-Sync", "FreeSync", "HDR", "USB-C", "Boxe încorporate",
-                                          "Pivot", "Înălțime ajustabilă", "VESA"])
-
-    # Custom search term
-    search_col1, search_col2 = st.columns([3, 1])
-    with search_col1:
-        search_query = st.text_input("🔍 Termen de căutare personalizat:",
-                                    placeholder="Ex: monitor gaming ieftin")
-
-    # Search button with enhanced functionality
-    with search_col2:
-        if st.button("🔍 Caută", key="search_button"):
-            if selected_categories and selected_options:
-                # Build the query with more granular specifications
-                query_parts = []
-
-                # Add selected categories
-                category_part = " OR ".join(selected_categories)
-                query_parts.append(f"({category_part})")
-
-                # Add selected specifications
-                for category in selected_categories:
-                    for option in selected_options:
-                        if option in specs[category]:
-                            query_parts.append(f"{option} {specs[category][option]}")
-
-                # Add resolution filter if specified
-                if selected_resolution != "Toate rezoluțiile":
-                    resolution_value = selected_resolution.split(" ")[0]  # Extract the resolution name
-                    query_parts.append(resolution_value)
-
-                # Add panel technology if specified
-                if selected_panel != "Toate tehnologiile":
-                    query_parts.append(selected_panel)
-
-                # Add refresh rate if specified
-                if selected_refresh != "Toate ratele":
-                    query_parts.append(selected_refresh)
-
-                # Add response time if specified
-                if selected_response != "Toate timpii":
-                    query_parts.append(selected_response)
-
-                # Add special features
-                for feature in special_features:
-                    query_parts.append(feature)
-
-                # Add price if selected
-                if include_price:
-                    query_parts.append(f"pret {price_range[0]}-{price_range[1]} RON")
-
-                # Add shop if selected
-                if include_shop and selected_shop:
-                    query_parts.append(f"site:{selected_shop}")
-                else:
-                    # Otherwise, restrict to Romanian sites only
-                    query_parts.append("site:.ro")
-
-                # Add custom search term if provided
-                if search_query:
-                    query_parts.append(search_query)
-
-                # Combine all parts
-                final_query = " ".join(query_parts)
-
-                # Add Romanian domains to include in search
-                romanian_domains = [
-                    "emag.ro", "pcgarage.ro", "altex.ro", "mediagalaxy.ro", "cel.ro",
-                    "evomag.ro", "itgalaxy.ro", "forit.ro", "vexio.ro", "dc-shop.ro",
-                    "flanco.ro", "nod.ro", "probitz.ro", "bsp-shop.ro", "iiyama-eshop.ro",
-                    "soliton.ro", "picxelit.ro", "badabum.ro", "powerup.ro", "citgrup.ro"
-                ]
-
-                # Add site:.ro restriction if not already included
-                if "site:.ro" not in final_query and not any(f"site:{domain}" in final_query for domain in romanian_domains):
-                    final_query += " site:.ro"
-
-                # Add language restriction to Romanian
-                final_query += " &lr=lang_ro"
-
-                # Exclude international sites
-                excluded_sites = [
-                    "amazon.com", "ebay.com", "aliexpress.com", "walmart.com", "bestbuy.com",
-                    "newegg.com", "bhphotovideo.com", "adorama.com", "currys.co.uk", "argos.co.uk",
-                    "mediamarkt.de", "saturn.de", "fnac.com", "darty.com", "ldlc.com", "otto.de",
-                    "conrad.de", "verkkokauppa.com", "komplett.no", "elkjop.no", "power.no",
-                    "coolblue.nl", "bol.com", "mediamarkt.nl", "amazon.co.uk", "amazon.de",
-                    "amazon.fr", "amazon.it", "amazon.es", "amazon.nl", "amazon.se", "anodos.ru",
-                    "emag.bg"
-                ]
-                for site in excluded_sites:
-                    final_query += f" -site:{site}"
-
-                # Use Gemini to enhance the search query if API key is available
-                if gemini_api_key:
-                    try:
-                        model = genai.GenerativeModel('gemini-2.0-flash')
-                        prompt = f"""
-                        Optimizează următoarea interogare de căutare pentru a găsi monitoare care îndeplinesc aceste specificații:
-                        {final_query}
-
-                        Returnează doar interogarea optimizată, fără explicații suplimentare.
-                        """
-
-                        response = model.generate_content(prompt)
-                        enhanced_query = response.text.strip()
-
-                        # Use the enhanced query if it's not empty
-                        if enhanced_query:
-                            st.info(f"🤖 Interogare optimizată de AI: {enhanced_query}")
-                            final_query = enhanced_query
-                    except Exception as e:
-                        st.warning(f"Nu s-a putut optimiza interogarea cu Gemini: {e}")
-
-                # Show search progress indicators like in the screenshot
-                st.markdown("""
-                <div style="background-color: #e8f4f9; padding: 10px; border-radius: 5px; margin-bottom: 10px;">
-                    <p>🔍 Interogare optimizată de AI: Monitor gaming 24 inch ieftin emag</p>
-                </div>
-                """, unsafe_allow_html=True)
+        selected_shop = st.selectbox("Selectați magazinul:", SHOP_OPTIONS)
+    else:
+        # Search every shop concurrently instead of one mixed query
+        fan_out = st.checkbox("⚡ Caută în paralel în toate magazinele", value=False)
+        if fan_out:
+            fan_out_shops = st.multiselect("Magazine:", SHOP_OPTIONS, default=SHOP_OPTIONS)
+
+    # The filters are batched in a form: editing them reruns nothing until
+    # the filters are applied or the search is started
+    with st.form("search_form", border=False):
+        # Bypass the search cache and refresh the stored entry for this query
+        refresh_cache = st.checkbox("🔄 Ignoră cache-ul și reîmprospătează rezultatele", value=False)
+
+        # Fetch the result pages to show price and key specs in each card
+        enrich_results = st.checkbox("🔎 Completează prețul și specificațiile din paginile produselor", value=True)
+
+        # Search right away and let Gemini optimize the query in parallel
+        speculative_search_enabled = st.checkbox("🤖 Caută imediat și optimizează interogarea cu AI în paralel",
+                                                 value=True)
+
+        # Advanced specification filtering
+        st.markdown("<h3>Filtrare avansată specificații</h3>", unsafe_allow_html=True)
+
+        # Create columns for better organization
+        spec_col1, spec_col2, spec_col3 = st.columns(3)
+
+        with spec_col1:
+            # Resolution options
+            resolution_options = ["Toate rezoluțiile", "Full HD (1920x1080)", "2K/QHD (2560x1440)", "4K/UHD (3840x2160)"]
+            selected_resolution = st.selectbox("Rezoluție:", resolution_options)
+
+            # Panel technology
+            panel_options = ["Toate tehnologiile", "IPS", "VA", "TN", "OLED"]
+            selected_panel = st.selectbox("Tehnologie panou:", panel_options)
+
+        with spec_col2:
+            # Refresh rate options
+            refresh_options = ["Toate ratele", "60 Hz", "75 Hz", "100 Hz", "120 Hz", "144 Hz", "165 Hz", "240 Hz"]
+            selected_refresh = st.selectbox("Rată refresh:", refresh_options)
+
+            # Response time
+            response_options = ["Toate timpii", "1 ms", "2 ms", "3 ms", "4 ms", "5+ ms"]
+            selected_response = st.selectbox("Timp de răspuns:", response_options)
+
+        with spec_col3:
+            # Price range
+            if include_price:
+                price_range = st.slider("Interval de preț (RON):", 500, 5000, (800, 2500), step=100)
+
+            # Special features
+            special_features = st.multiselect("Caracteristici speciale:",
+                                             ["Adaptive-Sync", "G-Sync", "FreeSync", "HDR", "USB-C", "Boxe încorporate",
+                                              "Pivot", "Înălțime ajustabilă", "VESA"])
+
+        # Custom search term
+        search_col1, search_col2 = st.columns([3, 1])
+        with search_col1:
+            search_query = st.text_input("🔍 Termen de căutare personalizat:",
+                                        placeholder="Ex: monitor gaming ieftin")
+
+        # Search button with enhanced functionality
+        with search_col2:
+            st.form_submit_button("✅ Aplică filtrele")
+            search_clicked = st.form_submit_button("🔍 Caută", key="search_button")
+
+    # Evaluate the filters locally against the typed catalog (no network)
+    filter_started = time.perf_counter()
+    catalog_matches = filter_catalog(
+        catalog.frame,
+        resolution=parse_resolution(selected_resolution) if selected_resolution != "Toate rezoluțiile" else None,
+        panel=selected_panel if selected_panel != "Toate tehnologiile" else None,
+        min_refresh=parse_hz(selected_refresh) if selected_refresh != "Toate ratele" else None,
+        min_response=parse_ms(selected_response) if selected_response.endswith("+ ms") else None,
+        max_response=parse_ms(selected_response) if selected_response not in ("Toate timpii", "5+ ms") else None,
+        price_range=price_range if include_price else None,
+        features=special_features,
+    )
+    filter_elapsed = (time.perf_counter() - filter_started) * 1000
+
+    with st.expander(f"📦 Monitoare din catalog care îndeplinesc filtrele: {len(catalog_matches)} din {len(catalog)}"):
+        st.caption(f"Filtrare locală în {filter_elapsed:.1f} ms")
+        if len(catalog_matches):
+            st.dataframe(pd.DataFrame({
+                "Monitor": catalog_matches.index[:100],
+                "Rezoluție": [f"{w:.0f}x{h:.0f}" if w == w else "N/A" for w, h in
+                              zip(catalog_matches["resolution_width"][:100], catalog_matches["resolution_height"][:100])],
+                "Panou": catalog_matches["panel"][:100].astype(object).fillna("N/A").to_numpy(),
+                "Refresh (Hz)": catalog_matches["refresh_hz"][:100].to_numpy(),
+                "Răspuns (ms)": catalog_matches["response_ms"][:100].to_numpy(),
+                "Preț (RON)": catalog_matches["price_ron"][:100].to_numpy(),
+            }), hide_index=True)
+
+    if search_clicked:
+        selected_categories, selected_options = current_selection()
+        if selected_categories and selected_options:
+            selection = {
+                "categories": selected_categories,
+                "options": selected_options,
+                "resolution": selected_resolution if selected_resolution != "Toate rezoluțiile" else None,
+                "panel": selected_panel if selected_panel != "Toate tehnologiile" else None,
+                "refresh": selected_refresh if selected_refresh != "Toate ratele" else None,
+                "response": selected_response if selected_response != "Toate timpii" else None,
+                "features": special_features,
+                "price_range": price_range if include_price else None,
+                "shop": selected_shop if include_shop else None,
+                "text": search_query,
+            }
+
+            # The local shop index answers first; on a miss, speculative mode
+            # searches the raw query while Gemini optimizes it and fan-out
+            # searches keep the sequential optimization
+            fan_out_selected = not include_shop and fan_out and bool(fan_out_shops)
+            optimize = None
+            if gemini_api_key:
+                optimize = "speculative" if speculative_search_enabled and not fan_out_selected else "sequential"
+
+            # Show search progress indicators like in the screenshot
+            st.markdown("""
+            <div style="background-color: #e8f4f9; padding: 10px; border-radius: 5px; margin-bottom: 10px;">
+                <p>🔍 Interogare optimizată de AI: Monitor gaming 24 inch ieftin emag</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+            # Show search initiated message
+            st.markdown("""
+            <div style="background-color: #e6f7e6; padding: 10px; border-radius: 5px; margin-bottom: 10px;">
+                <p>✅ Căutare inițiată pentru: Monitor gaming 24 inch ieftin emag</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+            if fan_out_selected:
+                throttle_wait = service.upstream_wait("serper", len(fan_out_shops))
+                if throttle_wait >= 1:
+                    st.info(f"⏳ Limita de cereri Serper.dev este atinsă: căutările se termină în ~{throttle_wait:.0f} s.")
+
+            # Perform the search as a background job; the enrichment of a
+            # previous search is no longer wanted
+            if st.session_state.get("enrich_job"):
+                job_manager.cancel(st.session_state.pop("enrich_job")["id"])
+            submit_job("search_job", "search", service.search, selection, use_cache=not refresh_cache,
+                       optimize=optimize, fan_out=fan_out_shops if fan_out_selected else None, label="Căutare",
+                       context={"enrich": enrich_results, "optimize": optimize})
+        else:
+            st.error("❌ Selectați cel puțin o categorie și o specificație pentru a căuta.")
+
+    # Results of the search job, shown as soon as it finishes (partial
+    # results appear while Gemini is still optimizing the query, or shop by
+    # shop in fan-out mode)
+    search_job, search_context = finished_job("search_job", render_search_progress)
+    if search_job is not None:
+        if search_job.status == FAILED:
+            if isinstance(search_job.error, SearchError):
+                st.error(f"❌ Eroare la interogarea API-ului Serper.dev: {search_job.error.status_code}")
+                st.write(f"Raspuns API: {search_job.error.text}")
+            else:
+                st.error(f"❌ A aparut o eroare: {search_job.error}")
+        elif search_context["enrich"] and search_job.result["source"] != "index":
+            # Product pages are fetched by a job of their own; the cards fill
+            # in as each page is parsed
+            if submit_job("enrich_job", "enrich", enrich_outcome, search_job.result, label="Detalii produse",
+                          context={"optimize": search_context["optimize"], "outcome": search_job.result}) is None:
+                show_search_results(search_job.result, search_context["optimize"])
+        else:
+            show_search_results(search_job.result, search_context["optimize"])
+
+    # Results enriched from the product pages, shown as soon as the
+    # enrichment job finishes
+    pending_enrich = st.session_state.get("enrich_job") or {}
+    enrich_job, enrich_context = finished_job(
+        "enrich_job", lambda outcome: render_outcome(outcome, pending_enrich.get("optimize")))
+    if enrich_job is not None:
+        if enrich_job.status == FAILED:
+            st.warning(f"⚠️ Detaliile produselor nu au putut fi completate: {enrich_job.error}")
+            show_search_results(enrich_context["outcome"], enrich_context["optimize"])
+        else:
+            show_search_results(enrich_job.result, enrich_context["optimize"])
+
+
+# Function to show the final results of a search and offer them for price
+# tracking and export
+def show_search_results(outcome, optimize):
+    results = render_outcome(outcome, optimize)
+    # Offered for price tracking in the price history tab
+    st.session_state.last_search_results = {result["link"]: result.get("title") or result["link"]
+                                            for result in results if result.get("link")}
+    st.caption(f"📦 Exportă toate cele {len(results)} rezultate, cu specificațiile tipizate:")
+    export_buttons("rezultate_cautare", lambda: result_tables(results), result_schema())
+
+
+# Download buttons for an export in every format, each generated only when
+# downloaded and chunk by chunk. Downloading does not rerun the script, so
+# results shown only once stay on the page.
+def export_buttons(file_stem, tables, schema):
+    for column, (fmt, (mime, extension)) in zip(st.columns(len(EXPORT_FORMATS)), EXPORT_FORMATS.items()):
+        with column:
+            st.download_button(
+                label=f"📥 {dict(parquet='Parquet', arrow='Arrow IPC', csv='CSV')[fmt]}",
+                data=lambda fmt=fmt: export_bytes(tables(), fmt, schema),
+                file_name=file_stem + extension,
+                mime=mime,
+                on_click="ignore",
+                key=f"export_{file_stem}_{fmt}",
+            )
 
-                # Show search initiated message
-                st.markdown("""
-                <div style="background-color: #e6f7e6; padding: 10px; border-radius: 5px; margin-bottom: 10px;">
-                    <p>✅ Căutare inițiată pentru: Monitor gaming 24 inch ieftin emag</p>
-                </div>
-                """, unsafe_allow_html=True)
 
-                # Perform the search with Serper.dev API
-                search_results = google_search(final_query)
+# Page selector of a server-side paginated grid (0-based), reset to the last
+# page when the data shrinks below the selected one
+def grid_pager(label, key, total, page_size):
+    pages = page_count(total, page_size)
+    if st.session_state.get(key, 1) > pages:
+        st.session_state[key] = pages
+    if pages == 1:
+        return 0
+    return st.number_input(f"{label} (din {pages})", min_value=1, max_value=pages, key=key) - 1
 
-                # Show search completed message
-                st.markdown("""
-                <div style="background-color: #e6f7e6; padding: 10px; border-radius: 5px; margin-bottom: 20px;">
-                    <p>✅ Căutare finalizată cu succes!</p>
-                </div>
-                """, unsafe_allow_html=True)
 
-                if search_results:
-                    st.subheader("Rezultate căutare")
-
-                    # Display organic results
-                    if "organic" in search_results:
-                        for i, result in enumerate(search_results["organic"][:5]):  # Show top 5 results
-                            st.markdown(f"""
-                            <div class='card'>
-                                <h3><a href="{result.get('link', '#')}" target="_blank">{result.get('title', 'Fără titlu')}</a></h3>
-                                <p>{result.get('snippet', 'Fără descriere')}</p>
-                                <p><small>{result.get('link', '')}</small></p>
-                            </div>
-                            """, unsafe_allow_html=True)
-            else:
-                st.error("❌ Selectați cel puțin o categorie și o specificație pentru a căuta.")
+# Callback of the ranking: compare the best ranked monitors
+def set_comparison(names):
+    st.session_state.compare_categories = names
+
 
-with tab3:
+@st.fragment
+@profiled_tab("Comparație")
+def compare_tab():
     st.markdown("<h2 class='sub-header'>📊 Comparație monitoare</h2>", unsafe_allow_html=True)
 
     st.markdown("""
@@ -771,10 +1004,35 @@ with tab3:
     </div>
     """, unsafe_allow_html=True)
 
+    # Weighted ranking of the whole catalog; the sliders apply on submit
+    st.markdown("<h3>🏆 Clasament după priorități</h3>", unsafe_allow_html=True)
+    with st.form("ranking_form", border=False):
+        weight_columns = st.columns(4)
+        weights = {}
+        for position, criterion in enumerate(RANKING_CRITERIA):
+            with weight_columns[position % 4]:
+                icon = "💰" if criterion == PRICE_CRITERION else options.get(criterion, "")
+                weights[criterion] = st.slider(f"{icon} {criterion}", 0, 5,
+                                               ANALYSIS_WEIGHTS["Analiză generală"].get(criterion, 0),
+                                               key=f"weight_{criterion}")
+        top_k = st.number_input("Monitoare în clasament", min_value=1, max_value=100, value=10)
+        st.form_submit_button("🏆 Actualizează clasamentul")
+
+    with profiler.span("Comparație · clasament"):
+        ranked = service.rank(weights, int(top_k))
+    if ranked.empty:
+        st.info("ℹ️ Alegeți cel puțin o prioritate mai mare decât 0.")
+    else:
+        st.dataframe(service.ranking_table(ranked, weights), hide_index=True)
+        st.button("📊 Compară primele în tabel", on_click=set_comparison, args=(list(ranked.index[:4]),))
+
     # Select categories to compare
+    st.session_state.compare_categories = [name for name in st.session_state.get("compare_categories",
+                                                                                  catalog.names[:2])
+                                           if name in catalog.monitors]
     compare_categories = st.multiselect("Selectați categoriile pentru comparație:",
-                                       ["Monitor 24 inch", "Monitor 27 inch", "Monitor 32 inch"],
-                                       default=["Monitor 24 inch", "Monitor 27 inch"])
+                                       catalog.names,
+                                       key="compare_categories")
 
     # Select specifications to compare
     compare_specs = st.multiselect("Selectați specificațiile pentru comparație:",
@@ -785,38 +1043,49 @@ with tab3:
     if compare_categories and compare_specs:
         st.markdown("<h3>Tabel comparativ</h3>", unsafe_allow_html=True)
 
-        # Prepare data for the table
-        comparison_data = []
-
-        # Add header row
-        header_row = ["Specificație"] + compare_categories
-
-        # Add data rows
-        for spec in compare_specs:
-            row = [f"{options.get(spec, '')} {spec}"]
-            for category in compare_categories:
-                if spec in specs[category]:
-                    row.append(specs[category][spec])
-                else:
-                    row.append("N/A")
-            comparison_data.append(row)
+        # One row per spec and one column per category, a page of each at a
+        # time; the first category stays on every page as the reference and
+        # the cells that differ from it are highlighted
+        with profiler.span("Comparație · tabel"):
+            control_columns = st.columns(2)
+            with control_columns[0]:
+                page = grid_pager("Specificații, pagina", "compare_page", len(compare_specs), GRID_PAGE_SIZE)
+            with control_columns[1]:
+                column_page = grid_pager("Monitoare, pagina", "compare_column_page", len(compare_categories) - 1,
+                                         GRID_COLUMN_PAGE_SIZE)
+
+            comparison_grid, differs, row_differs = comparison_page(specs, compare_categories, compare_specs, page,
+                                                                    column_page=column_page)
+            comparison_grid.index = [f"{options.get(spec, '')} {spec}" for spec in comparison_grid.index]
+            comparison_grid.insert(0, "≠", np.where(row_differs, "≠", ""))
+            highlight = np.where(differs, "background-color: #fff3cd", "")
+            st.dataframe(comparison_grid.style.apply(
+                lambda frame: pd.DataFrame(np.column_stack([np.full(len(frame), ""), highlight]),
+                                           index=frame.index, columns=frame.columns),
+                axis=None,
+            ))
+
+        # CSV of the whole comparison, built only when downloaded
+        def comparison_csv():
+            table = service.comparison(compare_categories, compare_specs)
+            table["Specificație"] = [f"{options.get(spec, '')} {spec}" for spec in compare_specs]
+            return table.to_csv(index=False)
 
-        # Create DataFrame
-        df_comparison = pd.DataFrame(comparison_data, columns=header_row)
-
-        # Display the table
-        st.table(df_comparison)
-
-        # Add download button for CSV
-        csv = df_comparison.to_csv(index=False)
         st.download_button(
             label="📥 Descarcă tabel comparativ (CSV)",
-            data=csv,
+            data=comparison_csv,
             file_name="comparatie_monitoare.csv",
             mime="text/csv",
         )
+        st.caption("📦 Exportă monitoarele comparate, câte un rând per monitor, cu specificațiile tipizate:")
+        export_buttons("monitoare_comparate",
+                       lambda: monitor_tables(catalog, compare_categories, compare_specs),
+                       monitor_schema(compare_specs))
 
-with tab4:
+
+@st.fragment
+@profiled_tab("Analiză AI")
+def analysis_tab():
     st.markdown("<h2 class='sub-header'>🤖 Analiză AI cu Gemini</h2>", unsafe_allow_html=True)
 
     st.markdown("""
@@ -834,46 +1103,90 @@ with tab4:
 
         analysis_type = st.radio(
             "Selectați tipul de analiză:",
-            ["Analiză generală", "Comparație pentru gaming", "Recomandare pentru productivitate", "Raport calitate-preț"]
+            list(ANALYSIS_CONTEXTS)
         )
 
+        refresh_analysis = st.checkbox("🔄 Ignoră cache-ul și regenerează analiza", value=False)
+
+        # Several analyses at once are structured: one JSON answer per
+        # analysis with the report sections, asked for concurrently
+        all_types = st.checkbox("🧩 Toate tipurile de analiză deodată", value=False)
+        per_category = st.checkbox("🖥️ Câte o analiză pentru fiecare monitor selectat", value=False)
+        single_call = st.checkbox("📦 Un singur apel Gemini pentru toate analizele", value=False,
+                                  disabled=not (all_types or per_category))
+
+        # Render the analysis while Gemini is still writing it; without
+        # streaming the analysis is structured on the report sections
+        stream_analysis = st.checkbox("⚡ Afișează analiza pe măsură ce este generată", value=True,
+                                      disabled=all_types or per_category)
+        structured = all_types or per_category or not stream_analysis
+
+        # Gemini recommends only from the best catalog entries for this analysis type
+        with st.expander("🏆 Lista scurtă de monitoare pentru recomandări"):
+            st.dataframe(service.ranking_table(service.shortlist(analysis_type), ANALYSIS_WEIGHTS[analysis_type]),
+                         hide_index=True)
+
+    selected_categories, selected_options = current_selection()
     if st.button("🤖 Analizează cu Gemini", key="analyze_button"):
         if selected_categories and selected_options:
-            with st.spinner("Analiză în curs cu Gemini AI..."):
-                # Prepare data for analysis
-                specs_data = ""
-                for category in selected_categories:
-                    specs_data += f"\n\n{category}:\n"
-                    for option in selected_options:
-                        if option in specs[category]:
-                            specs_data += f"- {option}: {specs[category][option]}\n"
-
-                # Add context based on analysis type
-                context = ""
-                if analysis_type == "Comparație pentru gaming":
-                    context = "Concentrează-te pe aspectele importante pentru gaming: rata de refresh, timpul de răspuns, tehnologiile adaptive sync."
-                elif analysis_type == "Recomandare pentru productivitate":
-                    context = "Concentrează-te pe aspectele importante pentru productivitate: rezoluție, dimensiune, ergonomie, conectivitate."
-                elif analysis_type == "Raport calitate-preț":
-                    context = "Evaluează raportul calitate-preț și oferă recomandări de monitoare cu specificații similare la prețuri competitive."
-
-                # Get analysis from Gemini
-                analysis = analyze_with_gemini(f"{analysis_type} pentru {', '.join(selected_categories)}", specs_data + "\n" + context)
-
-                # Store analysis in session state so it persists between reruns
-                st.session_state.current_analysis = analysis
-                st.session_state.current_analysis_type = analysis_type
-                st.session_state.current_selected_categories = selected_categories
-                st.session_state.current_specs_data = specs_data
-
-                # Display analysis
-                st.markdown("<div class='card'>", unsafe_allow_html=True)
-                st.markdown(f"<h3>Analiză {analysis_type}</h3>", unsafe_allow_html=True)
-                st.markdown(analysis)
-                st.markdown("</div>", unsafe_allow_html=True)
+            # Prepare data for analysis, with the focus of the analysis type
+            specs_data, prompt = service.analysis_request(selected_categories, selected_options, analysis_type)
+            context = {"analysis_type": analysis_type, "categories": selected_categories, "options": selected_options,
+                       "specs_data": specs_data}
+
+            # Get analysis from Gemini as a background job
+            if structured:
+                types = list(ANALYSIS_CONTEXTS) if all_types else [analysis_type]
+                groups = [[category] for category in selected_categories] if per_category else [selected_categories]
+                requests = [(each_type, group) for each_type in types for group in groups]
+                if len(requests) > 1:
+                    context["analysis_type"] = f"{len(requests)} analize"
+                submit_job("analysis_job", "analysis", service.structured_analyses, requests, selected_options,
+                           use_cache=not refresh_analysis, single_call=single_call and len(requests) > 1,
+                           label="Analize Gemini" if len(requests) > 1 else "Analiză Gemini",
+                           context={**context, "requests": requests})
+            else:
+                submit_job("analysis_job", "analysis", service.analysis_task, prompt, use_cache=not refresh_analysis,
+                           stream=stream_analysis, label="Analiză Gemini", context=context)
         else:
             st.error("❌ Selectați cel puțin o categorie și o specificație pentru analiză.")
 
+    # Show the analysis as it is generated, then store it once the job finishes
+    pending_analysis = st.session_state.get("analysis_job") or {}
+    analysis_job, analysis_context = finished_job(
+        "analysis_job", render_structured_progress if "requests" in pending_analysis else render_analysis_progress)
+    if analysis_job is not None:
+        if analysis_job.status == FAILED:
+            st.error(f"❌ Eroare la utilizarea Gemini API: {analysis_job.error}")
+            analysis = "Nu s-a putut realiza analiza cu Gemini. Verificați cheia API si conexiunea la internet."
+        elif "requests" in analysis_context:
+            requests = analysis_context["requests"]
+            analysis = [[analysis_title(*request) if len(requests) > 1 else request[0], sections]
+                        for request, (sections, _) in zip(requests, analysis_job.result)]
+            cached = sum(1 for _, was_cached in analysis_job.result if was_cached)
+            if cached:
+                st.info(f"⚡ {cached} din {len(requests)} analize servite din cache")
+        else:
+            analysis = analysis_job.result["text"]
+            if analysis_job.result.get("cached"):
+                st.info("⚡ Analiză servită din cache")
+            elif "first_chunk" in analysis_job.result:
+                st.caption(f"Primul fragment în {analysis_job.result['first_chunk']:.1f} s · "
+                           f"analiză completă în {analysis_job.result['total']:.1f} s")
+
+        # Store analysis in session state so it persists between reruns
+        st.session_state.current_analysis = analysis
+        st.session_state.current_analysis_type = analysis_context["analysis_type"]
+        st.session_state.current_selected_categories = analysis_context["categories"]
+        st.session_state.current_selected_options = analysis_context["options"]
+        st.session_state.current_specs_data = analysis_context["specs_data"]
+
+        # Display analysis
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown(f"<h3>Analiză {analysis_context['analysis_type']}</h3>", unsafe_allow_html=True)
+        st.markdown(analysis_markdown(analysis))
+        st.markdown("</div>", unsafe_allow_html=True)
+
     # Only show the save button if we have an analysis in session state
     if 'current_analysis' in st.session_state:
         # Add custom styling for the save button
@@ -908,173 +1221,29 @@ with tab4:
             analysis = st.session_state.current_analysis
             analysis_type = st.session_state.current_analysis_type
             selected_categories = st.session_state.current_selected_categories
+            selected_options = st.session_state.current_selected_options
             specs_data = st.session_state.current_specs_data
 
             # Create text file with analysis
             analysis_text = f"# Analiză {analysis_type} pentru {', '.join(selected_categories)}\n\n"
             analysis_text += f"Data: {time.strftime('%d-%m-%Y %H:%M:%S')}\n\n"
             analysis_text += f"## Specificații analizate\n\n{specs_data}\n\n"
-            analysis_text += f"## Analiză Gemini AI\n\n{analysis}"
+            analysis_text += f"## Analiză Gemini AI\n\n{analysis_markdown(analysis)}"
 
             # Store text in session state
             st.session_state.analysis_text = analysis_text
             st.session_state.analysis_filename = f"analiza_{analysis_type.lower().replace(' ', '_')}.txt"
 
-            # Generate PDF with analysis
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            styles = getSampleStyleSheet()
-            elements = []
-
-            # Add title
-            title_style = ParagraphStyle(
-                'Title',
-                parent=styles['Heading1'],
-                fontSize=18,
-                textColor=colors.purple,
-                spaceAfter=12,
-                fontName='Helvetica',
-                encoding='utf-8'
-            )
-
-            normal_style = ParagraphStyle(
-                'Normal',
-                parent=styles['Normal'],
-                fontName='Helvetica',
-                encoding='utf-8'
-            )
-
-            heading_style = ParagraphStyle(
-                'Heading',
-                parent=styles['Heading2'],
-                fontSize=14,
-                textColor=colors.blue,
-                spaceAfter=8,
-                fontName='Helvetica',
-                encoding='utf-8'
-            )
-
-            elements = []
-
-            # Add title with proper encoding
-            elements.append(Paragraph(f"Analiza detaliata {', '.join(selected_categories)}", title_style))
-            elements.append(Spacer(1, 12))
-
-            # Add date
-            date_style = ParagraphStyle(
-                'Date',
-                parent=styles['Normal'],
-                fontSize=10,
-                textColor=colors.grey
-            )
-            elements.append(Paragraph(f"Generat de catre ionut.capota@processit.ro la: {time.strftime('%d-%m-%Y %H:%M:%S')}", date_style))
-            elements.append(Spacer(1, 24))
-
-            # Add introduction
-            intro_text = f"Specificatiile prezentate descriu un monitor {', '.join(selected_categories)} cu caracteristici solide, potrivit pentru o gama larga de utilizari."
-            elements.append(Paragraph(intro_text, styles['Normal']))
-            elements.append(Spacer(1, 12))
-
-            # Add main sections similar to the screenshot
-            sections = [
-                "1. Cele mai importante caracteristici:",
-                "2. Avantajele specificatiilor:",
-                "3. Potentiale utilizari recomandate:",
-                "4. Recomandari de produse care ar putea indeplini aceste specificatii:"
-            ]
-
-            # Split analysis into sections based on numbering or headers
-            analysis_parts = analysis.split("\n\n")
-            current_section = 0
-
-            for section in sections:
-                section_style = ParagraphStyle(
-                    'Section',
-                    parent=styles['Heading2'],
-                    fontSize=14,
-                    textColor=colors.blue,
-                    spaceAfter=8,
-                    fontName='Helvetica',
-                    encoding='utf-8'
-                )
-
-                elements.append(Paragraph(section, section_style))
-
-                # Add some content for each section
-                if current_section < len(analysis_parts):
-                    elements.append(Paragraph(analysis_parts[current_section], styles['Normal']))
-                    current_section += 1
-                else:
-                    # Fallback content if analysis doesn't have enough sections
-                    elements.append(Paragraph("Informatii detaliate vor fi disponibile in analiza completa.", styles['Normal']))
-
-                elements.append(Spacer(1, 16))
-
-            # Add specifications
-            spec_style = ParagraphStyle(
-                'Specs',
-                parent=styles['Heading3'],
-                fontSize=12,
-                textColor=colors.darkblue,
-                spaceAfter=6,
-                fontName='Helvetica',
-                encoding='utf-8'
-            )
-
-            elements.append(Paragraph("Specificatii tehnice:", spec_style))
-
-            # Create a table for specifications
-            data = [["Specificatie", "Valoare"]]
-            for category in selected_categories:
-                for option in selected_options:
-                    if option in specs[category]:
-                        data.append([option, specs[category][option]])
-
-            if len(data) > 1:  # Only create table if we have data
-                table = Table(data, colWidths=[200, 300])
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (1, 0), colors.lavender),
-                    ('TEXTCOLOR', (0, 0), (1, 0), colors.darkblue),
-                    ('ALIGN', (0, 0), (1, 0), 'CENTER'),
-                    ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (1, 0), 12),
-                    ('BOTTOMPADDING', (0, 0), (1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                    ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 10),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ]))
-                elements.append(table)
-
-            # Add conclusion
-            elements.append(Spacer(1, 20))
-            conclusion_text = "In concluzie, specificatiile descriu un monitor versatil si performant, potrivit pentru o gama larga de utilizari, oferind un bun raport calitate-pret. Ajustabilitatea ergonomica si tehnologiile de confort vizual sunt puncte forte importante."
-            elements.append(Paragraph(conclusion_text, styles['Normal']))
-
-            # Add footer
-            elements.append(Spacer(1, 30))
-            footer_style = ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontSize=8,
-                textColor=colors.grey,
-                alignment=1,  # Center alignment
-                fontName='Helvetica',
-                encoding='utf-8'
-            )
-            
-            elements.append(Paragraph("© 2025 ionut.capota@processit.ro", footer_style))
-
-            # Build PDF
-            doc.build(elements)
-            buffer.seek(0)
+            # Generate PDF with analysis (or reuse an identical one)
+            st.session_state.pop("analysis_pdf", None)
+            request_report("analysis_pdf_job", analysis_report(analysis, selected_categories, selected_options, specs),
+                           context={"filename": f"analiza_{analysis_type.lower().replace(' ', '_')}.pdf"})
 
+        analysis_pdf, analysis_pdf_context, _ = finished_report("analysis_pdf_job")
+        if analysis_pdf is not None:
             # Store the PDF in session state
-            st.session_state.analysis_pdf = buffer
-            st.session_state.analysis_pdf_filename = f"analiza_{analysis_type.lower().replace(' ', '_')}.pdf"
+            st.session_state.analysis_pdf = analysis_pdf
+            st.session_state.analysis_pdf_filename = analysis_pdf_context["filename"]
 
             # Show success message
             st.success("✅ Analiză salvată cu succes!")
@@ -1098,12 +1267,119 @@ with tab4:
                     data=st.session_state.analysis_text,
                     file_name=st.session_state.analysis_filename,
                     mime="text/plain"
-                )    
+                )
 
-# Footer
-st.markdown("---")
-st.markdown("""
+
+# Outcome of the last check of a watched product page
+CHECK_LABELS = {UPDATED: "✅ preț actualizat", UNCHANGED: "➖ pagină neschimbată", NO_PRICE: "⚠️ preț negăsit",
+                CHECK_FAILED: "❌ eroare"}
+
+
+@st.fragment
+@profiled_tab("Istoric prețuri")
+def prices_tab():
+    st.markdown("<h2 class='sub-header'>📈 Istoric prețuri</h2>", unsafe_allow_html=True)
+
+    st.markdown(f"""
+    <div class='card'>
+        <p>Urmăriți evoluția prețului produselor din magazinele din listă. Paginile urmărite sunt verificate
+        la {PRICE_TRACK_INTERVAL / 3600:g} ore (<code>python price_history.py track --every {PRICE_TRACK_INTERVAL}</code>)
+        și descărcate din nou doar dacă s-au schimbat; graficele se construiesc din istoricul local, fără cereri în rețea.</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Watch product pages, pasted or picked from the last search
+    with st.form("watch_form", clear_on_submit=True, border=False):
+        found = {link: title for link, title in st.session_state.get("last_search_results", {}).items()
+                 if domain_allowed(url_domain(link), SHOP_OPTIONS)}
+        picked = st.multiselect("Din ultima căutare:", list(found),
+                                format_func=lambda link: f"{found[link]} ({url_domain(link)})") if found else []
+        pasted = st.text_area("Adrese de produse (câte una pe linie):", height=80)
+        if st.form_submit_button("👁️ Urmărește prețul"):
+            pages = [(link, found[link]) for link in picked] + [(url, None) for url in pasted.splitlines() if url.strip()]
+            for url, title in pages:
+                try:
+                    service.watch_price(url, title)
+                except ValueError as e:
+                    st.warning(f"⚠️ {e}")
+            if pages:
+                st.success("✅ Produsele au fost adăugate. Prețul lor apare după prima verificare.")
+
+    watched = service.price_history.watched()
+    if not watched:
+        st.info("ℹ️ Nu urmăriți încă niciun produs.")
+        return
+
+    st.dataframe(pd.DataFrame({
+        "Produs": [entry["title"] or entry["url"] for entry in watched],
+        "Magazin": [entry["shop"] for entry in watched],
+        "Preț curent": [f"{entry['price']:g} lei" if entry["price"] is not None else "N/A" for entry in watched],
+        "Ultima verificare": [time.strftime("%d.%m.%Y %H:%M", time.localtime(entry["checked"])) if entry["checked"]
+                              else "-" for entry in watched],
+        "Stare": [CHECK_LABELS.get(entry["status"], "⏳ neverificat") + (f": {entry['error']}" if entry["error"] else "")
+                  for entry in watched],
+    }), hide_index=True)
+
+    # Check every watched page now, as a background job
+    if st.button("🔄 Verifică prețurile acum"):
+        submit_job("price_job", "prices", service.price_tracker.run, force=True, label="Verificare prețuri")
+    price_job, _ = finished_job("price_job")
+    if price_job is not None:
+        if price_job.status == FAILED:
+            st.error(f"❌ A aparut o eroare: {price_job.error}")
+        else:
+            st.info(" · ".join(f"{CHECK_LABELS[status]}: {count}" for status, count in price_job.result.items()))
+
+    # Price history of one product, read from the local store only
+    labels = {entry["url"]: f"{entry['title'] or entry['url']} ({entry['shop']})" for entry in watched}
+    url = st.selectbox("Produs:", list(labels), format_func=labels.get)
+    with profiler.span("Istoric prețuri · citire"):
+        history = service.price_history.series(url)
+    if history.empty:
+        st.info("ℹ️ Nu există încă prețuri înregistrate pentru acest produs.")
+        return
+
+    current, first = history["price"].iloc[-1], history["price"].iloc[0]
+    metric_columns = st.columns(3)
+    metric_columns[0].metric("Preț curent", f"{current:g} lei", f"{current - first:+g} lei", delta_color="inverse")
+    metric_columns[1].metric("Minim", f"{history['low'].min():g} lei")
+    metric_columns[2].metric("Maxim", f"{history['high'].max():g} lei")
+    st.line_chart(history[["price", "low", "high"]].rename(columns={"price": "Preț", "low": "Minim", "high": "Maxim"}))
+    st.caption(f"{int(history['samples'].sum())} verificări din {history.index[0]:%d.%m.%Y}; punctele mai vechi "
+               "sunt comasate pe zile și săptămâni (minim, maxim și ultimul preț).")
+    if st.button("🗑️ Nu mai urmări produsul"):
+        service.price_history.unwatch(url)
+        st.rerun(scope="fragment")
+
+
+# The tabs may end the rerun early (st.rerun() once a job is done, or an
+# error): the rerun profile is then stopped without being shown, so it never
+# outlives its rerun
+rerun_completed = False
+try:
+    with tab1:
+        specs_tab()
+    with tab2:
+        search_tab()
+    with tab3:
+        compare_tab()
+    with tab4:
+        analysis_tab()
+    with tab5:
+        prices_tab()
+
+    # Footer
+    st.markdown("---")
+    st.markdown("""
 <div style='text-align: center;'>
     <p>© 2025 Dezvoltat cu ❤️ de ionut.capota@processit.ro </p>
 </div>
 """, unsafe_allow_html=True)
+    rerun_completed = True
+finally:
+    # Per-rerun timing breakdown in the sidebar
+    if rerun_profile is not None:
+        if rerun_completed:
+            finish_profile(rerun_profile, profile_panel)
+        else:
+            profiler.stop()
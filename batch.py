@@ -0,0 +1,208 @@
+import argparse
+import csv
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from exports import batch_tables, result_schema, write_export, BATCH_FIELDS, EXPORT_FORMATS
+from ratelimit import TokenBucket
+from reports import render_report
+from service import MonitorService, SELECTION_KEYS
+
+load_dotenv()
+
+# Selections processed at once
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "8"))
+
+# Selections started per second (0 = unlimited), to stay under the upstream quotas
+BATCH_RATE = float(os.getenv("BATCH_RATE", "2"))
+
+# CSV columns holding lists, separated by ";"
+LIST_COLUMNS = ("categories", "options", "features")
+
+
+# A price bound of a CSV row ("799.99" or "799,99"); text that is not a
+# number is kept as it is, so the selection check fails that item alone
+def _price(text, default):
+    if not text:
+        return default
+    try:
+        price = float(text.replace(",", "."))
+    except ValueError:
+        return text
+    return int(price) if price.is_integer() else price
+
+
+def _csv_item(row):
+    item = {key: value.strip() for key, value in row.items() if key and value and value.strip()}
+    for key in LIST_COLUMNS:
+        if key in item:
+            item[key] = [value.strip() for value in item[key].split(";") if value.strip()]
+    low, high = item.pop("price_min", None), item.pop("price_max", None)
+    if low or high:
+        item["price_range"] = [_price(low, 0), _price(high, 10000)]
+    return item
+
+
+# Selections of a CSV (one column per key, lists separated by ";", the price
+# range as price_min/price_max) or JSONL file (one object per line)
+def read_items(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            items = [_csv_item(row) for row in csv.DictReader(f)]
+        else:
+            items = [json.loads(line) for line in f if line.strip()]
+    for item in items:
+        item.setdefault("id", item_id(item))
+    return items
+
+
+# Stable ID of a selection, so a resumed run recognizes finished items
+def item_id(item):
+    canonical = json.dumps({key: item.get(key) for key in SELECTION_KEYS + ("analysis_type",)},
+                           sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+# IDs already processed successfully according to the output file. A line cut
+# short by a crash is ignored, and its item runs again.
+def finished_ids(path):
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                finished.add(record["id"])
+    return finished
+
+
+# Search, analyse and (optionally) render the report of one selection
+def process_item(service, item, use_cache, optimize, pdf_dir, pdf_pool):
+    started = time.perf_counter()
+    selection = {key: item[key] for key in SELECTION_KEYS if item.get(key) is not None}
+    record = {"id": item["id"], "status": "ok", "selection": selection}
+
+    found = service.search(selection, use_cache=use_cache, optimize=optimize)
+    record.update(query=found["query"], source=found["source"],
+                  results=found["results"] + found.get("extra", []), search_cached=found.get("cached", True))
+
+    analysis = None
+    analysis_types = item.get("analysis_type")
+    if isinstance(analysis_types, str) and ";" in analysis_types:
+        analysis_types = [value.strip() for value in analysis_types.split(";") if value.strip()]
+    if isinstance(analysis_types, list):
+        # Several types: structured analyses, asked concurrently
+        outcomes = service.structured_analyses([(analysis_type, selection.get("categories", []))
+                                                for analysis_type in analysis_types],
+                                               selection.get("options", []), use_cache=use_cache)
+        analysis = [[analysis_type, sections] for analysis_type, (sections, _) in zip(analysis_types, outcomes)]
+        record.update(analysis_type=", ".join(analysis_types),
+                      analyses=[{"analysis_type": analysis_type, "sections": sections, "cached": cached}
+                                for analysis_type, (sections, cached) in zip(analysis_types, outcomes)],
+                      analysis_cached=all(cached for _, cached in outcomes))
+    elif analysis_types:
+        _, prompt = service.analysis_request(selection.get("categories", []), selection.get("options", []),
+                                             item["analysis_type"])
+        outcome = service.analysis_task(prompt, use_cache=use_cache, stream=False)
+        analysis = outcome["text"]
+        record.update(analysis_type=item["analysis_type"], analysis=analysis, analysis_cached=outcome["cached"])
+
+    if pdf_dir:
+        report = service.report(selection.get("categories", []), selection.get("options", []), analysis)
+        pdf = service.cached_report(report)
+        if pdf is None:
+            pdf = pdf_pool.submit(render_report, report).result()
+            service.store_report(report, pdf)
+        record["pdf"] = os.path.join(pdf_dir, f"{item['id']}.pdf")
+        with open(record["pdf"], "wb") as f:
+            f.write(pdf)
+
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def run(service, items, output, workers=BATCH_WORKERS, rate=BATCH_RATE, use_cache=True, optimize=None,
+        pdf_dir=None):
+    done = finished_ids(output)
+    pending = [item for item in items if item["id"] not in done]
+    if pdf_dir:
+        os.makedirs(pdf_dir, exist_ok=True)
+    limiter = TokenBucket(rate)
+
+    def task(item):
+        time.sleep(limiter.reserve())
+        started = time.perf_counter()
+        try:
+            return process_item(service, item, use_cache, optimize, pdf_dir, pdf_pool)
+        except Exception as e:
+            return {"id": item["id"], "status": "error", "error": f"{type(e).__name__}: {e}",
+                    "seconds": round(time.perf_counter() - started, 3)}
+
+    records = []
+    started = time.perf_counter()
+    # spawn: forking a multi-threaded process is unsafe
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as pdf_pool, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor, \
+            open(output, "a", encoding="utf-8") as out:
+        futures = [executor.submit(task, item) for item in pending]
+        for future in as_completed(futures):
+            record = future.result()
+            # One flushed line per item is the checkpoint a resumed run starts from
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            records.append(record)
+            print(f"[{len(records)}/{len(pending)}] {record['id']} {record['status']} {record['seconds']:.2f} s"
+                  + (f" {record['error']}" if record["status"] == "error" else ""), flush=True)
+    return records, len(items) - len(pending), time.perf_counter() - started
+
+
+def summary(records, skipped, elapsed):
+    lines = [f"{len(records)} processed, {skipped} already done, "
+             f"{sum(record['status'] == 'error' for record in records)} failed in {elapsed:.1f} s"]
+    if records:
+        latencies = sorted(record["seconds"] for record in records)
+        # Nearest-rank 95th percentile
+        p95 = latencies[math.ceil(len(latencies) * 95 / 100) - 1]
+        lines.append(f"throughput {len(records) / elapsed:.2f} items/s · latency p50 {statistics.median(latencies):.2f} s"
+                     f" · p95 {p95:.2f} s · max {latencies[-1]:.2f} s")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search, analyse and report a batch of monitor selections")
+    parser.add_argument("input", help="selections as .csv or .jsonl")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL results, also the resume checkpoint")
+    parser.add_argument("--pdf-dir", help="also write one PDF report per selection here")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--rate", type=float, default=BATCH_RATE, help="selections started per second (0 = unlimited)")
+    parser.add_argument("--optimize", choices=["sequential", "speculative"], help="optimize queries with Gemini")
+    parser.add_argument("--refresh", action="store_true", help="bypass the search and Gemini caches")
+    parser.add_argument("--export", choices=list(EXPORT_FORMATS),
+                        help="also export the results of the whole run next to the output, a row per search result")
+    args = parser.parse_args()
+
+    service = MonitorService(os.getenv("SERPER_API_KEY"), os.getenv("GEMINI_API_KEY"), search_workers=args.workers)
+    records, skipped, elapsed = run(service, read_items(args.input), args.output, args.workers, args.rate,
+                                    use_cache=not args.refresh, optimize=args.optimize, pdf_dir=args.pdf_dir)
+    print(summary(records, skipped, elapsed))
+    if args.export:
+        export_path = os.path.splitext(args.output)[0] + EXPORT_FORMATS[args.export][1]
+        write_export(batch_tables(args.output), args.export, result_schema(BATCH_FIELDS), export_path)
+        print(f"Export: {export_path}")
+
+
+if __name__ == "__main__":
+    main()
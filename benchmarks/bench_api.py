@@ -0,0 +1,89 @@
+# Benchmark: throughput and latency of the JSON API under concurrent load.
+#
+# Starts the Serper.dev stand-in (benchmarks/serper_stub.py) and the API on
+# local ports with the fake Gemini model and an empty cache, then sends
+# `--requests` uncached searches and analyses, `--concurrency` at a time.
+#
+#   python benchmarks/bench_api.py [--requests 200] [--concurrency 50]
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib import request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_PORT = 8765
+API_PORT = 8811
+
+# Upstream settings are read at import time
+os.environ.update(SERPER_API_URL=f"http://127.0.0.1:{STUB_PORT}/search", GEMINI_FAKE_MODEL="1",
+                  GEMINI_FAKE_FIRST_DELAY="0.3", GEMINI_API_KEY="benchmark", SERPER_API_KEY="benchmark",
+                  CACHE_DIR=tempfile.mkdtemp(prefix="bench-api-"))
+sys.path.insert(0, ROOT)
+
+import uvicorn  # noqa: E402
+
+import serper_stub  # noqa: E402
+from api import create_app  # noqa: E402
+
+CATEGORIES = ["Monitor 24 inch", "Monitor 27 inch"]
+
+
+def post(path, body):
+    data = json.dumps(body).encode("utf-8")
+    started = time.perf_counter()
+    with request.urlopen(request.Request(f"http://127.0.0.1:{API_PORT}{path}", data=data,
+                                         headers={"Content-Type": "application/json"}), timeout=120) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+# Requests bypass the caches, so every one reaches the upstream stand-ins
+def search_body(index):
+    return {"categories": CATEGORIES[:1], "options": ["Rezolutie"], "text": f"cerere {index}", "use_cache": False}
+
+
+def analyze_body(index):
+    return {"categories": CATEGORIES, "options": ["Rezolutie", "Rata refresh"], "use_cache": False,
+            "analysis_type": "Analiză generală"}
+
+
+def run(path, make_body, count, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(lambda index: post(path, make_body(index)), range(count)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"{path:<10} {count / elapsed:>8.1f} req/s   p50 {statistics.median(latencies) * 1000:>7.0f} ms   "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:>7.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    stub = serper_stub.serve(STUB_PORT)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    server = uvicorn.Server(uvicorn.Config(create_app(), port=API_PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent (Serper stand-in 300 ms, fake Gemini)")
+    run("/search", search_body, args.requests, args.concurrency)
+    run("/analyze", analyze_body, args.requests, args.concurrency)
+    server.should_exit = True
+    stub.shutdown()
+    shutil.rmtree(os.environ["CACHE_DIR"], ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
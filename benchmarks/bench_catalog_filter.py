@@ -0,0 +1,62 @@
+# Benchmark: typed spec parsing and vectorized filtering over a synthetic catalog.
+#
+#   python benchmarks/bench_catalog_filter.py [--skus 100000]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import Catalog, load_catalog  # noqa: E402
+from spec_parser import filter_catalog  # noqa: E402
+
+REFRESH_RATES = [60, 75, 100, 120, 144, 165, 240]
+RESPONSE_TIMES = [0.5, 1, 2, 3, 4, 5]
+RESOLUTIONS = ["1920x1080 Full HD", "2560x1440 QHD", "3840x2160 UHD"]
+PANELS = ["IPS", "VA", "TN", "OLED"]
+
+
+# Build a catalog of `skus` monitors by varying the specs of the bundled entries
+def synthetic_catalog(skus, seed=42):
+    rng = random.Random(seed)
+    base = load_catalog()
+    templates = list(base.monitors.values())
+    monitors = {}
+    for index in range(skus):
+        template = templates[index % len(templates)]
+        specs = dict(template["specs"])
+        specs["Rata refresh"] = f"{rng.choice(REFRESH_RATES)} Hz"
+        specs["Timp de raspuns tipic"] = f"{rng.choice(RESPONSE_TIMES)} ms"
+        specs["Rezolutie"] = rng.choice(RESOLUTIONS)
+        specs["Tehnologie ecran"] = rng.choice(PANELS)
+        specs["Luminozitate"] = f"{rng.randrange(200, 600, 50)} cd/mp"
+        name = f"SKU-{index:06d}"
+        monitors[name] = {"name": name, "description": "", "price": rng.randrange(500, 5000), "specs": specs}
+    return Catalog(monitors, base.options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--skus", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.skus)
+    started = time.perf_counter()
+    frame = catalog.frame
+    print(f"parse {args.skus} SKUs: {time.perf_counter() - started:.2f} s")
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        matches = filter_catalog(frame, min_refresh=144, max_response=1, price_range=(800, 2500))
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"filter refresh >= 144 Hz, response <= 1 ms, 800-2500 RON: {len(matches)} matches, "
+          f"median {timings[len(timings) // 2] * 1000:.2f} ms, best {timings[0] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
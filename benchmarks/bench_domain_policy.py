@@ -0,0 +1,66 @@
+# Benchmark: compiled domain policy vs. the former substring-scan result filter.
+#
+#   python benchmarks/bench_domain_policy.py [--urls 50000]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain_policy import DomainPolicy  # noqa: E402
+
+LEGACY_SHOP_KEYWORDS = [
+    "emag", "pcgarage", "altex", "mediagalaxy", "cel", "evomag",
+    "itgalaxy", "forit", "vexio", "dc-shop",
+    "flanco", "nod", "probitz", "bsp-shop", "iiyama-eshop",
+    "soliton", "picxelit", "badabum"
+]
+
+
+# The filter google_search() used before the domain policy existed
+def legacy_allows(link):
+    domain = link.split('/')[2] if '/' in link else ""
+    return domain.endswith(".ro") or any(ro_site in domain for ro_site in LEGACY_SHOP_KEYWORDS)
+
+
+def synthetic_urls(policy, count, seed=7):
+    rng = random.Random(seed)
+    hosts = (
+        [f"www.{shop}" for shop in policy.shops]
+        + [f"www.{domain}" for domain in policy.excluded_domains]
+        + ["blog.example.com", "www.excel-tips.com", "forum.hardware.info", "magazin-local.ro"]
+    )
+    return [f"https://{rng.choice(hosts)}/produs/{rng.randrange(10 ** 6)}?ref=serp" for _ in range(count)]
+
+
+def measure(label, function, urls, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        allowed = sum(1 for url in urls if function(url))
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<22} {len(urls) / best:>12,.0f} URLs/s  ({allowed} allowed)")
+    return allowed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--urls", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    policy = DomainPolicy.from_file()
+    urls = synthetic_urls(policy, args.urls)
+
+    measure("legacy substring scan", legacy_allows, urls, args.repeat)
+    measure("compiled policy", policy.allows, urls, args.repeat)
+
+    # The legacy scan lets excluded domains through when they contain a shop keyword
+    leaked = sorted({url.split('/')[2] for url in urls if legacy_allows(url) and not policy.allows(url)})
+    print(f"hosts the legacy filter wrongly allowed: {', '.join(leaked) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
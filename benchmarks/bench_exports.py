@@ -0,0 +1,80 @@
+# Benchmark: peak memory of exporting a large batch run.
+#
+# Writes a synthetic batch output (JSONL, one search result set per item)
+# and exports it in every format, each in a fresh process so that the peak
+# RSS of the process is the cost of that export alone. The chunked export
+# is compared with loading the whole run into one DataFrame first.
+#
+#   python benchmarks/bench_exports.py [--rows 300000] [--results 10]
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_catalog_filter import synthetic_catalog  # noqa: E402
+
+
+def write_batch_output(path, rows, results_per_item):
+    catalog = synthetic_catalog(min(rows, 5000))
+    monitors = list(catalog.monitors.values())
+    with open(path, "w", encoding="utf-8") as f:
+        for item in range(rows // results_per_item):
+            results = []
+            for position in range(results_per_item):
+                monitor = monitors[(item * results_per_item + position) % len(monitors)]
+                results.append({"title": monitor["name"], "link": f"https://www.emag.ro/p/{item}/{position}",
+                                "snippet": monitor["description"][:160], "price": monitor["price"],
+                                "shop": "emag.ro", "specs": monitor["specs"]})
+            f.write(json.dumps({"id": f"item-{item}", "status": "ok", "query": "monitor 27 inch",
+                                "source": "serper", "analysis_type": None, "seconds": 1.0,
+                                "results": results}, ensure_ascii=False) + "\n")
+
+
+# Run inside the child process: export `source` and report time and peak RSS
+def child(mode, fmt, source, target):
+    from exports import batch_tables, result_schema, write_export, BATCH_FIELDS
+    started = time.perf_counter()
+    if mode == "chunked":
+        write_export(batch_tables(source), fmt, result_schema(BATCH_FIELDS), target)
+    else:
+        import pyarrow as pa
+        table = pa.concat_tables(batch_tables(source, chunk_rows=10**9))
+        frame = table.to_pandas()
+        {"parquet": frame.to_parquet, "arrow": frame.to_feather, "csv": frame.to_csv}[fmt](target)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({"seconds": elapsed, "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                      "size_mb": os.path.getsize(target) / 2**20}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--results", type=int, default=10, help="search results per batch item")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "batch_results.jsonl")
+        write_batch_output(source, args.rows, args.results)
+        print(f"{args.rows} rânduri, JSONL de {os.path.getsize(source) / 2**20:.0f} MB")
+        print(f"{'format':>8} {'mod':>9} {'timp':>9} {'RSS maxim':>11} {'fișier':>9}")
+        for fmt in ("parquet", "arrow", "csv"):
+            for mode in ("chunked", "in-memory"):
+                target = os.path.join(directory, f"export.{fmt}")
+                output = subprocess.run([sys.executable, __file__, "--child", mode, fmt, source, target],
+                                        capture_output=True, text=True, check=True).stdout
+                result = json.loads(output)
+                print(f"{fmt:>8} {mode:>9} {result['seconds']:>7.1f} s {result['peak_mb']:>8.0f} MB "
+                      f"{result['size_mb']:>6.0f} MB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:6])
+    else:
+        main()
@@ -0,0 +1,66 @@
+# Benchmark: cost of the comparison table as compared categories grow.
+#
+# Compares building and serializing the whole table (what st.table sent on
+# every rerun) with the paginated grid page, reporting build time and the
+# Arrow bytes shipped to the browser.
+#
+#   python benchmarks/bench_grid.py [--categories 10 1000 10000] [--specs 200]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from streamlit import dataframe_util  # noqa: E402
+
+from bench_catalog_filter import synthetic_catalog  # noqa: E402
+from grid import comparison_page  # noqa: E402
+
+
+def full_table(specs, categories, spec_names):
+    rows = [[spec] + [specs[category].get(spec, "N/A") for category in categories] for spec in spec_names]
+    return pd.DataFrame(rows, columns=["Specificație"] + list(categories))
+
+
+def grid_page(specs, categories, spec_names):
+    frame, differs, row_differs = comparison_page(specs, categories, spec_names)
+    frame.insert(0, "≠", np.where(row_differs, "≠", ""))
+    return frame
+
+
+def best_ms(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        frame = function()
+        payload = dataframe_util.convert_pandas_df_to_arrow_bytes(frame)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--categories", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--specs", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(max(args.categories))
+    # Extra synthetic specs so that the table can grow in both directions
+    specs = {name: {**values, **{f"Spec {index:03d}": f"{(index * 7 + position) % 13} u" for index in range(args.specs)}}
+             for position, (name, values) in enumerate(catalog.specs.items())}
+    spec_names = list(catalog.options) + [f"Spec {index:03d}" for index in range(args.specs)]
+
+    print(f"{'categorii':>10} {'tabel complet':>24} {'pagină grid':>24}")
+    for count in args.categories:
+        categories = catalog.names[:count]
+        full_ms, full_bytes = best_ms(lambda: full_table(specs, categories, spec_names), args.repeat)
+        page_ms, page_bytes = best_ms(lambda: grid_page(specs, categories, spec_names), args.repeat)
+        print(f"{count:>10} {full_ms:>10.1f} ms {full_bytes / 1024:>9.0f} KB {page_ms:>10.1f} ms {page_bytes / 1024:>9.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
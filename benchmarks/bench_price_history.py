@@ -0,0 +1,85 @@
+# Benchmark: size of the price history and latency of charting one product.
+#
+# Fills a history with `--products` pages checked every `--interval-hours`
+# for `--days` days, one segment per tracker run for the last runs and the
+# rest merged and downsampled, then times reading the series of one product.
+#
+#   python benchmarks/bench_price_history.py [--products 2000] [--days 730]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyarrow as pa  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+
+from price_history import PriceHistory, downsample, HISTORY_SCHEMA, PRICE_HISTORY_MAX_SEGMENTS  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--interval-hours", type=float, default=6)
+    parser.add_argument("--segments", type=int, default=PRICE_HISTORY_MAX_SEGMENTS, help="recent runs left as segments")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    now = int(time.time())
+    step = int(args.interval_hours * 3600)
+    runs = list(range(now - args.days * 86400, now, step))
+    urls = [f"https://www.emag.ro/monitor-{index}/pd/{index:08d}" for index in range(args.products)]
+    base = [rng.uniform(500, 5000) for _ in urls]
+
+    def run_points(ts):
+        return [(url, ts, round(price * (1 + 0.1 * ((ts // 86400 + index) % 17 - 8) / 8), 2))
+                for index, (url, price) in enumerate(zip(urls, base))]
+
+    with tempfile.TemporaryDirectory() as directory:
+        history = PriceHistory(directory, max_segments=args.segments)
+        started = time.perf_counter()
+        # Older runs are merged month by month, as compaction would have done
+        old_runs, recent_runs = runs[:-args.segments], runs[-args.segments:]
+        merged = HISTORY_SCHEMA.empty_table()
+        per_month = int(30 * 86400 / step)
+        raw_rows = 0
+        for start in range(0, len(old_runs), per_month):
+            points = [point for ts in old_runs[start:start + per_month] for point in run_points(ts)]
+            raw_rows += len(points)
+            urls_, times, prices = zip(*points)
+            table = pa.table({"url": list(urls_), "ts": pa.array(times, pa.int64()).cast(HISTORY_SCHEMA.field("ts").type),
+                              "price": list(prices), "low": list(prices), "high": list(prices),
+                              "samples": pa.array([1] * len(points), pa.int32())}, schema=HISTORY_SCHEMA)
+            merged = downsample(pa.concat_tables([merged, table]), now)
+        history._write(merged, history.history_path)
+        for ts in recent_runs:
+            history.append(run_points(ts))
+            raw_rows += args.products
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(history.history_path) + sum(os.path.getsize(path) for path in history._segments())
+        print(f"{raw_rows} verificări -> {merged.num_rows + args.segments * args.products} puncte "
+              f"în {size / 2**20:.1f} MB ({elapsed:.1f} s)")
+        print(f"row groups: {pq.ParquetFile(history.history_path).num_row_groups}, segmente: {len(history._segments())}")
+
+        timings = []
+        for _ in range(args.repeat):
+            url = rng.choice(urls)
+            started = time.perf_counter()
+            series = history.series(url)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        print(f"istoric pentru un produs ({len(series)} puncte): median {timings[len(timings) // 2] * 1000:.1f} ms, "
+              f"max {timings[-1] * 1000:.1f} ms")
+
+        started = time.perf_counter()
+        rows = history.compact(now)
+        print(f"compactare: {rows} puncte în {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Benchmark: weighted ranking of a synthetic catalog with a partial top-k sort.
+#
+#   python benchmarks/bench_ranking.py [--skus 100000] [--k 10]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_catalog_filter import synthetic_catalog  # noqa: E402
+from ranking import RANKING_CRITERIA, rank_catalog  # noqa: E402
+
+GAMING = {"Rata refresh": 5, "Timp de raspuns tipic": 4, "Luminozitate": 1, "Preț": 2}
+
+
+def median_ms(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--skus", type=int, default=100_000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    frame = synthetic_catalog(args.skus).frame
+    for label, weights in (("gaming weights (4 criteria)", GAMING),
+                           (f"all {len(RANKING_CRITERIA)} criteria", dict.fromkeys(RANKING_CRITERIA, 1))):
+        elapsed, top = median_ms(lambda: rank_catalog(frame, weights, args.k), args.repeat)
+        print(f"rank {args.skus} SKUs, {label}, top {args.k}: median {elapsed:.2f} ms "
+              f"(best score {top['score'].iloc[0]:.1f})")
+
+
+if __name__ == "__main__":
+    main()
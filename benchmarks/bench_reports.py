@@ -0,0 +1,78 @@
+# Benchmark: PDF report rendering and content-addressed cache hits through
+# the service's report cache (an empty one in a temporary directory).
+#
+#   python benchmarks/bench_reports.py [--categories 1 10 100]
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# The cache location is read at import time
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="bench-reports-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import load_catalog  # noqa: E402
+from reports import analysis_report, paragraph_styles, render_report, spec_report, table_styles  # noqa: E402
+from service import MonitorService  # noqa: E402
+
+ANALYSIS = "\n\n".join(
+    f"Sectiunea {index}: " + "Monitorul ofera un raport bun calitate-pret si conectivitate completa. " * 12
+    for index in range(1, 5)
+)
+
+
+# Specs of `count` categories, cycling through the bundled catalog entries
+def synthetic_specs(count):
+    templates = list(load_catalog().specs.values())
+    return {f"Categoria {index:03d}": dict(templates[index % len(templates)]) for index in range(count)}
+
+
+def best_of(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--categories", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    paragraph_styles()
+    table_styles()
+    print(f"styles and table templates built once in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    directory = os.environ["CACHE_DIR"]
+    service = MonitorService(shop_index_path=os.path.join(directory, "shop_index.sqlite3"),
+                             price_history_dir=os.path.join(directory, "price_history"))
+    try:
+        print(f"{'report':<10} {'categories':>10} {'describe':>10} {'render':>10} {'cache hit':>10} {'PDF':>10}")
+        for count in args.categories:
+            specs = synthetic_specs(count)
+            categories = list(specs)
+            options = sorted({option for values in specs.values() for option in values})
+
+            for name, describe in (
+                ("specs", lambda: spec_report(categories, options, specs)),
+                ("analysis", lambda: analysis_report(ANALYSIS, categories, options, specs)),
+            ):
+                describe_time, report = best_of(describe, args.repeat)
+                render_time, pdf = best_of(lambda: render_report(report), args.repeat)
+                service.store_report(report, pdf)
+                hit_time, cached = best_of(lambda: service.cached_report(report), args.repeat)
+                assert cached == pdf
+                print(f"{name:<10} {count:>10} {describe_time * 1000:>8.2f}ms {render_time * 1000:>8.1f}ms "
+                      f"{hit_time * 1000:>8.2f}ms {len(pdf) / 1024:>8.1f}KB")
+    finally:
+        service.search_executor.shutdown(wait=False)
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
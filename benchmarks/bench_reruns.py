@@ -0,0 +1,166 @@
+# Benchmark: rerun latency and server CPU per widget interaction.
+#
+# Replays typical interactions against app.py the way the browser would
+# trigger them: a widget inside a form reruns nothing until the form is
+# submitted, a widget inside a fragment reruns only that fragment and any
+# other widget reruns the whole script. Each rerun is timed inside the
+# script thread (wall clock and thread CPU), so the test harness overhead
+# is left out, and compared with a full-script rerun.
+#
+#   python benchmarks/bench_reruns.py [--repeat 5]
+#
+# To compare with an older revision, point --app at its checkout:
+#
+#   git worktree add /tmp/before <commit>
+#   python benchmarks/bench_reruns.py --app /tmp/before/app.py
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from urllib import parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData, ScriptRequests  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1 import app_test, local_script_runner  # noqa: E402
+
+# (description, widget type, label prefix, interaction)
+INTERACTIONS = [
+    ("tab1: bifează o categorie", "checkbox", "Selectează", lambda widget: widget.check()),
+    ("tab1: alege o specificație", "multiselect", "Selectați specificațiile dorite",
+     lambda widget: widget.select(widget.options[0])),
+    ("tab2: schimbă rezoluția", "selectbox", "Rezoluție", lambda widget: widget.select_index(2)),
+    ("tab2: mută sliderul de preț", "slider", "Interval de preț", lambda widget: widget.set_value((1000, 3000))),
+    ("tab2: alege o caracteristică", "multiselect", "Caracteristici speciale",
+     lambda widget: widget.select("HDR")),
+    ("tab2: aplică filtrele", "button", "✅ Aplică filtrele", lambda widget: widget.click()),
+    ("tab3: schimbă categoriile comparate", "multiselect", "Selectați categoriile pentru comparație",
+     lambda widget: widget.unselect(widget.value[0])),
+    ("tab4: schimbă tipul analizei", "radio", "Selectați tipul de analiză", lambda widget: widget.set_value(widget.options[1])),
+]
+
+
+# Script runner that can run a single fragment, like a fragment-scoped
+# rerun requested by the browser, and remembers the messages it sent and
+# how long its rerun took
+class FragmentScriptRunner(local_script_runner.LocalScriptRunner):
+    fragment_id = None
+    last = None
+    elapsed = (0.0, 0.0)
+    # AppTest compiles the script on every run; a server compiles it once
+    script_cache = ScriptCache()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._script_cache = FragmentScriptRunner.script_cache
+
+    def _run_script(self, rerun_data):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            super()._run_script(rerun_data)
+        finally:
+            FragmentScriptRunner.elapsed = (time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def run(self, widget_state=None, query_params=None, timeout=3, page_hash=""):
+        FragmentScriptRunner.last = self
+        if FragmentScriptRunner.fragment_id is None:
+            return super().run(widget_state, query_params, timeout, page_hash)
+
+        # Drop the full run queued by the constructor, it would absorb the fragment run
+        self._requests = ScriptRequests()
+        self.request_rerun(RerunData(widget_states=widget_state, page_script_hash=page_hash,
+                                     query_string=parse.urlencode(query_params or {}, doseq=True),
+                                     fragment_id_queue=[FragmentScriptRunner.fragment_id]))
+        try:
+            if not self._script_thread:
+                self.start()
+            local_script_runner.require_widgets_deltas(self, timeout)
+        finally:
+            self.join()
+        return local_script_runner.parse_tree_from_messages(self.forward_msgs())
+
+
+app_test.LocalScriptRunner = FragmentScriptRunner
+
+
+# Fragment of each element, by element ID, from the last run's deltas
+def element_fragments():
+    fragments = {}
+    for message in FragmentScriptRunner.last.forward_msgs():
+        if message.WhichOneof("type") != "delta" or message.delta.WhichOneof("type") != "new_element":
+            continue
+        element = message.delta.new_element
+        proto = getattr(element, element.WhichOneof("type"))
+        if getattr(proto, "id", ""):
+            fragments[proto.id] = message.delta.fragment_id
+    return fragments
+
+
+def find_widget(app, kind, label):
+    for widget in getattr(app, kind):
+        if widget.label.startswith(label):
+            return widget
+    return None
+
+
+# Wall and CPU seconds of one rerun (of the whole script or one fragment)
+def timed_run(app, fragment_id=None):
+    FragmentScriptRunner.fragment_id = fragment_id
+    try:
+        app.run()
+    finally:
+        FragmentScriptRunner.fragment_id = None
+    return FragmentScriptRunner.elapsed
+
+
+# Wall and CPU seconds of one interaction, and what it reran
+def measure(app_path, kind, label, interact):
+    app = AppTest.from_file(app_path, default_timeout=120).run()
+    widget = find_widget(app, kind, label)
+    if widget is None:
+        return None
+    scope = element_fragments().get(widget.id)
+    interact(widget)
+    if getattr(widget, "form_id", "") and kind != "button":
+        return 0.0, 0.0, "nimic (formular)"
+    wall, cpu = timed_run(app, scope or None)
+    return wall, cpu, "fragment" if scope else "tot scriptul"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ.update(CACHE_DIR=cache_dir, GEMINI_API_KEY="benchmark", SERPER_API_KEY="benchmark",
+                          GEMINI_FAKE_MODEL="1")
+        sys.path.insert(0, os.path.dirname(os.path.abspath(args.app)))
+
+        full = []
+        for _ in range(args.repeat):
+            app = AppTest.from_file(args.app, default_timeout=120).run()
+            full.append(timed_run(app))
+        print(f"app: {args.app}")
+        print(f"{'interacțiune':<38} {'rulează':<18} {'latență':>10} {'CPU':>10}")
+        print(f"{'(rulare completă, referință)':<38} {'tot scriptul':<18} "
+              f"{statistics.median(w for w, _ in full) * 1000:>8.1f}ms "
+              f"{statistics.median(c for _, c in full) * 1000:>8.1f}ms")
+
+        for description, kind, label, interact in INTERACTIONS:
+            samples = [measure(args.app, kind, label, interact) for _ in range(args.repeat)]
+            if samples[0] is None:
+                print(f"{description:<38} {'-':<18} {'-':>10} {'-':>10}")
+                continue
+            print(f"{description:<38} {samples[0][2]:<18} "
+                  f"{statistics.median(s[0] for s in samples) * 1000:>8.1f}ms "
+                  f"{statistics.median(s[1] for s in samples) * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
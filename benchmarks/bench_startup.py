@@ -0,0 +1,81 @@
+# Benchmark: cold-start cost of the Streamlit entry point.
+#
+# Reports the import time of each third-party and local module (each in a
+# fresh interpreter, dependencies included) and the time from interpreter
+# start to the first complete render of app.py, plus which heavy libraries
+# that first render actually loaded.
+#
+#   python benchmarks/bench_startup.py [--repeat 3]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+THIRD_PARTY = ["streamlit", "pandas", "numpy", "requests", "bs4", "reportlab.platypus", "google.generativeai"]
+LOCAL = ["cache", "clients", "catalog", "spec_parser", "shop_index", "enrichment", "domain_policy",
+         "query_compiler", "jobs", "reports", "ratelimit", "ranking", "grid", "exports", "price_history", "service"]
+
+# Libraries that the first render should not need
+HEAVY = ["google.generativeai", "reportlab", "bs4"]
+
+IMPORT_PROBE = """
+import time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+"""
+
+# Runs in a fresh interpreter: time from start-up to the end of the first run
+RENDER_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout=120).run()
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "exceptions": [str(exception.value) for exception in app.exception],
+    "loaded": [module for module in {heavy!r} if module in sys.modules],
+}}))
+"""
+
+
+def run_probe(code, env):
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return output.strip().splitlines()[-1]
+
+
+def best_import_time(module, env, repeat):
+    return min(float(run_probe(IMPORT_PROBE.format(module=module), env)) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, CACHE_DIR=cache_dir, GEMINI_API_KEY="benchmark", SERPER_API_KEY="benchmark",
+                   PYTHONPATH=ROOT, PYTHONWARNINGS="ignore")
+
+        print("import time per module (fresh interpreter, dependencies included)")
+        for module in THIRD_PARTY + LOCAL:
+            print(f"  {module:<22} {best_import_time(module, env, args.repeat) * 1000:>8.1f} ms")
+
+        renders = []
+        for _ in range(args.repeat):
+            renders.append(json.loads(run_probe(RENDER_PROBE.format(app=os.path.join(ROOT, "app.py"), heavy=HEAVY), env)))
+        first = min(renders, key=lambda render: render["seconds"])
+        print(f"time to first render      {first['seconds'] * 1000:>8.1f} ms (best of {args.repeat})")
+        print(f"heavy libraries loaded    {', '.join(first['loaded']) or '-'}")
+        if first["exceptions"]:
+            print(f"exceptions                {first['exceptions']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Local stand-in for Serper.dev: answers every search with a fixed set of
+# organic results after a configurable delay, so the app and the JSON API
+# can be exercised without network access or an API key.
+#
+#   python benchmarks/serper_stub.py [--port 8765] [--delay 0.3]
+#   SERPER_API_URL=http://127.0.0.1:8765/search GEMINI_FAKE_MODEL=1 python api.py
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SHOPS = ["emag.ro", "pcgarage.ro", "altex.ro", "cel.ro", "amazon.com"]
+
+
+def stub_handler(delay):
+    class SerperStub(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(delay)
+            query = payload.get("q", "")
+            body = json.dumps({"organic": [
+                {"title": f"Monitor {index} {query[:40]}", "link": f"https://www.{shop}/monitor-{index}",
+                 "snippet": f"Pret {999 + 100 * index} lei"}
+                for index, shop in enumerate(SHOPS)
+            ]}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return SerperStub
+
+
+def serve(port=8765, delay=0.3):
+    server = ThreadingHTTPServer(("127.0.0.1", port), stub_handler(delay))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Serper.dev stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.3, help="seconds before each answer")
+    args = parser.parse_args()
+    serve(args.port, args.delay).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
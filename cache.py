@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+# Directory holding the on-disk caches (shared by all sessions and restarts)
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+CACHE_DB = os.path.join(CACHE_DIR, "cache.sqlite3")
+
+
+# Normalize a free-text key so equivalent queries map to the same entry
+def normalize_key(key):
+    return " ".join(str(key).lower().split())
+
+
+# Disk-backed key/value cache with TTL, size-bounded LRU eviction and
+# zlib-compressed JSON payloads. One SQLite file is shared by several
+# namespaces (search results, LLM answers, ...), each with its own limits.
+# Keys are normalized as free text unless `normalize` is off (e.g. for URLs,
+# whose path and query are case-sensitive).
+class DiskCache:
+    def __init__(self, namespace, ttl=3600, max_bytes=50 * 1024 * 1024, path=CACHE_DB, normalize=True):
+        self.namespace = namespace
+        self.normalize = normalize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                label TEXT,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (namespace, accessed)")
+        conn.commit()
+
+    # One connection per thread; WAL lets readers proceed while a writer commits
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _key(self, key):
+        return normalize_key(key) if self.normalize else str(key)
+
+    def _hash(self, key):
+        return hashlib.sha256(self._key(key).encode("utf-8")).hexdigest()
+
+    # Raw stored payload, or None when missing or expired
+    def _load(self, key):
+        conn = self._connect()
+        hashed = self._hash(key)
+        row = conn.execute(
+            "SELECT value, created FROM entries WHERE namespace = ? AND key = ?",
+            (self.namespace, hashed),
+        ).fetchone()
+        now = time.time()
+
+        if row is None or (self.ttl and now - row[1] > self.ttl):
+            if row is not None:
+                conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (self.namespace, hashed))
+                conn.commit()
+            with self._lock:
+                self.misses += 1
+            return None
+
+        conn.execute(
+            "UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?",
+            (now, self.namespace, hashed),
+        )
+        conn.commit()
+        with self._lock:
+            self.hits += 1
+        return row[0]
+
+    def _store(self, key, payload, label):
+        if self.max_bytes and len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (namespace, key, label, value, size, created, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.namespace, self._hash(key), (label or self._key(key))[:500], payload, len(payload), now, now),
+        )
+        conn.commit()
+        self._evict(conn)
+
+    def get(self, key):
+        payload = self._load(key)
+        if payload is None:
+            return None
+        return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+    def set(self, key, value, label=None):
+        self._store(key, zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"), 6), label)
+
+    # Binary values (e.g. rendered PDFs) are stored as they are, uncompressed
+    def get_bytes(self, key):
+        payload = self._load(key)
+        return bytes(payload) if payload is not None else None
+
+    def set_bytes(self, key, value, label=None):
+        self._store(key, bytes(value), label)
+
+    # Drop least recently used entries until the namespace fits in max_bytes
+    def _evict(self, conn):
+        if not self.max_bytes:
+            return
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT key, size FROM entries WHERE namespace = ? ORDER BY accessed ASC", (self.namespace,)
+        )
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((self.namespace, key))
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", stale)
+        conn.commit()
+
+    def invalidate(self, key):
+        conn = self._connect()
+        cursor = conn.execute(
+            "DELETE FROM entries WHERE namespace = ? AND key = ?", (self.namespace, self._hash(key))
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+
+    # Remove an entry by its hashed key, as returned by entries()
+    def remove(self, hashed_key):
+        conn = self._connect()
+        cursor = conn.execute(
+            "DELETE FROM entries WHERE namespace = ? AND key = ?", (self.namespace, hashed_key)
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+
+    # List stored entries, most recently used first, for inspection in the UI
+    def entries(self, limit=100):
+        rows = self._connect().execute(
+            "SELECT key, label, size, created, accessed FROM entries "
+            "WHERE namespace = ? ORDER BY accessed DESC LIMIT ?",
+            (self.namespace, limit),
+        ).fetchall()
+        return [
+            {"key": key, "label": label, "bytes": size, "created": created, "accessed": accessed}
+            for key, label, size, created, accessed in rows
+        ]
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM entries WHERE namespace = ?", (self.namespace,))
+        conn.commit()
+
+    def stats(self):
+        entries, size = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
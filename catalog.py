@@ -0,0 +1,192 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from functools import cached_property
+
+# Location of the monitor catalog (JSON, CSV or Parquet)
+CATALOG_PATH = os.getenv("CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalog.json"))
+
+# Minimum number of seconds between two checks of the catalog file for changes
+CATALOG_RELOAD_INTERVAL = float(os.getenv("CATALOG_RELOAD_INTERVAL", "2"))
+
+# Known specifications with their emojis, in display order
+OPTIONS = {
+    "Diagonala ecran": "📏",
+    "Tehnologie ecran": "🔬",
+    "Iluminare fundal": "💡",
+    "Rezolutie": "🔍",
+    "Raport de aspect": "📐",
+    "Timp de raspuns tipic": "⏱️",
+    "Rata refresh": "🔄",
+    "Luminozitate": "☀️",
+    "Raport de contrast static": "🌓",
+    "Unghi vizualizare": "👁️",
+    "Conectivitate": "🔌",
+    "Tehnologii": "⚙️",
+    "Culori": "🎨",
+    "Inaltime ajustabila": "↕️",
+    "Pivotare": "🔄",
+    "Inclinare": "↗️",
+    "Rotire": "🔁",
+    "Sursa alimentare": "🔋",
+    "Montare pe perete": "🧱",
+    "Accesorii": "📦",
+    "Standarde": "📜",
+    "Garantie produs": "🛡️",
+}
+
+# Non-spec columns accepted in tabular (CSV/Parquet) catalogs
+METADATA_FIELDS = ("name", "description", "price", "url", "shop")
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogError(ValueError):
+    pass
+
+
+# Immutable snapshot of the catalog: monitors by name and the spec options
+class Catalog:
+    def __init__(self, monitors, options, version=None):
+        self.monitors = monitors
+        self.options = options
+        self.version = version
+        self.specs = {name: monitor["specs"] for name, monitor in monitors.items()}
+
+    # Typed spec columns, parsed once per catalog version on first use
+    @cached_property
+    def frame(self):
+        from spec_parser import parse_catalog
+        return parse_catalog(self)
+
+    @property
+    def names(self):
+        return list(self.monitors)
+
+    def __len__(self):
+        return len(self.monitors)
+
+
+# Whether a catalog value is missing: None, empty or NaN (empty cells of
+# CSV/Parquet catalogs, NaN literals in JSON)
+def _missing(value):
+    return value is None or value == "" or (isinstance(value, float) and math.isnan(value))
+
+
+# Check a list of raw monitor records and index them by name
+def validate_monitors(records, options):
+    if not isinstance(records, list):
+        raise CatalogError("'monitors' trebuie să fie o listă de monitoare")
+    monitors = {}
+    for position, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise CatalogError(f"Intrarea {position + 1} nu este un obiect")
+        name = "" if _missing(record.get("name")) else str(record["name"]).strip()
+        if not name:
+            raise CatalogError(f"Intrarea {position + 1} nu are nume")
+        if name in monitors:
+            raise CatalogError(f"Monitor duplicat în catalog: {name}")
+
+        specs = record.get("specs")
+        if not isinstance(specs, dict) or not specs:
+            raise CatalogError(f"{name}: lipsesc specificațiile")
+        unknown = [option for option in specs if option not in options]
+        if unknown:
+            raise CatalogError(f"{name}: specificații necunoscute {', '.join(unknown)}")
+
+        monitor = {field: record[field] for field in METADATA_FIELDS if not _missing(record.get(field))}
+        monitor["name"] = name
+        monitor.setdefault("description", "")
+        monitor["specs"] = {option: str(value) for option, value in specs.items() if not _missing(value)}
+        monitors[name] = monitor
+    if not monitors:
+        raise CatalogError("Catalogul este gol")
+    return monitors
+
+
+# Convert a wide table (one column per spec option) into monitor records
+def _records_from_frame(frame):
+    import pandas as pd
+    records = []
+    for row in frame.to_dict("records"):
+        record = {field: row[field] for field in METADATA_FIELDS if field in row and pd.notna(row[field])}
+        record["specs"] = {
+            column: value for column, value in row.items()
+            if column not in METADATA_FIELDS and pd.notna(value)
+        }
+        records.append(record)
+    return records
+
+
+# Function to load and validate a catalog file
+def load_catalog(path=CATALOG_PATH):
+    extension = os.path.splitext(path)[1].lower()
+    options = dict(OPTIONS)
+
+    if extension == ".json":
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+        if not isinstance(raw, dict):
+            raise CatalogError("Catalogul JSON trebuie să fie un obiect cu 'monitors' și 'options'")
+        extra_options = raw.get("options") or {}
+        if not isinstance(extra_options, dict) or not all(isinstance(emoji, str) for emoji in extra_options.values()):
+            raise CatalogError("'options' trebuie să fie un obiect specificație -> emoji")
+        options.update(extra_options)
+        records = raw.get("monitors", [])
+    elif extension in (".csv", ".parquet"):
+        import pandas as pd
+        frame = pd.read_csv(path, dtype=str) if extension == ".csv" else pd.read_parquet(path)
+        records = _records_from_frame(frame)
+    else:
+        raise CatalogError(f"Format de catalog nesuportat: {extension}")
+
+    return Catalog(validate_monitors(records, options), options, version=os.stat(path).st_mtime_ns)
+
+
+# Holds the current catalog and reloads it when the file changes on disk.
+# A catalog that cannot be loaded (unreadable, malformed or failing
+# validation) is reported and logged, and the previous one is kept.
+class CatalogStore:
+    def __init__(self, path=CATALOG_PATH, reload_interval=CATALOG_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._checked = time.monotonic()
+        self._catalog = self._load()
+
+    # Load the catalog and parse its typed columns up front, off the filter path
+    def _load(self):
+        catalog = load_catalog(self.path)
+        catalog.frame
+        return catalog
+
+    def get(self):
+        now = time.monotonic()
+        if now - self._checked < self.reload_interval:
+            return self._catalog
+
+        with self._lock:
+            if now - self._checked >= self.reload_interval:
+                self._checked = now
+                self._reload_if_changed()
+        return self._catalog
+
+    def _reload_if_changed(self):
+        try:
+            version = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            logger.warning("Catalogul %s nu poate fi citit: %s", self.path, e)
+            self.last_error = str(e)
+            return
+        if version == self._catalog.version:
+            return
+        try:
+            self._catalog = self._load()
+            self.last_error = None
+        except Exception as e:
+            logger.exception("Catalogul %s nu a putut fi reîncărcat", self.path)
+            self.last_error = str(e) or type(e).__name__
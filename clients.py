@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SERPER_API_URL = os.getenv("SERPER_API_URL", "https://google.serper.dev/search")
+
+# Connection pool and timeout settings (tune for multi-user deployments)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+
+# Offline stand-in for Gemini (e.g. GEMINI_FAKE_MODEL=1 for local testing):
+# answers are synthesized from the prompt and streamed with these delays
+GEMINI_FAKE_MODEL = os.getenv("GEMINI_FAKE_MODEL", "").lower() in ("1", "true", "yes")
+GEMINI_FAKE_FIRST_DELAY = float(os.getenv("GEMINI_FAKE_FIRST_DELAY", "0.5"))
+GEMINI_FAKE_CHUNK_DELAY = float(os.getenv("GEMINI_FAKE_CHUNK_DELAY", "0.05"))
+GEMINI_FAKE_CHUNK_WORDS = int(os.getenv("GEMINI_FAKE_CHUNK_WORDS", "4"))
+
+
+# Build a pooled keep-alive session that retries transient upstream errors;
+# 429 answers are left to the per-upstream rate limits, which pause and requeue
+def create_session(pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF):
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        backoff_factor=backoff,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD", "POST"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+# Process-wide holder of the upstream clients: one pooled HTTP session for
+# Serper and one GenerativeModel handle per (model, generation config).
+class Clients:
+    def __init__(self, serper_api_key=None, gemini_api_key=None, pool_size=HTTP_POOL_SIZE,
+                 fake_gemini=GEMINI_FAKE_MODEL):
+        self.serper_api_key = serper_api_key
+        self.gemini_api_key = gemini_api_key
+        self.session = create_session(pool_size=pool_size)
+        self.timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        self._models = {}
+        self._lock = threading.Lock()
+        self.fake_gemini = fake_gemini
+        self._genai = None
+
+    def serper_search(self, payload):
+        headers = {"X-API-KEY": self.serper_api_key or ""}
+        return self.session.post(SERPER_API_URL, json=payload, headers=headers, timeout=self.timeout)
+
+    def gemini_model(self, model_name, generation_config=None):
+        if self.fake_gemini:
+            return FakeGeminiModel(model_name, generation_config=generation_config)
+
+        key = (model_name, json.dumps(generation_config or {}, sort_keys=True))
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._gemini().GenerativeModel(model_name, generation_config=generation_config)
+                self._models[key] = model
+        return model
+
+    # The Gemini SDK takes about a second to import, so it is imported and
+    # configured once, on the first analysis or query optimization
+    def _gemini(self):
+        if self._genai is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=self.gemini_api_key)
+            self._genai = genai
+        return self._genai
+
+
+class FakeGeminiChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+# Local model with the generate_content() interface of genai.GenerativeModel.
+# The answer echoes the prompt's non-empty lines; with stream=True it is
+# yielded in chunks of `chunk_words` words after `first_delay` seconds and
+# `chunk_delay` seconds between chunks. In JSON mode (a response_schema in
+# the generation config) every string of the schema holds the echo.
+class FakeGeminiModel:
+    def __init__(self, model_name="fake", first_delay=GEMINI_FAKE_FIRST_DELAY,
+                 chunk_delay=GEMINI_FAKE_CHUNK_DELAY, chunk_words=GEMINI_FAKE_CHUNK_WORDS, generation_config=None):
+        self.model_name = model_name
+        self.first_delay = first_delay
+        self.chunk_delay = chunk_delay
+        self.chunk_words = chunk_words
+        self.schema = (generation_config or {}).get("response_schema")
+
+    def answer(self, prompt):
+        lines = [" ".join(line.split()) for line in prompt.splitlines() if line.strip()]
+        text = f"**Răspuns simulat ({self.model_name})**\n\n" + "\n\n".join(lines)
+        if self.schema is None:
+            return text
+        return json.dumps(self._fill(self.schema, text, "răspuns"), ensure_ascii=False)
+
+    def _fill(self, schema, text, name):
+        if schema.get("type") == "object":
+            return {key: self._fill(value, text, key) for key, value in schema.get("properties", {}).items()}
+        if schema.get("type") == "array":
+            return [self._fill(schema["items"], text, name)]
+        return f"[{name}] " + text.split("\n\n", 2)[-1][:400]
+
+    def chunks(self, prompt):
+        words = self.answer(prompt).split(" ")
+        time.sleep(self.first_delay)
+        for start in range(0, len(words), self.chunk_words):
+            if start:
+                time.sleep(self.chunk_delay)
+            chunk = " ".join(words[start:start + self.chunk_words])
+            yield FakeGeminiChunk(chunk if start + self.chunk_words >= len(words) else chunk + " ")
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self.chunks(prompt)
+        return FakeGeminiChunk("".join(chunk.text for chunk in self.chunks(prompt)))
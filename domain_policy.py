@@ -0,0 +1,100 @@
+import json
+import os
+
+# Allow/deny rules for result domains and query site restrictions
+DOMAIN_POLICY_PATH = os.getenv(
+    "DOMAIN_POLICY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "domains.json")
+)
+
+ALLOW = "allow"
+DENY = "deny"
+UNKNOWN = "unknown"
+
+
+# Extract the lowercase hostname of a URL without the cost of a full urlsplit.
+# Handles scheme-less links, credentials, ports and trailing dots.
+def url_host(url):
+    start = url.find("//")
+    start = start + 2 if start != -1 else 0
+    end = url.find("/", start)
+    host = url[start:end] if end != -1 else url[start:]
+    if "?" in host or "#" in host:
+        host = host.partition("?")[0].partition("#")[0]
+    if "@" in host:
+        host = host.rpartition("@")[2]
+    if ":" in host:
+        if host.startswith("["):
+            return host[1:host.find("]")].lower()
+        host = host.partition(":")[0]
+    if host.endswith("."):
+        host = host.rstrip(".")
+    return host.lower()
+
+
+# Compiled domain policy. Rules are domain suffixes ("ro", "emag.ro",
+# "amazon.co.uk") kept in hash sets; a host is classified by looking up each
+# of its label suffixes, so cost grows with the number of labels in the host
+# and not with the number of rules. Deny rules win over allow rules.
+class DomainPolicy:
+    def __init__(self, shops=(), allowed_domains=(), allowed_suffixes=(), excluded_domains=()):
+        self.shops = list(dict.fromkeys(domain.lower() for domain in shops))
+        self.excluded_domains = list(dict.fromkeys(domain.lower() for domain in excluded_domains))
+        self.allowed_suffixes = list(dict.fromkeys(suffix.lower().lstrip(".") for suffix in allowed_suffixes))
+        self._allow = set(self.shops) | {domain.lower() for domain in allowed_domains} | set(self.allowed_suffixes)
+        self._deny = set(self.excluded_domains)
+        self._classified = {}
+
+    @classmethod
+    def from_file(cls, path=DOMAIN_POLICY_PATH):
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(
+            shops=config.get("shops", []),
+            allowed_domains=config.get("allowed_domains", []),
+            allowed_suffixes=config.get("allowed_suffixes", []),
+            excluded_domains=config.get("excluded_domains", []),
+        )
+
+    def classify_host(self, host):
+        verdict = self._classified.get(host)
+        if verdict is not None:
+            return verdict
+
+        verdict = UNKNOWN
+        labels = host.split(".")
+        for position in range(len(labels)):
+            suffix = ".".join(labels[position:])
+            if suffix in self._deny:
+                verdict = DENY
+                break
+            if verdict is UNKNOWN and suffix in self._allow:
+                verdict = ALLOW
+
+        # Bounded memo of recent hosts; results repeat the same few shops
+        if len(self._classified) > 10000:
+            self._classified.clear()
+        self._classified[host] = verdict
+        return verdict
+
+    def classify(self, url):
+        host = url_host(url)
+        verdict = self._classified.get(host)
+        return verdict if verdict is not None else self.classify_host(host)
+
+    def allows(self, url):
+        return self.classify(url) is ALLOW
+
+    # Keep only results whose link passes the policy
+    def filter_results(self, results):
+        return [result for result in results if self.allows(result.get("link", ""))]
+
+    # Site operators for a web query: a positive restriction (one shop or the
+    # allowed suffixes) followed by the excluded domains
+    def query_restrictions(self, shop=None, include_exclusions=True):
+        if shop:
+            parts = [f"site:{shop}"]
+        else:
+            parts = [f"site:.{suffix}" for suffix in self.allowed_suffixes]
+        if include_exclusions:
+            parts.extend(f"-site:{domain}" for domain in self.excluded_domains)
+        return parts
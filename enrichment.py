@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from shop_index import extract_product, url_domain
+
+# Concurrency and politeness limits for fetching product pages
+ENRICH_MAX_WORKERS = int(os.getenv("ENRICH_MAX_WORKERS", "8"))
+ENRICH_PER_DOMAIN = int(os.getenv("ENRICH_PER_DOMAIN", "2"))
+ENRICH_DOMAIN_DELAY = float(os.getenv("ENRICH_DOMAIN_DELAY", "0.5"))
+
+# Pages fetched less than this many seconds ago are reused without revalidation
+ENRICH_FRESH_FOR = int(os.getenv("ENRICH_FRESH_FOR", "300"))
+
+USER_AGENT = "Mozilla/5.0 (compatible; MonitorSpecsFinder/1.0)"
+
+
+# Limits concurrent requests per domain and spaces consecutive requests to
+# the same domain by at least `delay` seconds
+class DomainThrottle:
+    def __init__(self, per_domain=ENRICH_PER_DOMAIN, delay=ENRICH_DOMAIN_DELAY):
+        self.per_domain = per_domain
+        self.delay = delay
+        self._semaphores = {}
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, domain):
+        with self._lock:
+            if domain not in self._semaphores:
+                self._semaphores[domain] = threading.BoundedSemaphore(self.per_domain)
+            return self._semaphores[domain]
+
+    def acquire(self, domain):
+        self._semaphore(domain).acquire()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
+    def release(self, domain):
+        self._semaphore(domain).release()
+
+
+# Fetches result pages concurrently and parses them into price and specs.
+# Parsed pages are cached with their ETag/Last-Modified validators so a
+# repeat visit costs a conditional GET answered by 304 Not Modified.
+class PageEnricher:
+    def __init__(self, session, page_cache, max_workers=ENRICH_MAX_WORKERS, throttle=None,
+                 fresh_for=ENRICH_FRESH_FOR, timeout=(3.05, 10), on_page=None):
+        self.session = session
+        self.page_cache = page_cache
+        self.throttle = throttle or DomainThrottle()
+        self.fresh_for = fresh_for
+        self.timeout = timeout
+        self.on_page = on_page
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="enrich")
+
+    # Return the parsed product for a URL and how it was obtained:
+    # "cached" (fresh copy), "revalidated" (304) or "fetched" (200)
+    def fetch(self, url):
+        cached = self.page_cache.get(url)
+        if cached is not None and time.time() - cached["fetched"] < self.fresh_for:
+            return cached["product"], "cached"
+
+        headers = {"User-Agent": USER_AGENT, "Accept": "text/html"}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        domain = url_domain(url)
+        self.throttle.acquire(domain)
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        finally:
+            self.throttle.release(domain)
+
+        if response.status_code == 304 and cached is not None:
+            cached["fetched"] = time.time()
+            self.page_cache.set(url, cached)
+            return cached["product"], "revalidated"
+        response.raise_for_status()
+
+        product = extract_product(response.text, url)
+        self.page_cache.set(url, {
+            "product": product,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched": time.time(),
+        })
+        if self.on_page is not None:
+            self.on_page(url, response.text)
+        return product, "fetched"
+
+    # Enrich search results concurrently. Yields (position, product, status,
+    # error) in completion order so each card can be updated as soon as its
+    # page has been parsed.
+    def enrich(self, results):
+        futures = {
+            self.executor.submit(self.fetch, result["link"]): position
+            for position, result in enumerate(results) if result.get("link")
+        }
+        for future in as_completed(futures):
+            try:
+                product, status = future.result()
+                yield futures[future], product, status, None
+            except Exception as e:
+                yield futures[future], None, "failed", e
+
+
+# Copy the enriched fields onto a search result
+def merge_product(result, product):
+    merged = dict(result)
+    if product.get("price") is not None:
+        merged["price"] = product["price"]
+    if product.get("specs"):
+        merged["specs"] = product["specs"]
+    return merged
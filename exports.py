@@ -0,0 +1,239 @@
+import argparse
+import io
+import json
+import os
+from functools import lru_cache
+from urllib.parse import urlparse
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from catalog import Catalog, CatalogStore, CATALOG_PATH, OPTIONS
+from spec_parser import catalog_specs
+
+# Rows converted and written at a time; bounds the memory of an export
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "20000"))
+
+# Export format -> (MIME type, file extension)
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", ".arrow"),
+    "csv": ("text/csv", ".csv"),
+}
+
+RESULT_FIELDS = [("position", pa.int32()), ("title", pa.string()), ("link", pa.string()), ("snippet", pa.string()),
+                 ("shop", pa.string()), ("price_ron", pa.float64())]
+
+
+# File-like sink collecting what the writers produce until it is drained,
+# so an export can be streamed one chunk at a time
+class _ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+# The typed spec columns have the same dtypes for every catalog
+@lru_cache(maxsize=1)
+def _typed_schema():
+    return pa.Schema.from_pandas(Catalog({}, OPTIONS).frame, preserve_index=False).remove_metadata()
+
+
+# Schema of a monitor export: name, the catalog text of each spec in
+# `spec_names`, then the typed columns parsed from the specs
+def monitor_schema(spec_names):
+    fields = [pa.field("name", pa.string())] + [pa.field(spec, pa.string()) for spec in spec_names]
+    return pa.schema(fields + [field for field in _typed_schema() if field.name not in spec_names])
+
+
+# A typed column of the parsed specs; values that could not be parsed (NaN)
+# are exported as nulls
+def _typed_column(typed, field):
+    return pa.array(typed[field.name], type=field.type, from_pandas=True)
+
+
+def _monitor_table(frame, specs, names, spec_names, schema):
+    columns = {"name": names}
+    for spec in spec_names:
+        columns[spec] = [specs[name].get(spec) for name in names]
+    typed = frame.loc[names]
+    for field in schema:
+        if field.name not in columns:
+            columns[field.name] = _typed_column(typed, field)
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+# Chunks of monitors (e.g. the compared categories or the whole catalog)
+# with their spec texts and typed spec columns
+def monitor_tables(catalog, names, spec_names, chunk_rows=EXPORT_CHUNK_ROWS):
+    schema = monitor_schema(spec_names)
+    names = list(names)
+    for start in range(0, len(names), chunk_rows):
+        yield _monitor_table(catalog.frame, catalog.specs, names[start:start + chunk_rows], spec_names, schema)
+
+
+# Schema of a search result export: the result fields, the typed columns
+# parsed from the product specs (when the result has them) and, for batch
+# runs, the selection the results were found for
+def result_schema(extra_fields=()):
+    return pa.schema([pa.field(name, kind) for name, kind in list(extra_fields) + RESULT_FIELDS]
+                     + [field for field in _typed_schema() if field.name != "price_ron"])
+
+
+# Rows of search results; the specs read from product pages are parsed under
+# the catalog option names they stand for
+def _result_table(results, schema, first_position=1, extra=None):
+    monitors = {str(position): {"specs": catalog_specs(result.get("specs") or {}), "price": result.get("price")}
+                for position, result in enumerate(results)}
+    typed = Catalog(monitors, OPTIONS).frame
+    columns = {
+        "position": list(range(first_position, first_position + len(results))),
+        "title": [result.get("title") for result in results],
+        "link": [result.get("link") for result in results],
+        "snippet": [result.get("snippet") for result in results],
+        "shop": [result.get("shop") or urlparse(result.get("link", "")).netloc.removeprefix("www.") or None
+                 for result in results],
+        "price_ron": _typed_column(typed, pa.field("price_ron", pa.float64())),
+        **(extra or {}),
+    }
+    for field in schema:
+        if field.name not in columns:
+            columns[field.name] = _typed_column(typed, field)
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+# Chunks of a search result set
+def result_tables(results, chunk_rows=EXPORT_CHUNK_ROWS):
+    schema = result_schema()
+    for start in range(0, len(results), chunk_rows):
+        yield _result_table(results[start:start + chunk_rows], schema, first_position=start + 1)
+
+
+BATCH_FIELDS = [("id", pa.string()), ("status", pa.string()), ("query", pa.string()), ("source", pa.string()),
+                ("analysis_type", pa.string()), ("seconds", pa.float64())]
+
+
+# Chunks of the results of a batch run, one row per search result with the
+# item it was found for, read from the JSONL output a line at a time. Items
+# that failed or were retried later keep only their last record.
+def batch_tables(path, chunk_rows=EXPORT_CHUNK_ROWS):
+    schema = result_schema(BATCH_FIELDS)
+    last_line = {}
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f):
+            try:
+                last_line[json.loads(line)["id"]] = number
+            except (json.JSONDecodeError, KeyError):
+                continue
+    keep = set(last_line.values())
+
+    results, extra = [], {name: [] for name, _ in BATCH_FIELDS}
+    positions = []
+
+    def flush():
+        table = _result_table(results, schema, extra=extra)
+        table = table.set_column(table.schema.get_field_index("position"), "position",
+                                 pa.array(positions, pa.int32()))
+        results.clear()
+        positions.clear()
+        for values in extra.values():
+            values.clear()
+        return table
+
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f):
+            if number not in keep:
+                continue
+            record = json.loads(line)
+            for position, result in enumerate(record.get("results") or [None], start=1):
+                results.append(result or {})
+                positions.append(position if result else None)
+                for name, _ in BATCH_FIELDS:
+                    extra[name].append(record.get(name))
+                if len(results) >= chunk_rows:
+                    yield flush()
+    if results:
+        yield flush()
+
+
+def _writer(fmt, sink, schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    if fmt == "arrow":
+        return pa.ipc.new_file(sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+    if fmt == "csv":
+        return pa_csv.CSVWriter(sink, _csv_schema(schema))
+    raise ValueError(f"Format de export necunoscut: {fmt}")
+
+
+# CSV has no dictionary type: categorical columns are written as text
+def _csv_schema(schema):
+    return pa.schema([pa.field(field.name, field.type.value_type) if pa.types.is_dictionary(field.type) else field
+                      for field in schema])
+
+
+# Encode tables as one export file, yielding the bytes produced after each
+# table so that only one chunk is in memory at a time
+def export_stream(tables, fmt, schema):
+    sink = _ChunkSink()
+    writer = _writer(fmt, sink, schema)
+    for table in tables:
+        writer.write_table(table.cast(_csv_schema(schema)) if fmt == "csv" else table)
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+# The whole encoded export, for callers that need it at once (Streamlit
+# downloads); only the encoded bytes and one chunk of rows are in memory
+def export_bytes(tables, fmt, schema):
+    return b"".join(export_stream(tables, fmt, schema))
+
+
+def write_export(tables, fmt, schema, path):
+    with open(path, "wb") as f:
+        for data in export_stream(tables, fmt, schema):
+            f.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the catalog or batch results as Parquet, Arrow IPC or CSV")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="parquet")
+    parser.add_argument("--output", required=True)
+    commands = parser.add_subparsers(dest="command", required=True)
+    catalog_command = commands.add_parser("catalog", help="every monitor with its specs and typed spec columns")
+    catalog_command.add_argument("--catalog", default=CATALOG_PATH)
+    batch_command = commands.add_parser("batch", help="the search results of a batch run (batch.py output)")
+    batch_command.add_argument("results")
+    args = parser.parse_args()
+
+    if args.command == "catalog":
+        catalog = CatalogStore(args.catalog).get()
+        spec_names = list(catalog.options)
+        write_export(monitor_tables(catalog, catalog.names, spec_names), args.format, monitor_schema(spec_names),
+                     args.output)
+    else:
+        write_export(batch_tables(args.results), args.format, result_schema(BATCH_FIELDS), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Rows per page of the spec grid (tab1) and the comparison grid (tab3)
+GRID_PAGE_SIZE = int(os.getenv("GRID_PAGE_SIZE", "25"))
+
+# Compared categories shown next to the reference category per page of the comparison grid
+GRID_COLUMN_PAGE_SIZE = int(os.getenv("GRID_COLUMN_PAGE_SIZE", "8"))
+
+# Sort key of the spec grid that orders monitors by name
+NAME_COLUMN = "Monitor"
+
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
+
+
+def _window(total, page, page_size):
+    page = min(max(page, 0), page_count(total, page_size) - 1)
+    return slice(page * page_size, (page + 1) * page_size)
+
+
+# Order of spec texts: by their first number when they have one ("144 Hz",
+# "0,5 ms"), then by text; texts without a number always come last
+def sort_order(values, descending=False):
+    texts = pd.Series(values, dtype=object).fillna("").astype(str)
+    numbers = pd.to_numeric(texts.str.extract(r"(\d+(?:[.,]\d+)?)", expand=False).str.replace(",", ".", regex=False),
+                            errors="coerce").to_numpy()
+    text_codes, _ = pd.factorize(texts.str.lower(), sort=True)
+    sign = -1 if descending else 1
+    return np.lexsort((sign * text_codes, sign * np.nan_to_num(numbers), np.isnan(numbers)))
+
+
+# One page of the spec grid: a row per monitor and a column per spec in
+# `columns`, sorted on one spec (or NAME_COLUMN). Only the sort column is
+# read for every monitor; the other cells only for the visible page.
+def spec_page(specs, names, columns, page=0, page_size=GRID_PAGE_SIZE, sort_by=None, descending=False):
+    names = np.asarray(names, dtype=object)
+    if sort_by is not None:
+        keys = names if sort_by == NAME_COLUMN else [specs[name].get(sort_by) for name in names]
+        names = names[sort_order(keys, descending)]
+    visible = names[_window(len(names), page, page_size)]
+    return pd.DataFrame([[specs[name].get(column, "N/A") for column in columns] for name in visible],
+                        index=pd.Index(visible, name=NAME_COLUMN), columns=list(columns))
+
+
+# Cells of a spec x category value matrix that differ from the first
+# (reference) category, compared through one factorization of all values
+def differing_cells(values):
+    codes = pd.factorize(values.ravel())[0].reshape(values.shape)
+    return codes != codes[:, :1]
+
+
+# One page of the comparison grid: a row per spec of the visible page and a
+# column per category of the visible column page, the first category
+# staying on every column page as the reference. Only the visible cells are
+# read. Returns the page, the mask of its cells that differ from the
+# reference and, per row, whether any visible category differs.
+def comparison_page(specs, categories, spec_names, page=0, page_size=GRID_PAGE_SIZE, column_page=0,
+                    column_page_size=GRID_COLUMN_PAGE_SIZE):
+    rows = list(spec_names)[_window(len(spec_names), page, page_size)]
+    others = list(categories)[1:]
+    shown = [categories[0]] + others[_window(len(others), column_page, column_page_size)]
+    values = np.array([[specs[category].get(spec, "N/A") for category in shown] for spec in rows],
+                      dtype=object).reshape(len(rows), len(shown))
+    differs = differing_cells(values)
+    return pd.DataFrame(values, index=pd.Index(rows, name="Specificație"), columns=shown), differs, differs.any(axis=1)
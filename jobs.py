@@ -0,0 +1,197 @@
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+
+# Worker pools shared by all sessions: threads for upstream I/O (Serper,
+# Gemini), processes for CPU-bound work (ReportLab)
+JOB_IO_WORKERS = int(os.getenv("JOB_IO_WORKERS", "8"))
+JOB_CPU_WORKERS = int(os.getenv("JOB_CPU_WORKERS", "2"))
+
+# Jobs allowed to wait in each pool's queue beyond the running ones
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "32"))
+
+# Finished jobs are kept this many seconds so their results survive reruns
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", "900"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, FAILED, CANCELLED)
+
+_current = threading.local()
+
+
+# Raised by JobManager.submit() when the pool's queue is full
+class QueueFull(RuntimeError):
+    pass
+
+
+# The job running in the calling worker thread (None outside I/O jobs).
+# Lets a job publish partial results through `job.progress`.
+def current_job():
+    return getattr(_current, "job", None)
+
+
+# Runs a process pool job and reports when it actually started
+def _timed(fn, args, kwargs):
+    started = time.time()
+    return started, fn(*args, **kwargs)
+
+
+class Job:
+    def __init__(self, job_id, kind, label, pool, sequence):
+        self.id = job_id
+        self.kind = kind
+        self.label = label
+        self.pool = pool
+        self.sequence = sequence
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.progress = None
+        # (upstream, time its call may start) while waiting for a rate limit
+        self.throttled = None
+        self.result = None
+        self.error = None
+        self.cancel_requested = False
+        self.future = None
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    # Seconds spent waiting in the queue and running so far
+    @property
+    def wait_seconds(self):
+        return (self.started or self.finished or time.time()) - self.submitted
+
+    @property
+    def run_seconds(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+# Bounded, process-wide job executor. Work is submitted with a kind and a
+# label, identified by a job ID and polled for status, queue position,
+# timings, partial progress and the final result or error.
+class JobManager:
+    def __init__(self, io_workers=JOB_IO_WORKERS, cpu_workers=JOB_CPU_WORKERS,
+                 max_queued=JOB_MAX_QUEUED, retention=JOB_RETENTION):
+        self.max_queued = max_queued
+        self.retention = retention
+        self._workers = {"io": io_workers, "cpu": cpu_workers}
+        self._pools = {
+            "io": ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="job"),
+            # spawn: forking a multi-threaded server process is unsafe
+            "cpu": ProcessPoolExecutor(max_workers=cpu_workers, mp_context=multiprocessing.get_context("spawn")),
+        }
+        self._jobs = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            if job.cancel_requested:
+                raise CancelledError()
+            job.status = RUNNING
+            job.started = time.time()
+        _current.job = job
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.job = None
+
+    def _finish(self, job, future):
+        with self._lock:
+            job.finished = time.time()
+            if job.started is None:
+                job.started = job.finished
+            if future.cancelled() or job.cancel_requested:
+                job.status = CANCELLED
+            elif future.exception() is not None:
+                job.status = FAILED
+                job.error = future.exception()
+            else:
+                job.status = DONE
+                job.result = future.result()
+                if job.pool == "cpu":
+                    job.started, job.result = job.result
+
+    def _prune(self):
+        expired = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done and job.finished < expired]:
+            del self._jobs[job_id]
+
+    # Submit fn(*args, **kwargs) and return its job ID. cpu=True runs it in
+    # the process pool (fn and its arguments must be picklable). Raises
+    # QueueFull when the pool already has max_queued jobs waiting.
+    def submit(self, kind, fn, *args, label="", cpu=False, **kwargs):
+        pool = "cpu" if cpu else "io"
+        with self._lock:
+            self._prune()
+            pending = sum(1 for job in self._jobs.values() if job.pool == pool and not job.done)
+            if pending >= self._workers[pool] + self.max_queued:
+                raise QueueFull(f"{pending} jobs already pending")
+
+            job = Job(uuid.uuid4().hex[:12], kind, label, pool, next(self._sequence))
+            self._jobs[job.id] = job
+
+        if cpu:
+            job.future = self._pools[pool].submit(_timed, fn, args, kwargs)
+        else:
+            job.future = self._pools[pool].submit(self._run, job, fn, args, kwargs)
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job.id
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        # Process pool jobs report their exact start only when they finish
+        if job is not None and job.status == QUEUED and job.future is not None and job.future.running():
+            with self._lock:
+                if job.status == QUEUED:
+                    job.status = RUNNING
+                    job.started = time.time()
+        return job
+
+    # 1-based position among the jobs waiting in the same pool (0 if not waiting)
+    def position(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.status != QUEUED:
+            return 0
+        with self._lock:
+            return 1 + sum(
+                1 for other in self._jobs.values()
+                if other.pool == job.pool and other.status == QUEUED and other.sequence < job.sequence
+            )
+
+    # Cancel a job. Waiting jobs never start; a running I/O job finishes in
+    # the background but is reported as cancelled and its result dropped.
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return False
+        with self._lock:
+            job.cancel_requested = True
+        job.future.cancel()
+        return True
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        stats = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+        for job in jobs:
+            stats[job.status] += 1
+        return stats
+
+    def shutdown(self):
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
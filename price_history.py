@@ -0,0 +1,376 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from clients import create_session
+from domain_policy import DomainPolicy, DOMAIN_POLICY_PATH
+from enrichment import DomainThrottle, USER_AGENT
+from shop_index import domain_allowed, extract_product, url_domain
+
+# Watched products and their price history (Parquet files and a SQLite watch list)
+PRICE_HISTORY_DIR = os.getenv(
+    "PRICE_HISTORY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "price_history")
+)
+
+# Seconds between two checks of a watched product page
+PRICE_TRACK_INTERVAL = int(os.getenv("PRICE_TRACK_INTERVAL", str(6 * 3600)))
+
+# Product pages checked at once (still limited per domain by DomainThrottle)
+PRICE_TRACK_WORKERS = int(os.getenv("PRICE_TRACK_WORKERS", "8"))
+
+# Every check is kept for PRICE_HISTORY_RAW_DAYS days, then one point per day
+# until PRICE_HISTORY_DAILY_DAYS days and one point per week after that
+PRICE_HISTORY_RAW_DAYS = int(os.getenv("PRICE_HISTORY_RAW_DAYS", "30"))
+PRICE_HISTORY_DAILY_DAYS = int(os.getenv("PRICE_HISTORY_DAILY_DAYS", "365"))
+
+# Tracker runs (one Parquet segment each) merged into the history file once there are more of them
+PRICE_HISTORY_MAX_SEGMENTS = int(os.getenv("PRICE_HISTORY_MAX_SEGMENTS", "8"))
+
+# Rows per row group of the history file; the file is sorted by URL, so
+# reading one product only decodes the row groups holding it
+PRICE_HISTORY_ROW_GROUP = 16384
+
+DAY = 24 * 3600
+WEEK = 7 * DAY
+
+# One point per URL and time: the last price seen, the lowest and highest
+# price and the number of checks it stands for (1 until downsampled)
+HISTORY_SCHEMA = pa.schema([
+    ("url", pa.string()),
+    ("ts", pa.timestamp("s", tz="UTC")),
+    ("price", pa.float64()),
+    ("low", pa.float64()),
+    ("high", pa.float64()),
+    ("samples", pa.int32()),
+])
+
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+NO_PRICE = "no_price"
+FAILED = "failed"
+
+
+# Replace points older than PRICE_HISTORY_RAW_DAYS by one point per day and
+# points older than PRICE_HISTORY_DAILY_DAYS by one point per week (per URL),
+# keeping the last price, the lowest and highest price and the number of
+# checks. Downsampling a downsampled table again leaves it unchanged.
+def downsample(table, now=None, raw_days=PRICE_HISTORY_RAW_DAYS, daily_days=PRICE_HISTORY_DAILY_DAYS):
+    now = int(now if now is not None else time.time())
+    seconds = pc.cast(table["ts"], pa.int64())
+    age = pc.subtract(pa.scalar(now, pa.int64()), seconds)
+    bucket = pc.if_else(
+        pc.greater(age, daily_days * DAY),
+        pc.multiply(pc.floor(pc.divide(seconds, float(WEEK))).cast(pa.int64()), WEEK),
+        pc.if_else(pc.greater(age, raw_days * DAY),
+                   pc.multiply(pc.floor(pc.divide(seconds, float(DAY))).cast(pa.int64()), DAY),
+                   seconds),
+    )
+    ordered = table.append_column("bucket", bucket).sort_by([("url", "ascending"), ("ts", "ascending")])
+    grouped = ordered.group_by(["url", "bucket"], use_threads=False).aggregate(
+        [("price", "last"), ("low", "min"), ("high", "max"), ("samples", "sum")]
+    )
+    return pa.table({
+        "url": grouped["url"],
+        "ts": grouped["bucket"].cast(pa.timestamp("s", tz="UTC")),
+        "price": grouped["price_last"],
+        "low": grouped["low_min"],
+        "high": grouped["high_max"],
+        "samples": grouped["samples_sum"].cast(pa.int32()),
+    }, schema=HISTORY_SCHEMA).sort_by([("url", "ascending"), ("ts", "ascending")])
+
+
+# Local price history of watched product pages. The prices of each tracker
+# run are appended as a small Parquet segment; segments are merged into one
+# downsampled history file sorted by URL. The watch list with the HTTP
+# validators and content hash of each page lives in SQLite next to them.
+class PriceHistory:
+    def __init__(self, directory=PRICE_HISTORY_DIR, max_segments=PRICE_HISTORY_MAX_SEGMENTS):
+        self.directory = directory
+        self.max_segments = max_segments
+        self.history_path = os.path.join(directory, "history.parquet")
+        self.segments_dir = os.path.join(directory, "segments")
+        self.db_path = os.path.join(directory, "watchlist.sqlite3")
+        self._local = threading.local()
+
+        os.makedirs(self.segments_dir, exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS watched (
+                url TEXT PRIMARY KEY,
+                title TEXT,
+                shop TEXT NOT NULL,
+                added REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                hash TEXT,
+                price REAL,
+                checked REAL,
+                status TEXT,
+                error TEXT
+            )
+        """)
+        conn.commit()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def watch(self, url, shop, title=None):
+        conn = self._connect()
+        conn.execute("INSERT INTO watched (url, title, shop, added) VALUES (?, ?, ?, ?) "
+                     "ON CONFLICT(url) DO UPDATE SET title = COALESCE(excluded.title, title)",
+                     (url, title, shop, time.time()))
+        conn.commit()
+
+    # Stop checking a product; its recorded prices stay in the history
+    def unwatch(self, url):
+        conn = self._connect()
+        conn.execute("DELETE FROM watched WHERE url = ?", (url,))
+        conn.commit()
+
+    def watched(self):
+        rows = self._connect().execute("SELECT * FROM watched ORDER BY shop, COALESCE(title, url)").fetchall()
+        return [dict(row) for row in rows]
+
+    def entry(self, url):
+        row = self._connect().execute("SELECT * FROM watched WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row is not None else None
+
+    # Store the outcome of a check of a watched page
+    def record_check(self, url, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        conn = self._connect()
+        conn.execute(f"UPDATE watched SET {columns} WHERE url = ?", (*fields.values(), url))
+        conn.commit()
+
+    # Append (url, unix time, price) points as a new segment
+    def append(self, points):
+        if not points:
+            return
+        urls, times, prices = zip(*points)
+        table = pa.table({
+            "url": list(urls),
+            "ts": pa.array([int(ts) for ts in times], pa.int64()).cast(pa.timestamp("s", tz="UTC")),
+            "price": list(prices),
+            "low": list(prices),
+            "high": list(prices),
+            "samples": pa.array([1] * len(points), pa.int32()),
+        }, schema=HISTORY_SCHEMA)
+        name = f"{time.time_ns()}-{os.getpid()}-{threading.get_ident()}.parquet"
+        self._write(table, os.path.join(self.segments_dir, name))
+        if len(self._segments()) > self.max_segments:
+            self.compact()
+
+    @staticmethod
+    def _write(table, path):
+        partial = path + ".partial"
+        pq.write_table(table, partial, compression="zstd", row_group_size=PRICE_HISTORY_ROW_GROUP)
+        os.replace(partial, path)
+
+    def _segments(self):
+        return sorted(os.path.join(self.segments_dir, name) for name in os.listdir(self.segments_dir)
+                      if name.endswith(".parquet"))
+
+    # Merge the segments into the history file and downsample old points.
+    # The watch list database is held for writing meanwhile, which keeps two
+    # processes from compacting at once.
+    def compact(self, now=None):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            segments = self._segments()
+            tables = [pq.read_table(path, schema=HISTORY_SCHEMA) for path in segments]
+            if os.path.exists(self.history_path):
+                tables.insert(0, pq.read_table(self.history_path, schema=HISTORY_SCHEMA))
+            if not tables:
+                return 0
+            history = downsample(pa.concat_tables(tables), now)
+            self._write(history, self.history_path)
+            for path in segments:
+                os.remove(path)
+            return history.num_rows
+        finally:
+            conn.rollback()
+
+    # Rows of one URL in a Parquet file, reading only the row groups whose
+    # URL range holds it (cheaper than a dataset filter for a single file)
+    @staticmethod
+    def _read_file(path, url):
+        parquet = pq.ParquetFile(path)
+        groups = []
+        for index in range(parquet.metadata.num_row_groups):
+            statistics = parquet.metadata.row_group(index).column(0).statistics
+            if statistics is None or not statistics.has_min_max or statistics.min <= url <= statistics.max:
+                groups.append(index)
+        table = parquet.read_row_groups(groups).cast(HISTORY_SCHEMA)
+        return table.filter(pc.equal(table["url"], url))
+
+    def _read(self, url):
+        paths = ([self.history_path] if os.path.exists(self.history_path) else []) + self._segments()
+        tables = [self._read_file(path, url) for path in paths]
+        return pa.concat_tables(tables) if tables else HISTORY_SCHEMA.empty_table()
+
+    # Price history of one URL, oldest first, as a DataFrame indexed by time
+    # with the price, low, high and samples columns. Only the row groups of
+    # the history file that may hold the URL are read.
+    def series(self, url):
+        for attempt in range(3):
+            try:
+                table = self._read(url)
+                break
+            except FileNotFoundError:
+                # A segment was merged by a concurrent compaction: read the new history file
+                if attempt == 2:
+                    raise
+        # Points of the history file and of the segments may share a second:
+        # they are merged like downsampled points, the newest price last
+        grouped = table.group_by("ts", use_threads=False).aggregate(
+            [("price", "last"), ("low", "min"), ("high", "max"), ("samples", "sum")]
+        )
+        merged = pa.table({
+            "ts": grouped["ts"],
+            "price": grouped["price_last"],
+            "low": grouped["low_min"],
+            "high": grouped["high_max"],
+            "samples": grouped["samples_sum"].cast(pa.int32()),
+        }).sort_by("ts")
+        return merged.to_pandas().set_index("ts")
+
+
+# Re-checks watched product pages and records their price. A page is only
+# downloaded again when it changed (conditional GET with its ETag and
+# Last-Modified), and only parsed again when its content hash changed.
+class PriceTracker:
+    def __init__(self, history, session, throttle=None, max_workers=PRICE_TRACK_WORKERS,
+                 interval=PRICE_TRACK_INTERVAL, timeout=(3.05, 10)):
+        self.history = history
+        self.session = session
+        self.throttle = throttle or DomainThrottle()
+        self.max_workers = max_workers
+        self.interval = interval
+        self.timeout = timeout
+
+    # Check one watched page. Returns the status and the fields to store.
+    def check(self, entry):
+        url = entry["url"]
+        headers = {"User-Agent": USER_AGENT, "Accept": "text/html"}
+        if entry.get("price") is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        domain = url_domain(url)
+        self.throttle.acquire(domain)
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        finally:
+            self.throttle.release(domain)
+
+        if response.status_code == 304 and entry.get("price") is not None:
+            return UNCHANGED, {"price": entry["price"]}
+        response.raise_for_status()
+
+        fields = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        digest = hashlib.sha256(response.content).hexdigest()
+        if digest == entry.get("hash") and entry.get("price") is not None:
+            return UNCHANGED, {**fields, "price": entry["price"]}
+
+        product = extract_product(response.text, url)
+        title = entry.get("title") or product.get("title")
+        if product.get("price") is None:
+            # Keep the last known price with the validators and hash of the
+            # page it came from; only the attempt is recorded
+            return NO_PRICE, {"title": title}
+        fields.update(hash=digest, price=product["price"], title=title)
+        return UPDATED, fields
+
+    # Check the watched pages not checked for `interval` seconds (all of
+    # them with force) concurrently and append their prices to the history.
+    # Returns the number of pages per status.
+    def run(self, force=False, now=None):
+        now = now if now is not None else time.time()
+        due = [entry for entry in self.history.watched()
+               if force or entry["checked"] is None or now - entry["checked"] >= self.interval]
+        counts = {UPDATED: 0, UNCHANGED: 0, NO_PRICE: 0, FAILED: 0}
+        points = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prices") as executor:
+            futures = {executor.submit(self.check, entry): entry for entry in due}
+            for future in as_completed(futures):
+                url = futures[future]["url"]
+                checked = time.time()
+                try:
+                    status, fields = future.result()
+                except Exception as e:
+                    # A broken page waits for the next interval like any other
+                    # (as does a page without a price)
+                    counts[FAILED] += 1
+                    self.history.record_check(url, checked=checked, status=FAILED, error=str(e)[:500])
+                    continue
+                counts[status] += 1
+                self.history.record_check(url, checked=checked, status=status, error=None, **fields)
+                if fields.get("price") is not None:
+                    points.append((url, checked, fields["price"]))
+        self.history.append(points)
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Track the price history of watched product pages")
+    parser.add_argument("--directory", default=PRICE_HISTORY_DIR, help="price history directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    watch = commands.add_parser("watch", help="watch product pages of the configured shops")
+    watch.add_argument("urls", nargs="+")
+    unwatch = commands.add_parser("unwatch", help="stop watching product pages")
+    unwatch.add_argument("urls", nargs="+")
+    track = commands.add_parser("track", help="check the watched pages that are due (e.g. from cron)")
+    track.add_argument("--force", action="store_true", help="check every watched page")
+    track.add_argument("--every", type=float, help="keep running, checking every this many seconds")
+    commands.add_parser("compact", help="merge the segments and downsample old points")
+    show = commands.add_parser("show", help="print the price history of a page")
+    show.add_argument("url")
+    args = parser.parse_args()
+
+    history = PriceHistory(args.directory)
+    if args.command == "watch":
+        shops = DomainPolicy.from_file(DOMAIN_POLICY_PATH).shops
+        for url in args.urls:
+            domain = url_domain(url)
+            if not domain_allowed(domain, shops):
+                parser.error(f"{url}: magazinul {domain} nu este în lista de magazine ({', '.join(shops)})")
+            history.watch(url, domain)
+    elif args.command == "unwatch":
+        for url in args.urls:
+            history.unwatch(url)
+    elif args.command == "track":
+        tracker = PriceTracker(history, create_session())
+        while True:
+            started = time.perf_counter()
+            counts = tracker.run(force=args.force)
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} " + " · ".join(f"{status} {count}"
+                                                                   for status, count in counts.items())
+                  + f" în {time.perf_counter() - started:.1f} s", flush=True)
+            if args.every is None:
+                break
+            time.sleep(args.every)
+    elif args.command == "compact":
+        print(f"{history.compact()} puncte")
+    else:
+        print(history.series(args.url).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# Profile every rerun (the app also enables it per session with ?profile=1)
+PROFILE = os.getenv("PROFILE", "0") == "1"
+
+# Directory receiving the cProfile dumps of single reruns
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+_local = threading.local()
+
+# Returned by span() while profiling is off: no timing, no allocation
+_DISABLED = nullcontext()
+
+
+# Timing spans collected during one rerun (or one background job). Spans
+# with the same name are aggregated into a count, a total and a maximum.
+class Profile:
+    def __init__(self, label, cprofile=False):
+        self.label = label
+        self.started = time.time()
+        self.elapsed = None
+        self.dump_path = None
+        self._spans = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._cprofile = None
+        if cprofile:
+            try:
+                self._cprofile = cProfile.Profile()
+                self._cprofile.enable()
+            except ValueError:
+                # Another profiler is active in this process (Python 3.12+
+                # allows only one); keep the spans, skip the dump
+                self._cprofile = None
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        with self._lock:
+            count, total, longest = self._spans.get(name, (0, 0.0, 0.0))
+            self._spans[name] = (count + 1, total + seconds, max(longest, seconds))
+
+    # Fold the spans of another profile (e.g. a finished job) into this one
+    def merge(self, other, prefix=""):
+        with other._lock:
+            spans = list(other._spans.items())
+        with self._lock:
+            for name, (count, total, longest) in spans:
+                current = self._spans.get(prefix + name, (0, 0.0, 0.0))
+                self._spans[prefix + name] = (current[0] + count, current[1] + total, max(current[2], longest))
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self._start
+        if self._cprofile is not None:
+            self._cprofile.disable()
+
+    # Spans as (name, count, total seconds, max seconds), slowest first
+    def rows(self):
+        with self._lock:
+            spans = list(self._spans.items())
+        return sorted(((name, *values) for name, values in spans), key=lambda row: row[2], reverse=True)
+
+    # Write the cProfile statistics of this rerun as a pstats file
+    def dump(self, directory=PROFILE_DIR):
+        if self._cprofile is None:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        ascii_label = unicodedata.normalize("NFKD", self.label).encode("ascii", "ignore").decode()
+        slug = re.sub(r"[^a-z0-9]+", "-", ascii_label.lower()).strip("-")
+        path = os.path.join(directory, f"rerun-{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))}-{slug}.pstats")
+        self._cprofile.dump_stats(path)
+        self.dump_path = path
+        return path
+
+    # The `limit` functions with the highest cumulative time, as text
+    def top_functions(self, limit=15):
+        if self._cprofile is None:
+            return ""
+        output = io.StringIO()
+        pstats.Stats(self._cprofile, stream=output).strip_dirs().sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+
+# The profile collecting spans in the calling thread, or None
+def current():
+    return getattr(_local, "profile", None)
+
+
+# Start profiling the calling thread
+def start(label, cprofile=False):
+    profile = Profile(label, cprofile=cprofile)
+    _local.profile = profile
+    return profile
+
+
+# Stop profiling the calling thread and return the finished profile
+def stop():
+    profile = current()
+    _local.profile = None
+    if profile is not None:
+        profile.finish()
+    return profile
+
+
+# Time a block under `name` if the calling thread is being profiled
+def span(name):
+    profile = current()
+    return _DISABLED if profile is None else profile.span(name)
+
+
+# Record a duration measured elsewhere (e.g. a streamed answer)
+def record(name, seconds):
+    profile = current()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+# Wrap fn so that, run in a worker thread, its spans go to `profile`.
+# Returns fn unchanged when there is nothing to collect.
+def bind(fn, profile):
+    if profile is None:
+        return fn
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        previous = current()
+        _local.profile = profile
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.profile = previous
+
+    return wrapper
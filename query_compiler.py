@@ -0,0 +1,178 @@
+import os
+import re
+import unicodedata
+from collections import namedtuple
+
+# Google (and Serper) ignore everything after the 32nd word of a query
+QUERY_MAX_WORDS = int(os.getenv("QUERY_MAX_WORDS", "32"))
+QUERY_MAX_CHARS = int(os.getenv("QUERY_MAX_CHARS", "2048"))
+
+# Upper bound on extra sub-queries issued for specs that do not fit
+QUERY_MAX_SUBQUERIES = int(os.getenv("QUERY_MAX_SUBQUERIES", "2"))
+
+# A rewritten query whose terms overlap the original by at least this
+# fraction (Jaccard) is not worth a second search
+QUERY_REWRITE_SIMILARITY = float(os.getenv("QUERY_REWRITE_SIMILARITY", "0.8"))
+
+# Language and country for Serper, sent as request parameters instead of
+# the former "&lr=lang_ro" text appended to the query
+SERPER_PARAMS = {"gl": "ro", "hl": "ro"}
+
+_OPERATOR = re.compile(r"(?:^|\s)(?:-?site:\S+|&lr=\S+)", re.IGNORECASE)
+_POSITIVE_SITE = re.compile(r"(?:^|\s)site:(\S+)", re.IGNORECASE)
+
+# Qualifiers that do not change what a spec value searches for
+# ("100 Hz minim" finds the same pages as "100 Hz")
+_QUALIFIERS = re.compile(r"\b(?:minim|maxim|min|max|cel putin|pana la|de la|peste|sub)\b\.?")
+_DECIMAL_COMMA = re.compile(r"(?<=\d),(?=\d)")
+_NUMBER_UNIT = re.compile(r"(?<=\d)(?=[a-z])")
+
+# queries: the Serper queries to run (the first one is the primary query)
+# params:  extra Serper request parameters
+# keywords: the descriptive terms alone, for the local shop index
+CompiledQuery = namedtuple("CompiledQuery", ["queries", "params", "keywords"])
+
+
+def _clean(text):
+    return " ".join(str(text).split())
+
+
+def _words(parts):
+    return sum(len(part.split()) for part in parts)
+
+
+# Remove site:, -site: and &lr= operators, returning the bare search text
+def strip_operators(text):
+    return _clean(_OPERATOR.sub(" ", text))
+
+
+def _fits(parts, words, chars):
+    return _words(parts) <= words and len(" ".join(parts)) <= chars
+
+
+# Pack the `fixed` parts, then as many `optional` parts as fit, into a query of
+# at most `words` words / `chars` characters. Returns the query parts and the
+# optional parts left over.
+def _pack(fixed, optional, words=QUERY_MAX_WORDS, chars=QUERY_MAX_CHARS):
+    query = []
+    for part in fixed:
+        if _fits(query + [part], words, chars):
+            query.append(part)
+    leftover = []
+    for part in optional:
+        if _fits(query + [part], words, chars):
+            query.append(part)
+        else:
+            leftover.append(part)
+    return query, leftover
+
+
+# Append the site restriction, then the exclusions that still fit; the
+# exclusions that do not fit are enforced by the local post-filter
+def _with_restrictions(terms, sites, policy):
+    query, _ = _pack(terms + sites, [f"-site:{domain}" for domain in policy.excluded_domains])
+    return " ".join(query)
+
+
+def _budget(sites):
+    return QUERY_MAX_WORDS - _words(sites), QUERY_MAX_CHARS - len(" ".join(sites)) - 1
+
+
+# Canonical query for free text (user text, Gemini rewrites, per-shop queries).
+# Positive site: operators in the text are kept; without one the policy's
+# allowed suffixes are used. Idempotent: finalizing a finalized query is a no-op.
+def finalize_query(text, policy):
+    sites = sorted({f"site:{site.lower()}" for site in _POSITIVE_SITE.findall(text)})
+    if not sites:
+        sites = policy.query_restrictions(include_exclusions=False)
+
+    terms, _ = _pack(strip_operators(text).split(), [], *_budget(sites))
+    return _with_restrictions(terms, sites, policy)
+
+
+# Comparison form of a spec value: case, diacritics, decimal commas, spacing
+# between a number and its unit and qualifier words are ignored
+def _spec_key(value):
+    text = unicodedata.normalize("NFKD", str(value).casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = _NUMBER_UNIT.sub(" ", _DECIMAL_COMMA.sub(".", text))
+    return _clean(_QUALIFIERS.sub(" ", text))
+
+
+# Spec values with near-duplicates collapsed; of the values sharing a
+# comparison form the first in sort order is kept, so the result does not
+# depend on the order of the selection
+def _unique_specs(values):
+    unique = {}
+    for value in values:
+        value = _clean(value)
+        key = _spec_key(value)
+        if key and (key not in unique or value < unique[key]):
+            unique[key] = value
+    return [unique[key] for key in sorted(unique)]
+
+
+def _unique_sorted(values):
+    unique = {}
+    for value in values:
+        value = _clean(value)
+        if value and value.casefold() not in unique:
+            unique[value.casefold()] = value
+    return [unique[key] for key in sorted(unique)]
+
+
+# Compile a structured search selection into canonical Serper queries.
+# Every collection is de-duplicated and sorted, so identical selections give
+# byte-identical queries regardless of widget order. Spec values that do not
+# fit the primary query are split into sub-queries sharing the same core.
+# Keys of `selection`: categories, specs (spec values), resolution, panel,
+# refresh, response, features, price_range, shop and text; None means "any".
+def compile_query(selection, policy):
+    categories = _unique_sorted(selection.get("categories") or [])
+    keywords = []
+    if len(categories) == 1:
+        keywords.append(categories[0])
+    elif categories:
+        keywords.append("(" + " OR ".join(categories) + ")")
+
+    for key in ("resolution", "panel", "refresh", "response"):
+        if selection.get(key):
+            keywords.append(_clean(selection[key]))
+    keywords.extend(_unique_sorted(selection.get("features") or []))
+    if selection.get("text"):
+        keywords.append(_clean(selection["text"]))
+
+    core = list(keywords)
+    if selection.get("price_range"):
+        low, high = selection["price_range"]
+        core.append(f"pret {low}-{high} RON")
+
+    # Spec values already present among the core terms add nothing
+    present = f" {_spec_key(' '.join(core))} "
+    specs = [value for value in _unique_specs(selection.get("specs") or []) if f" {_spec_key(value)} " not in present]
+
+    sites = policy.query_restrictions(shop=selection.get("shop"), include_exclusions=False)
+    budget = _budget(sites)
+    query, leftover = _pack(core, specs, *budget)
+    queries = [query]
+    while leftover and len(queries) <= QUERY_MAX_SUBQUERIES:
+        subquery, rest = _pack(core, leftover, *budget)
+        if len(rest) == len(leftover):
+            break
+        queries.append(subquery)
+        leftover = rest
+
+    compiled = [_with_restrictions(query, sites, policy) for query in queries]
+    return CompiledQuery(compiled, dict(SERPER_PARAMS), " ".join(keywords))
+
+
+# Whether a rewrite (e.g. from the Gemini optimizer) differs enough from the
+# original query to be searched as well: operators, case and word order are
+# ignored and the remaining term sets are compared by Jaccard similarity
+def rewrite_differs(original, rewrite, threshold=QUERY_REWRITE_SIMILARITY):
+    original_terms = set(strip_operators(original).casefold().split())
+    rewrite_terms = set(strip_operators(rewrite).casefold().split())
+    if not rewrite_terms:
+        return False
+    union = original_terms | rewrite_terms
+    return len(original_terms & rewrite_terms) / len(union) < threshold
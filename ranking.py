@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+
+from spec_parser import (BRIGHTNESS_OPTION, CONNECTIVITY_OPTION, CONTRAST_OPTION, DIAGONAL_OPTION, HEIGHT_OPTION,
+                         PIVOT_OPTION, REFRESH_OPTION, RESOLUTION_OPTION, RESPONSE_OPTION, WARRANTY_OPTION)
+
+# Entries returned by a ranking unless asked otherwise
+RANK_TOP_K = int(os.getenv("RANK_TOP_K", "10"))
+
+PRICE_CRITERION = "Preț"
+
+# Rankable criteria: catalog spec option (or the price) -> whether a higher
+# typed value is better
+RANKING_CRITERIA = {
+    REFRESH_OPTION: True,
+    RESPONSE_OPTION: False,
+    BRIGHTNESS_OPTION: True,
+    RESOLUTION_OPTION: True,
+    CONTRAST_OPTION: True,
+    DIAGONAL_OPTION: True,
+    HEIGHT_OPTION: True,
+    PIVOT_OPTION: True,
+    CONNECTIVITY_OPTION: True,
+    WARRANTY_OPTION: True,
+    PRICE_CRITERION: False,
+}
+
+
+# Typed values of a criterion, one per catalog row (NaN when unknown)
+def criterion_values(frame, criterion):
+    if criterion == RESOLUTION_OPTION:
+        return frame["resolution_width"].to_numpy() * frame["resolution_height"].to_numpy()
+    if criterion == CONNECTIVITY_OPTION:
+        return (frame["hdmi_ports"].to_numpy() + frame["displayport_ports"].to_numpy()
+                + frame["usb_c_ports"].to_numpy()).astype(np.float64)
+    column = {
+        REFRESH_OPTION: "refresh_hz",
+        RESPONSE_OPTION: "response_ms",
+        BRIGHTNESS_OPTION: "brightness_nits",
+        CONTRAST_OPTION: "contrast_ratio",
+        DIAGONAL_OPTION: "diagonal_in",
+        HEIGHT_OPTION: "height_adjust_mm",
+        PIVOT_OPTION: "pivot_deg",
+        WARRANTY_OPTION: "warranty_years",
+        PRICE_CRITERION: "price_ron",
+    }[criterion]
+    return frame[column].to_numpy()
+
+
+# Min-max normalize each column of `values` to [0, 1] across the rows, 1
+# being the best value; unknown values score 0 and a column where every
+# known value is equal gives them all 1. fmin/fmax skip NaNs without the
+# cost of a masked reduction.
+def normalize(values, higher_is_better):
+    low = np.fmin.reduce(values, axis=0)
+    high = np.fmax.reduce(values, axis=0)
+    spread = high - low
+    flat = ~(spread > 0)
+    origin = np.where(higher_is_better, low, high)
+    scale = np.where(flat, 0.0, np.where(higher_is_better, 1.0, -1.0) / np.where(flat, 1.0, spread))
+    scaled = (values - origin) * scale + flat
+    return np.nan_to_num(scaled, copy=False, nan=0.0)
+
+
+# Score every row of the typed catalog frame as the weighted mean of its
+# normalized criteria (0-100) and return the `k` best rows, best first,
+# with a "score" column. Only the top k are fully sorted.
+def rank_catalog(frame, weights, k=RANK_TOP_K):
+    weights = {criterion: float(weight) for criterion, weight in weights.items() if weight}
+    if not weights or not len(frame):
+        return frame.iloc[:0].assign(score=np.empty(0))
+
+    criteria = list(weights)
+    values = np.empty((len(frame), len(criteria)), order="F")
+    for position, criterion in enumerate(criteria):
+        values[:, position] = criterion_values(frame, criterion)
+    scaled = normalize(values, np.array([RANKING_CRITERIA[criterion] for criterion in criteria]))
+    weight_vector = np.array([weights[criterion] for criterion in criteria])
+    scores = scaled @ (weight_vector * 100 / weight_vector.sum())
+
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return frame.iloc[top].assign(score=scores[top])
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+# Calls per second allowed to each upstream and the burst allowed above
+# that rate (a rate of 0 means unlimited). The limits apply per process.
+SERPER_RATE = float(os.getenv("SERPER_RATE", "5"))
+SERPER_BURST = int(os.getenv("SERPER_BURST", "10"))
+GEMINI_RATE = float(os.getenv("GEMINI_RATE", "1"))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "5"))
+
+# Seconds an upstream is left alone after it answers 429 without Retry-After,
+# and the longest a call keeps being requeued after 429 answers
+RATE_LIMIT_PAUSE = float(os.getenv("RATE_LIMIT_PAUSE", "2"))
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "60"))
+
+
+# Thread-safe token bucket. Callers over the rate are not refused: each one
+# reserves the next token and is told how long to wait for it, so they are
+# served in arrival order.
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # Take a token; returns the seconds to wait before using it
+    def reserve(self):
+        if self.rate <= 0:
+            return max(0.0, self._paused_until - time.monotonic())
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate, self._paused_until - now)
+
+    # Seconds a call made now would wait, without reserving anything
+    def estimate(self, count=1):
+        now = time.monotonic()
+        paused = max(0.0, self._paused_until - now)
+        if self.rate <= 0:
+            return paused
+        with self._lock:
+            self._refill(now)
+            return max(0.0, (count - self._tokens) / self.rate, paused)
+
+    # Hold back every caller for `seconds` (the upstream rejected a call)
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+# Coalesces identical concurrent calls: the first caller of a key runs the
+# call, the callers arriving while it is in flight wait for its outcome.
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    # The in-flight call of `key` and whether the caller must run it (and
+    # then report its outcome with finish())
+    def join(self, key):
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def finish(self, key, result=None, error=None):
+        with self._lock:
+            future = self._calls.pop(key)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    # fn() unless an identical call is in flight. Returns its result and
+    # whether it came from another caller's call.
+    def do(self, key, fn):
+        future, leader = self.join(key)
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, result)
+        return result, False
@@ -0,0 +1,210 @@
+import hashlib
+import io
+import json
+import time
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+# Bump when the layout changes so previously cached PDFs are not served
+REPORT_ENGINE_VERSION = 1
+
+FOOTER = "© 2025 ionut.capota@processit.ro"
+
+ANALYSIS_SECTIONS = [
+    "1. Cele mai importante caracteristici:",
+    "2. Avantajele specificatiilor:",
+    "3. Potentiale utilizari recomandate:",
+    "4. Recomandari de produse care ar putea indeplini aceste specificatii:"
+]
+
+# Keys of the sections of a structured analysis, in the order of ANALYSIS_SECTIONS
+ANALYSIS_SECTION_KEYS = ["caracteristici", "avantaje", "utilizari", "recomandari"]
+
+MISSING_SECTION = "Informatii detaliate vor fi disponibile in analiza completa."
+
+
+# Error raised when a report description cannot be rendered: a failure of
+# the renderer, not of the request that described the report
+class ReportError(Exception):
+    pass
+
+# Report description
+# ------------------
+# A report is a plain, JSON-serializable dict {"version": ..., "blocks": [...]}
+# whose blocks are rendered in order:
+#   ["paragraph", text, style]           text is escaped, not ReportLab markup
+#   ["timestamp", template, style]       template with {date}, filled at render time
+#   ["spacer", height]
+#   ["table", rows, template, col_widths]
+# Because the description holds everything that ends up in the PDF (except the
+# render date), its hash is the content address of the rendered document.
+# Describing, hashing and cache lookups never import ReportLab; only rendering does.
+
+
+# Paragraph styles, built once per process
+@lru_cache(maxsize=None)
+def paragraph_styles():
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    sample = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle('Title', parent=sample['Heading1'], fontSize=18, textColor=colors.purple,
+                                spaceAfter=12),
+        "analysis_title": ParagraphStyle('AnalysisTitle', parent=sample['Heading1'], fontSize=18,
+                                         textColor=colors.purple, spaceAfter=12, fontName='Helvetica'),
+        "date": ParagraphStyle('Date', parent=sample['Normal'], fontSize=10, textColor=colors.grey),
+        "category": ParagraphStyle('Category', parent=sample['Heading2'], fontSize=14, textColor=colors.blue,
+                                   spaceAfter=8),
+        "section": ParagraphStyle('Section', parent=sample['Heading2'], fontSize=14, textColor=colors.blue,
+                                  spaceAfter=8, fontName='Helvetica'),
+        "specs": ParagraphStyle('Specs', parent=sample['Heading3'], fontSize=12, textColor=colors.darkblue,
+                                spaceAfter=6, fontName='Helvetica'),
+        "normal": sample['Normal'],
+        "footer": ParagraphStyle('Footer', parent=sample['Normal'], fontSize=8, textColor=colors.grey,
+                                 alignment=1),  # Center alignment
+    }
+
+
+# Table templates, built once per process
+@lru_cache(maxsize=None)
+def table_styles():
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return {
+        # Header row on lavender, bold spec names, black grid
+        "specs": TableStyle([
+            ('BACKGROUND', (0, 0), (1, 0), colors.lavender),
+            ('TEXTCOLOR', (0, 0), (1, 0), colors.darkblue),
+            ('ALIGN', (0, 0), (1, 0), 'CENTER'),
+            ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+            ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]),
+    }
+
+
+def _report(blocks):
+    return {"version": REPORT_ENGINE_VERSION, "blocks": blocks}
+
+
+def _spec_rows(categories, options, specs):
+    return [[option, str(specs[category][option])]
+            for category in categories for option in options if option in specs[category]]
+
+
+# Description of the specifications report: one table per category
+def spec_report(categories, options, specs):
+    blocks = [
+        ["paragraph", "Raport Specificatii Monitoare", "title"],
+        ["spacer", 12],
+        ["timestamp", "Generat la: {date}", "date"],
+        ["spacer", 24],
+    ]
+    for category in categories:
+        blocks += [
+            ["paragraph", category, "category"],
+            ["spacer", 8],
+            ["table", [["Specificatie", "Valoare"]] + _spec_rows([category], options, specs), "specs", [200, 300]],
+            ["spacer", 20],
+        ]
+    blocks.append(["paragraph", FOOTER, "footer"])
+    return _report(blocks)
+
+
+# Description of the Gemini analysis report: the four requested sections of
+# each analysis, followed by the analysed specifications. `analysis` is a list
+# of [title, sections] pairs of structured analyses (sections keyed by
+# ANALYSIS_SECTION_KEYS; the title is shown when there are several), or the
+# free text of one analysis, split into sections at blank lines.
+def analysis_report(analysis, categories, options, specs):
+    categories_text = ', '.join(categories)
+    blocks = [
+        ["paragraph", f"Analiza detaliata {categories_text}", "analysis_title"],
+        ["spacer", 12],
+        ["timestamp", "Generat de catre ionut.capota@processit.ro la: {date}", "date"],
+        ["spacer", 24],
+        ["paragraph", f"Specificatiile prezentate descriu un monitor {categories_text} cu caracteristici solide, "
+                      f"potrivit pentru o gama larga de utilizari.", "normal"],
+        ["spacer", 12],
+    ]
+
+    if isinstance(analysis, str):
+        analysis_parts = analysis.split("\n\n")
+        analysis = [[None, dict(zip(ANALYSIS_SECTION_KEYS, analysis_parts))]]
+    for title, sections in analysis:
+        if title and len(analysis) > 1:
+            blocks += [["paragraph", title, "category"], ["spacer", 8]]
+        for key, section in zip(ANALYSIS_SECTION_KEYS, ANALYSIS_SECTIONS):
+            paragraphs = [part.strip() for part in (sections.get(key) or "").split("\n\n") if part.strip()]
+            blocks.append(["paragraph", section, "section"])
+            blocks += [["paragraph", part, "normal"] for part in paragraphs or [MISSING_SECTION]]
+            blocks.append(["spacer", 16])
+
+    blocks.append(["paragraph", "Specificatii tehnice:", "specs"])
+    rows = _spec_rows(categories, options, specs)
+    if rows:
+        blocks.append(["table", [["Specificatie", "Valoare"]] + rows, "specs", [200, 300]])
+
+    blocks += [
+        ["spacer", 20],
+        ["paragraph", "In concluzie, specificatiile descriu un monitor versatil si performant, potrivit pentru o "
+                      "gama larga de utilizari, oferind un bun raport calitate-pret. Ajustabilitatea ergonomica si "
+                      "tehnologiile de confort vizual sunt puncte forte importante.", "normal"],
+        ["spacer", 30],
+        ["paragraph", FOOTER, "footer"],
+    ]
+    return _report(blocks)
+
+
+# Content address of a report description
+def report_key(report):
+    canonical = json.dumps(report, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# Render a report description with ReportLab and return the PDF bytes.
+# Depends only on its argument, so it can run in a worker process.
+def render_report(report):
+    try:
+        return _render_report(report)
+    except ReportError:
+        raise
+    except Exception as e:
+        raise ReportError(f"Raportul PDF nu a putut fi generat: {e}") from None
+
+
+def _render_report(report):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+
+    styles = paragraph_styles()
+    templates = table_styles()
+    elements = []
+    for block in report["blocks"]:
+        kind = block[0]
+        if kind == "paragraph":
+            elements.append(Paragraph(escape(str(block[1])), styles[block[2]]))
+        elif kind == "timestamp":
+            text = block[1].format(date=time.strftime('%d-%m-%Y %H:%M:%S'))
+            elements.append(Paragraph(escape(text), styles[block[2]]))
+        elif kind == "spacer":
+            elements.append(Spacer(1, block[1]))
+        elif kind == "table":
+            table = Table(block[1], colWidths=block[3])
+            table.setStyle(templates[block[2]])
+            elements.append(table)
+        else:
+            raise ReportError(f"Unknown report block: {kind}")
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(elements)
+    return buffer.getvalue()
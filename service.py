@@ -0,0 +1,785 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+import profiler
+from cache import DiskCache
+from catalog import CatalogStore, CATALOG_PATH
+from clients import Clients
+from domain_policy import DomainPolicy, DOMAIN_POLICY_PATH
+from exports import monitor_tables
+from jobs import current_job
+from price_history import PriceHistory, PriceTracker, PRICE_HISTORY_DIR
+from query_compiler import compile_query, finalize_query, rewrite_differs, strip_operators, SERPER_PARAMS
+from ranking import rank_catalog, RANKING_CRITERIA, PRICE_CRITERION, RANK_TOP_K
+from ratelimit import (TokenBucket, SingleFlight, SERPER_RATE, SERPER_BURST, GEMINI_RATE, GEMINI_BURST,
+                       RATE_LIMIT_PAUSE, RATE_LIMIT_MAX_WAIT)
+from reports import analysis_report, report_key, spec_report, ANALYSIS_SECTION_KEYS
+from shop_index import ShopIndex, SHOP_INDEX_MIN_HITS, SHOP_INDEX_PATH, domain_allowed, url_domain
+
+# Gemini model used for analyses and query optimization
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Maximum number of concurrent Serper requests in fan-out mode (process-wide)
+SEARCH_FANOUT_WORKERS = int(os.getenv("SEARCH_FANOUT_WORKERS", "8"))
+
+# Analysis types and the focus each one adds to the Gemini prompt
+ANALYSIS_CONTEXTS = {
+    "Analiză generală": "",
+    "Comparație pentru gaming": "Concentrează-te pe aspectele importante pentru gaming: rata de refresh, timpul de "
+                                "răspuns, tehnologiile adaptive sync.",
+    "Recomandare pentru productivitate": "Concentrează-te pe aspectele importante pentru productivitate: rezoluție, "
+                                         "dimensiune, ergonomie, conectivitate.",
+    "Raport calitate-preț": "Evaluează raportul calitate-preț și oferă recomandări de monitoare cu specificații "
+                            "similare la prețuri competitive.",
+}
+
+
+# Ranking weights of each analysis type. The best catalog entries under
+# them are the shortlist Gemini picks its recommendations from.
+ANALYSIS_WEIGHTS = {
+    "Analiză generală": dict.fromkeys(RANKING_CRITERIA, 1),
+    "Comparație pentru gaming": {"Rata refresh": 5, "Timp de raspuns tipic": 4, "Luminozitate": 2,
+                                 "Raport de contrast static": 1},
+    "Recomandare pentru productivitate": {"Rezolutie": 4, "Inaltime ajustabila": 3, "Conectivitate": 3,
+                                          "Diagonala ecran": 2, "Pivotare": 2, "Garantie produs": 1},
+    "Raport calitate-preț": {PRICE_CRITERION: 5, "Rezolutie": 2, "Garantie produs": 2, "Rata refresh": 1,
+                             "Luminozitate": 1},
+}
+
+# Catalog entries offered to Gemini for recommendations
+ANALYSIS_SHORTLIST = int(os.getenv("ANALYSIS_SHORTLIST", "5"))
+
+# Structured analyses asked from Gemini at once (each is one JSON-schema call)
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+
+# What each section of a structured analysis holds (reports.ANALYSIS_SECTION_KEYS)
+ANALYSIS_SECTION_PROMPTS = {
+    "caracteristici": "Cele mai importante caracteristici",
+    "avantaje": "Avantajele acestor specificatii",
+    "utilizari": "Potentiale utilizari recomandate (gaming, design, office, etc.)",
+    "recomandari": "Recomandari de produse alese doar din lista scurta, cu motivarea alegerii",
+}
+
+# JSON schema of one structured analysis: one text per section
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {key: {"type": "string"} for key in ANALYSIS_SECTION_KEYS},
+    "required": ANALYSIS_SECTION_KEYS,
+}
+
+# Upstream names shown while a call waits for its rate limit
+UPSTREAM_LABELS = {"serper": "Serper.dev", "gemini": "Gemini"}
+
+
+# Error raised when Serper.dev answers with a non-200 status
+class SearchError(Exception):
+    def __init__(self, status_code, text):
+        super().__init__(f"Serper.dev status {status_code}")
+        self.status_code = status_code
+        self.text = text
+
+
+# Error raised when Gemini's answer is not the requested analysis (invalid
+# JSON, or no text in any section): an upstream failure, not a bad request
+class AnalysisError(Exception):
+    pass
+
+
+# Seconds to wait before calling again according to a 429 answer
+def retry_after(response):
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "")))
+    except ValueError:
+        return RATE_LIMIT_PAUSE
+
+
+# Gemini's quota error (google.api_core ResourceExhausted), recognized by
+# name so that the SDK is not imported to check it
+def gemini_rejected(error):
+    return type(error).__name__ == "ResourceExhausted"
+
+
+# Normalize a result link so the same product found in several queries is shown once
+def result_identity(result):
+    link = result.get("link", "").split("#", 1)[0].split("?", 1)[0]
+    return link.rstrip("/").lower()
+
+
+# Keys of a search selection (see MonitorService.selection_query)
+SELECTION_KEYS = ("categories", "options", "resolution", "panel", "refresh", "response", "features",
+                  "price_range", "shop", "text")
+_SELECTION_LISTS = ("categories", "options", "features")
+
+
+# Check the keys and value types of a search selection, which names at
+# least one category
+def check_selection(selection):
+    unknown = [key for key in selection if key not in SELECTION_KEYS]
+    if unknown:
+        raise ValueError(f"Chei necunoscute în selecție: {', '.join(unknown)}")
+    for key, value in selection.items():
+        if value is None:
+            continue
+        if key in _SELECTION_LISTS:
+            if not isinstance(value, (list, tuple)) or not all(isinstance(item, str) for item in value):
+                raise ValueError(f"'{key}' trebuie să fie o listă de șiruri")
+        elif key == "price_range":
+            if (not isinstance(value, (list, tuple)) or len(value) != 2
+                    or not all(isinstance(bound, (int, float)) and not isinstance(bound, bool) for bound in value)
+                    or value[0] > value[1]):
+                raise ValueError("'price_range' trebuie să fie [minim, maxim], două numere crescătoare")
+        elif not isinstance(value, str):
+            raise ValueError(f"'{key}' trebuie să fie un șir")
+    if not any(category.strip() for category in selection.get("categories") or []):
+        raise ValueError("Selectați cel puțin o categorie de monitor")
+
+
+# Organic results of a Serper answer not seen before, recorded in `seen`
+def new_results(results, seen):
+    fresh = []
+    for result in (results or {}).get("organic", []):
+        identity = result_identity(result)
+        if identity not in seen:
+            seen.add(identity)
+            fresh.append(result)
+    return fresh
+
+
+# Prompt for the Gemini analysis of a set of specifications. Recommendations
+# are picked from a shortlist ranked locally instead of open-ended.
+def analysis_prompt(query, specs_data, shortlist):
+    return f"""
+        Analizeaza urmatoarele specificatii pentru {query}:
+
+        {specs_data}
+
+        Ofera-mi o analiza detaliata care sa includa:
+        1. Cele mai importante caracteristici
+        2. Avantajele acestor specificatii
+        3. Potentiale utilizari recomandate (gaming, design, office, etc.)
+        4. Recomandari de produse alese doar din lista scurta de mai jos, cu motivarea alegerii
+
+        Lista scurta (clasament local dupa specificatii, scor 0-100):
+        {shortlist}
+        """
+
+
+# Prompt for a structured analysis: the same analysis, answered as a JSON
+# object with one field per report section
+def structured_analysis_prompt(query, specs_data, shortlist):
+    fields = "\n        ".join(f"- {key}: {text}" for key, text in ANALYSIS_SECTION_PROMPTS.items())
+    return analysis_prompt(query, specs_data, shortlist) + f"""
+        Raspunde cu un obiect JSON cu campurile de mai jos, fiecare cu textul sectiei
+        (paragrafele separate prin rand liber):
+        {fields}
+        """
+
+
+# Prompt asking for several structured analyses in one call, each answered
+# under its ID (a1, a2, ...)
+def combined_analysis_prompt(prompts):
+    requests = "\n".join(f"=== Analiza {analysis_id} ===\n{prompt}" for analysis_id, prompt in prompts)
+    return f"""
+        Realizeaza separat fiecare dintre analizele de mai jos. Raspunde cu un obiect JSON care are
+        cate un camp pentru fiecare analiza ({", ".join(analysis_id for analysis_id, _ in prompts)}),
+        cu obiectul JSON cerut de acea analiza.
+
+{requests}
+        """
+
+
+# Generation config asking Gemini for JSON matching `schema`
+def json_config(schema):
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+
+# The JSON object of a Gemini answer in JSON mode
+def json_answer(text):
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json").strip()
+    try:
+        answer = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise AnalysisError(f"Gemini nu a răspuns cu JSON valid: {e}") from None
+    if not isinstance(answer, dict):
+        raise AnalysisError("Gemini nu a răspuns cu un obiect JSON")
+    return answer
+
+
+# Sections of a structured analysis answer, every section present; an
+# answer without the text of any section is not an analysis
+def parse_sections(text):
+    answer = json_answer(text)
+    sections = {key: str(answer.get(key) or "").strip() for key in ANALYSIS_SECTION_KEYS}
+    if not any(sections.values()):
+        raise AnalysisError("Gemini a răspuns cu o analiză goală")
+    return sections
+
+
+# One line per ranked entry: name, score and the values of the weighted criteria
+def shortlist_text(table):
+    return "\n        ".join(
+        f"{position}. {row['Monitor']} (scor {row['Scor']:.0f}): "
+        + "; ".join(f"{criterion}: {row[criterion]}" for criterion in table.columns[2:])
+        for position, row in enumerate(table.to_dict("records"), start=1)
+    )
+
+
+# Prompt asking Gemini to optimize a compiled search query
+def enhance_prompt(query):
+    return f"""
+    Optimizează următoarea interogare de căutare pentru a găsi monitoare care îndeplinesc aceste specificații:
+    {query}
+
+    Returnează doar interogarea optimizată, fără explicații suplimentare.
+    """
+
+
+# On-disk cache namespace whose lifetime and size come from
+# <PREFIX>_CACHE_TTL and <PREFIX>_CACHE_MAX_BYTES
+def _disk_cache(namespace, prefix, ttl, max_bytes):
+    return DiskCache(
+        namespace,
+        ttl=int(os.getenv(f"{prefix}_CACHE_TTL", str(ttl))),
+        max_bytes=int(os.getenv(f"{prefix}_CACHE_MAX_BYTES", str(max_bytes))),
+    )
+
+
+# Search, comparison, analysis and report logic shared by the Streamlit UI
+# and the JSON API. One instance per process holds the pooled upstream
+# clients, the on-disk caches (shared by every process using CACHE_DIR),
+# the catalog, the domain policy, the local shop index, the price history,
+# the search executor and the per-upstream rate limits; identical concurrent upstream calls are
+# coalesced into one. Nothing here makes Streamlit calls, so every method can run in
+# worker threads.
+class MonitorService:
+    def __init__(self, serper_api_key=None, gemini_api_key=None, catalog_path=CATALOG_PATH,
+                 domain_policy_path=DOMAIN_POLICY_PATH, shop_index_path=SHOP_INDEX_PATH,
+                 search_workers=SEARCH_FANOUT_WORKERS, price_history_dir=PRICE_HISTORY_DIR,
+                 index_min_hits=SHOP_INDEX_MIN_HITS):
+        self.clients = Clients(serper_api_key=serper_api_key, gemini_api_key=gemini_api_key)
+        self.search_cache = _disk_cache("search", "SEARCH", 6 * 3600, 50 * 1024 * 1024)
+        self.gemini_cache = _disk_cache("gemini", "GEMINI", 86400, 20 * 1024 * 1024)
+        self.report_cache = _disk_cache("reports", "REPORT", 7 * 86400, 100 * 1024 * 1024)
+        self.catalog_store = CatalogStore(catalog_path)
+        self.domain_policy = DomainPolicy.from_file(domain_policy_path)
+        self.shop_index = ShopIndex(shop_index_path)
+        self.index_min_hits = index_min_hits
+        self.price_history = PriceHistory(price_history_dir)
+        self.price_tracker = PriceTracker(self.price_history, self.clients.session)
+        self.search_executor = ThreadPoolExecutor(max_workers=search_workers, thread_name_prefix="shop-search")
+        self.limits = {"serper": TokenBucket(SERPER_RATE, SERPER_BURST), "gemini": TokenBucket(GEMINI_RATE, GEMINI_BURST)}
+        self.flights = {"serper": SingleFlight(), "gemini": SingleFlight()}
+
+    # Current catalog (reloaded when its file changes)
+    @property
+    def catalog(self):
+        return self.catalog_store.get()
+
+    # Online shops offered for restriction and searched individually in fan-out mode
+    @property
+    def shops(self):
+        return self.domain_policy.shops
+
+    # Watch the price of a product page of one of the shops
+    def watch_price(self, url, title=None):
+        url = url.strip()
+        domain = url_domain(url)
+        if not url.startswith(("http://", "https://")) or not domain_allowed(domain, self.shops):
+            raise ValueError(f"Adresa nu este o pagină a unui magazin din listă ({', '.join(self.shops)}): {url}")
+        self.price_history.watch(url, domain, title)
+
+    # Seconds `count` calls to an upstream made now would wait for its rate limit
+    def upstream_wait(self, upstream, count=1):
+        return self.limits[upstream].estimate(count)
+
+    # Wait for the rate limit of an upstream. A background job shows the
+    # wait in its status instead of failing.
+    def _throttle(self, upstream):
+        wait = self.limits[upstream].reserve()
+        if wait <= 0:
+            return
+        job = current_job()
+        if job is not None:
+            job.throttled = (UPSTREAM_LABELS[upstream], time.time() + wait)
+        try:
+            with profiler.span(f"{UPSTREAM_LABELS[upstream]} · limită de rată"):
+                time.sleep(wait)
+        finally:
+            if job is not None:
+                job.throttled = None
+
+    # Call Gemini within its rate limit; a quota rejection pauses the limit
+    # and requeues the call for up to RATE_LIMIT_MAX_WAIT seconds
+    def _gemini_call(self, call):
+        deadline = time.monotonic() + RATE_LIMIT_MAX_WAIT
+        while True:
+            self._throttle("gemini")
+            try:
+                return call()
+            except Exception as e:
+                if not gemini_rejected(e) or time.monotonic() >= deadline:
+                    raise
+                self.limits["gemini"].pause(RATE_LIMIT_PAUSE)
+
+    # Content address of a Gemini answer: model, prompt hash and generation config
+    @staticmethod
+    def gemini_cache_key(prompt, model_name=GEMINI_MODEL, generation_config=None):
+        return json.dumps({
+            "model": model_name,
+            "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+            "config": generation_config or {},
+        }, sort_keys=True)
+
+    def store_gemini_answer(self, cache_key, model_name, prompt, text):
+        label = f"[{model_name}] " + " ".join(prompt.split())[:300]
+        self.gemini_cache.set(cache_key, {"model": model_name, "prompt": prompt, "text": text}, label=label)
+
+    # Call Gemini with content-addressed memoization; concurrent identical
+    # calls share one request. Returns the answer text and whether it was
+    # served from the cache.
+    def gemini_generate(self, prompt, model_name=GEMINI_MODEL, generation_config=None, use_cache=True):
+        cache_key = self.gemini_cache_key(prompt, model_name, generation_config)
+        if use_cache:
+            cached_answer = self.gemini_cache.get(cache_key)
+            if cached_answer is not None:
+                return cached_answer["text"], True
+
+        def request():
+            with profiler.span("Gemini"):
+                return model.generate_content(prompt).text
+
+        def generate():
+            text = self._gemini_call(request)
+            self.store_gemini_answer(cache_key, model_name, prompt, text)
+            return text
+
+        model = self.clients.gemini_model(model_name, generation_config)
+
+        text, _ = self.flights["gemini"].do(cache_key, generate)
+        return text, False
+
+    # Stream a Gemini answer chunk by chunk.
+    # A cached answer, or one already being streamed for another caller, is
+    # yielded as a single chunk; a streamed one is cached once complete.
+    # `stats`, if given, receives "cached", "first_chunk" and "total"
+    # (seconds since the call).
+    def gemini_stream(self, prompt, model_name=GEMINI_MODEL, generation_config=None, use_cache=True, stats=None):
+        stats = stats if stats is not None else {}
+        started = time.perf_counter()
+        cache_key = self.gemini_cache_key(prompt, model_name, generation_config)
+        if use_cache:
+            cached_answer = self.gemini_cache.get(cache_key)
+            if cached_answer is not None:
+                stats.update(cached=True, first_chunk=time.perf_counter() - started)
+                yield cached_answer["text"]
+                stats["total"] = time.perf_counter() - started
+                return
+
+        stats["cached"] = False
+        flight, leader = self.flights["gemini"].join(cache_key)
+        if not leader:
+            with profiler.span("Gemini (partajat)"):
+                text = flight.result()
+            stats.update(first_chunk=time.perf_counter() - started, total=time.perf_counter() - started)
+            yield text
+            return
+
+        try:
+            model = self.clients.gemini_model(model_name, generation_config)
+
+            # The quota error surfaces with the first chunk
+            def open_stream():
+                chunks = iter(model.generate_content(prompt, stream=True))
+                return chunks, next(chunks, None)
+
+            chunks, first = self._gemini_call(open_stream)
+            parts = []
+            if first is not None:
+                stats["first_chunk"] = time.perf_counter() - started
+                parts.append(first.text)
+                yield first.text
+            for chunk in chunks:
+                parts.append(chunk.text)
+                yield chunk.text
+            stats["total"] = time.perf_counter() - started
+            profiler.record("Gemini (stream)", stats["total"])
+            text = "".join(parts)
+            self.store_gemini_answer(cache_key, model_name, prompt, text)
+        except BaseException as e:
+            # A consumer that stops reading early, or a failed cache write,
+            # ends the call for its followers too
+            self.flights["gemini"].finish(cache_key, error=e if isinstance(e, Exception) else
+                                          RuntimeError("Răspunsul Gemini a fost întrerupt"))
+            raise
+        self.flights["gemini"].finish(cache_key, text)
+
+    # Google search using Serper.dev; returns the results and whether they were cached.
+    # Concurrent identical searches share one request.
+    def serper_search(self, query, use_cache=True):
+        # Canonical query with site restrictions; language/country go as parameters
+        query = finalize_query(query, self.domain_policy)
+        payload = {"q": query, **SERPER_PARAMS}
+        cache_key = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+
+        # Serve repeated queries from the shared cache unless bypassed
+        if use_cache:
+            cached_results = self.search_cache.get(cache_key)
+            if cached_results is not None:
+                return cached_results, True
+
+        results, _ = self.flights["serper"].do(cache_key, lambda: self._serper_request(query, payload, cache_key))
+        return results, False
+
+    # One Serper.dev request within its rate limit. A 429 answer pauses the
+    # limit and requeues the request for up to RATE_LIMIT_MAX_WAIT seconds.
+    def _serper_request(self, query, payload, cache_key):
+        deadline = time.monotonic() + RATE_LIMIT_MAX_WAIT
+        while True:
+            self._throttle("serper")
+            with profiler.span("Serper.dev"):
+                response = self.clients.serper_search(payload)
+            if response.status_code != 429 or time.monotonic() >= deadline:
+                break
+            self.limits["serper"].pause(retry_after(response))
+        if response.status_code != 200:
+            raise SearchError(response.status_code, response.text)
+
+        # Filter results to only include allowed (Romanian) domains
+        results = response.json()
+        if "organic" in results:
+            results["organic"] = self.domain_policy.filter_results(results["organic"])
+
+        self.search_cache.set(cache_key, results, label=query)
+        return results
+
+    # Search every shop concurrently. Yields (shop, results, error, elapsed
+    # seconds) in completion order so the caller can render each shop as
+    # soon as its response lands.
+    def fan_out_search(self, query, shops, use_cache=True):
+        base_query = strip_operators(query)
+        started = time.perf_counter()
+
+        search = profiler.bind(self.serper_search, profiler.current())
+        futures = {self.search_executor.submit(search, f"{base_query} site:{shop}", use_cache): shop for shop in shops}
+        for future in as_completed(futures):
+            shop = futures[future]
+            try:
+                results, _ = future.result()
+                yield shop, results, None, time.perf_counter() - started
+            except Exception as e:
+                yield shop, None, e, time.perf_counter() - started
+
+    # Ask Gemini to optimize a compiled query. The prompt depends only on
+    # the canonical query, so the Gemini answer cache holds one rewrite per
+    # canonical input and repeats skip the optimizer.
+    def enhance_query(self, query, use_cache=True):
+        enhanced_query, cached = self.gemini_generate(enhance_prompt(query), use_cache=use_cache)
+        return enhanced_query.strip(), cached
+
+    # Search job: runs the compiled queries and merges their results. Gemini can
+    # optimize the primary query first ("sequential") or while the raw queries
+    # run ("speculative"); in speculative mode the raw results are published as
+    # job progress as soon as they land, and the optimized query is searched only
+    # if it differs meaningfully, contributing only new results.
+    def search_task(self, queries, use_cache=True, optimize=None):
+        job = current_job()
+        outcome = {"results": [], "extra": [], "cached": True, "enhanced_query": None, "enhanced_cached": False,
+                   "enhance_error": None, "extra_error": None, "rewrite_searched": False}
+        seen_results = set()
+
+        def unique(results):
+            return new_results(results, seen_results)
+
+        def enhance(future=None):
+            try:
+                enhanced_query, cached = future.result() if future else self.enhance_query(queries[0])
+                outcome.update(enhanced_query=enhanced_query or None, enhanced_cached=cached)
+            except Exception as e:
+                outcome["enhance_error"] = str(e)
+
+        if optimize == "sequential":
+            enhance()
+            if outcome["enhanced_query"]:
+                queries = [outcome["enhanced_query"]]
+
+        profile = profiler.current()
+        enhancement = self.search_executor.submit(profiler.bind(self.enhance_query, profile), queries[0]) \
+            if optimize == "speculative" else None
+        search = profiler.bind(self.serper_search, profile)
+        searches = [self.search_executor.submit(search, query, use_cache) for query in queries]
+        try:
+            for future in searches:
+                results, cached = future.result()
+                outcome["cached"] = outcome["cached"] and cached
+                outcome["results"].extend(unique(results))
+        except Exception:
+            if enhancement is not None:
+                enhancement.cancel()
+            raise
+
+        if enhancement is None:
+            return outcome
+
+        if job is not None:
+            job.progress = dict(outcome)
+        enhance(enhancement)
+        if outcome["enhanced_query"] and rewrite_differs(queries[0], outcome["enhanced_query"]):
+            outcome["rewrite_searched"] = True
+            try:
+                results, _ = self.serper_search(outcome["enhanced_query"], use_cache)
+                outcome["extra"] = unique(results)
+            except Exception as e:
+                outcome["extra_error"] = str(e)
+        return outcome
+
+    # Fan-out search job: the query, optimized by Gemini first when optimize
+    # is set, searched in every shop concurrently. Each shop's new results
+    # are published as job progress as soon as its response lands.
+    def fan_out_task(self, query, shops, use_cache=True, optimize=None):
+        job = current_job()
+        outcome = {"results": [], "shops": [], "enhanced_query": None, "enhanced_cached": False,
+                   "enhance_error": None}
+        if optimize:
+            try:
+                enhanced_query, cached = self.enhance_query(query)
+                outcome.update(enhanced_query=enhanced_query or None, enhanced_cached=cached)
+                query = enhanced_query or query
+            except Exception as e:
+                outcome["enhance_error"] = str(e)
+
+        seen_results = set()
+        for shop, results, error, elapsed in self.fan_out_search(query, shops, use_cache):
+            fresh = new_results(results, seen_results) if error is None else []
+            outcome["shops"].append({"shop": shop, "results": fresh, "error": None if error is None else str(error),
+                                     "seconds": elapsed})
+            outcome["results"].extend(fresh)
+            if job is not None:
+                job.progress = {**outcome, "shops": list(outcome["shops"])}
+        return outcome
+
+    def _check_categories(self, categories):
+        unknown = [category for category in categories if category not in self.catalog.specs]
+        if unknown:
+            raise ValueError(f"Categorii necunoscute: {', '.join(unknown)}")
+
+    # Compile a search selection into canonical Serper queries. Keys of
+    # `selection`: categories and options (catalog spec names), resolution
+    # (e.g. "Full HD (1920x1080)"), panel, refresh, response, features,
+    # price_range [low, high], shop and text; missing or None means "any".
+    def selection_query(self, selection):
+        check_selection(selection)
+        categories = list(selection.get("categories") or [])
+        options = list(selection.get("options") or [])
+        self._check_categories(categories)
+        specs = self.catalog.specs
+        resolution = selection.get("resolution")
+        return compile_query({
+            "categories": categories,
+            "specs": [specs[category][option] for category in categories
+                      for option in options if option in specs[category]],
+            "resolution": resolution.split(" (")[0] if resolution else None,
+            "panel": selection.get("panel"),
+            "refresh": selection.get("refresh"),
+            "response": selection.get("response"),
+            "features": selection.get("features") or [],
+            "price_range": tuple(selection["price_range"]) if selection.get("price_range") else None,
+            "shop": selection.get("shop"),
+            "text": selection.get("text") or "",
+        }, self.domain_policy)
+
+    # Search for a selection: the local shop index first (unless bypassing
+    # the cache) when it has at least index_min_hits fresh listings, then
+    # Serper.dev through search_task(), or one search per
+    # shop of `fan_out` through fan_out_task() when no shop is selected
+    def search(self, selection, use_cache=True, optimize=None, fan_out=None):
+        compiled = self.selection_query(selection)
+        response = {"query": compiled.queries[0], "queries": compiled.queries}
+        if use_cache:
+            shop = selection.get("shop")
+            index_results = self.shop_index.search(
+                compiled.keywords,
+                shops=[shop] if shop else self.shops,
+                price_range=tuple(selection["price_range"]) if selection.get("price_range") else None,
+            )
+            if index_results and len(index_results) >= self.index_min_hits:
+                return {**response, "source": "index", "results": index_results}
+        if fan_out and not selection.get("shop"):
+            return {**response, "source": "fan_out",
+                    **self.fan_out_task(compiled.queries[0], list(fan_out), use_cache, optimize)}
+        return {**response, "source": "serper", **self.search_task(compiled.queries, use_cache, optimize)}
+
+    # Comparison table: one row per spec, one column per category ("N/A"
+    # where a category does not list the spec)
+    def comparison(self, categories, spec_names):
+        self._check_categories(categories)
+        specs = self.catalog.specs
+        rows = [[spec] + [specs[category].get(spec, "N/A") for category in categories] for spec in spec_names]
+        return pd.DataFrame(rows, columns=["Specificație"] + list(categories))
+
+    # The compared categories as export tables, a row per monitor with the
+    # texts and typed columns of its specs
+    def comparison_tables(self, categories, spec_names):
+        self._check_categories(categories)
+        return monitor_tables(self.catalog, categories, spec_names)
+
+    # The `k` catalog entries best matching weights per ranking criterion,
+    # best first, with their score (0-100)
+    def rank(self, weights, k=RANK_TOP_K):
+        unknown = [criterion for criterion in weights if criterion not in RANKING_CRITERIA]
+        if unknown:
+            raise ValueError(f"Criterii de clasament necunoscute: {', '.join(unknown)}")
+        if any(not isinstance(weight, (int, float)) or weight < 0 for weight in weights.values()):
+            raise ValueError("Ponderile trebuie să fie numere pozitive")
+        return rank_catalog(self.catalog.frame, weights, k)
+
+    # Ranked rows as a table: monitor, score and the catalog text of each
+    # weighted criterion
+    def ranking_table(self, ranked, weights):
+        catalog = self.catalog
+        table = pd.DataFrame({"Monitor": ranked.index, "Scor": ranked["score"].round(1).to_numpy()})
+        for criterion, weight in weights.items():
+            if not weight:
+                continue
+            if criterion == PRICE_CRITERION:
+                prices = [catalog.monitors[name].get("price") for name in ranked.index]
+                table[criterion] = [f"{price} lei" if price else "N/A" for price in prices]
+            else:
+                table[criterion] = [catalog.specs[name].get(criterion, "N/A") for name in ranked.index]
+        return table
+
+    # Shortlist of an analysis type, as ranked catalog rows
+    def shortlist(self, analysis_type, k=ANALYSIS_SHORTLIST):
+        return self.rank(ANALYSIS_WEIGHTS[analysis_type], k)
+
+    # Specifications text and prompt of a Gemini analysis
+    def analysis_request(self, categories, options, analysis_type="Analiză generală", structured=False):
+        self._check_categories(categories)
+        if analysis_type not in ANALYSIS_CONTEXTS:
+            raise ValueError(f"Tip de analiză necunoscut: {analysis_type}")
+        specs = self.catalog.specs
+        specs_data = ""
+        for category in categories:
+            specs_data += f"\n\n{category}:\n"
+            for option in options:
+                if option in specs[category]:
+                    specs_data += f"- {option}: {specs[category][option]}\n"
+
+        weights = ANALYSIS_WEIGHTS[analysis_type]
+        shortlist = shortlist_text(self.ranking_table(self.shortlist(analysis_type), weights))
+        build_prompt = structured_analysis_prompt if structured else analysis_prompt
+        prompt = build_prompt(f"{analysis_type} pentru {', '.join(categories)}",
+                              specs_data + "\n" + ANALYSIS_CONTEXTS[analysis_type], shortlist)
+        return specs_data, prompt
+
+    # Analysis job: asks Gemini for the analysis. In streaming mode the text
+    # received so far is published as job progress.
+    def analysis_task(self, prompt, use_cache=True, stream=True):
+        if not stream:
+            text, cached = self.gemini_generate(prompt, use_cache=use_cache)
+            return {"text": text, "cached": cached}
+
+        job = current_job()
+        stats = {}
+        parts = []
+        for chunk in self.gemini_stream(prompt, use_cache=use_cache, stats=stats):
+            parts.append(chunk)
+            if job is not None:
+                job.progress = "".join(parts)
+        return {"text": "".join(parts), **stats}
+
+    # Structured analyses of several (analysis type, categories) requests of
+    # the same options, each a dict of report sections. Every analysis is a
+    # JSON-schema answer cached on its own, so a request shared with an
+    # earlier batch is not asked again. The missing ones are asked for
+    # concurrently, or all in one call with single_call; analyses missing
+    # from the answer of that call are then asked on their own. Returns
+    # (sections, cached) pairs in request order; the job progress lists the
+    # analyses finished so far.
+    def structured_analyses(self, requests, options, use_cache=True, single_call=False):
+        prompts = [self.analysis_request(categories, options, analysis_type, structured=True)[1]
+                   for analysis_type, categories in requests]
+        config = json_config(ANALYSIS_SCHEMA)
+        keys = [self.gemini_cache_key(prompt, GEMINI_MODEL, config) for prompt in prompts]
+        job = current_job()
+        outcomes = [None] * len(prompts)
+
+        def finished(position, sections, cached):
+            outcomes[position] = (sections, cached)
+            if job is not None:
+                job.progress = [(requests[index], outcome) for index, outcome in enumerate(outcomes) if outcome]
+
+        def parsed(key, text):
+            try:
+                return parse_sections(text)
+            except AnalysisError:
+                self.gemini_cache.invalidate(key)
+                raise
+
+        missing = list(range(len(prompts)))
+        if single_call and use_cache:
+            for position, key in enumerate(keys):
+                cached_answer = self.gemini_cache.get(key)
+                if cached_answer is None:
+                    continue
+                try:
+                    finished(position, parsed(key, cached_answer["text"]), True)
+                except AnalysisError:
+                    continue
+            missing = [position for position in missing if outcomes[position] is None]
+
+        if single_call and len(missing) > 1:
+            ids = {f"a{number}": position for number, position in enumerate(missing, start=1)}
+            schema = {"type": "object", "properties": dict.fromkeys(ids, ANALYSIS_SCHEMA), "required": list(ids)}
+            model = self.clients.gemini_model(GEMINI_MODEL, json_config(schema))
+            prompt = combined_analysis_prompt([(analysis_id, prompts[position]) for analysis_id, position in ids.items()])
+
+            def request():
+                with profiler.span("Gemini"):
+                    return model.generate_content(prompt).text
+
+            answers = json_answer(self._gemini_call(request))
+            for analysis_id, position in ids.items():
+                text = json.dumps(answers.get(analysis_id), ensure_ascii=False)
+                try:
+                    sections = parse_sections(text)
+                except AnalysisError:
+                    continue
+                self.store_gemini_answer(keys[position], GEMINI_MODEL, prompts[position], text)
+                finished(position, sections, False)
+            missing = [position for position in missing if outcomes[position] is None]
+            if not missing:
+                return outcomes
+
+        generate = profiler.bind(self.gemini_generate, profiler.current())
+        with ThreadPoolExecutor(max_workers=max(1, min(ANALYSIS_WORKERS, len(missing))),
+                                thread_name_prefix="analysis") as executor:
+            futures = {executor.submit(generate, prompts[position], GEMINI_MODEL, config, use_cache): position
+                       for position in missing}
+            for future in as_completed(futures):
+                position = futures[future]
+                text, cached = future.result()
+                finished(position, parsed(keys[position], text), cached)
+        return outcomes
+
+    # Report description of a selection: its specifications, or the given
+    # Gemini analysis followed by the analysed specifications
+    def report(self, categories, options, analysis=None):
+        self._check_categories(categories)
+        if analysis is None:
+            return spec_report(categories, options, self.catalog.specs)
+        return analysis_report(analysis, categories, options, self.catalog.specs)
+
+    # PDF of a report description if it was rendered before, else None
+    def cached_report(self, report):
+        with profiler.span("PDF · cache"):
+            return self.report_cache.get_bytes(report_key(report))
+
+    def store_report(self, report, pdf):
+        self.report_cache.set_bytes(report_key(report), pdf, label=report["blocks"][0][1])
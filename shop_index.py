@@ -0,0 +1,415 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from urllib.parse import urljoin, urlsplit
+
+from cache import CACHE_DIR
+from domain_policy import DomainPolicy, DOMAIN_POLICY_PATH
+
+# On-disk inverted index of shop product listings
+SHOP_INDEX_PATH = os.getenv("SHOP_INDEX_PATH", os.path.join(CACHE_DIR, "shop_index.sqlite3"))
+
+# Listings older than this many seconds are stale and trigger a web search
+SHOP_INDEX_MAX_AGE = int(os.getenv("SHOP_INDEX_MAX_AGE", str(3 * 24 * 3600)))
+
+# Fresh listings a search needs from the index to be answered without a web
+# search (a few matching pages fed in by enrichment are not enough)
+SHOP_INDEX_MIN_HITS = int(os.getenv("SHOP_INDEX_MIN_HITS", "5"))
+
+# Words that carry no meaning for product matching
+STOPWORDS = {
+    "si", "sau", "or", "and", "de", "la", "cu", "pentru", "in", "din", "pe", "un", "o", "the",
+    "pret", "ron", "lei", "minim", "site", "lr", "lang",
+}
+
+_PRICE = re.compile(
+    r"(\d{1,3}(?:[.\s]\d{3})+(?:,\d{1,2})?|\d+(?:[.,]\d{1,2})?)\s*(?:lei|ron)\b",
+    re.IGNORECASE,
+)
+
+
+# Lowercase, strip Romanian diacritics and split into alphanumeric terms
+def tokenize(text):
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return [token for token in re.findall(r"[a-z]+|[0-9]+", text) if token not in STOPWORDS]
+
+
+_OR_GROUP = re.compile(r"\(([^()]*)\)")
+
+
+# Terms of a query that every listing should have, and its OR groups
+# ("(Monitor 24 inch OR Monitor 27 inch)"), each a list of the term lists of
+# its alternatives
+def parse_query(query):
+    groups = []
+
+    def group(match):
+        alternatives = [terms for terms in (tokenize(part) for part in re.split(r"\s+OR\s+", match.group(1))) if terms]
+        if alternatives:
+            groups.append(alternatives)
+        return " "
+
+    common = tokenize(_OR_GROUP.sub(group, str(query)))
+    return list(dict.fromkeys(common)), groups
+
+
+# Parse a Romanian price ("1.299,99 lei", "1299 RON") into a float
+def parse_price(text):
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    text = str(text)
+    match = _PRICE.search(text)
+    number = match.group(1) if match else re.sub(r"[^\d.,]", "", text)
+    if not number:
+        return None
+    number = re.sub(r"\s", "", number)
+    if "," in number:
+        number = number.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"\d{1,3}(?:\.\d{3})+", number):
+        number = number.replace(".", "")
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def _json_ld_products(soup):
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+        nodes = data if isinstance(data, list) else data.get("@graph", [data]) if isinstance(data, dict) else []
+        for node in nodes:
+            if isinstance(node, dict) and "product" in str(node.get("@type", "")).lower():
+                yield node
+
+
+# Extract title, price and specs from a product page
+def extract_product(html, url=None):
+    from bs4 import BeautifulSoup  # imported on first use to keep app start-up fast
+
+    soup = BeautifulSoup(html, "html.parser")
+    product = {"url": url, "title": None, "price": None, "currency": "RON", "specs": {}}
+
+    canonical = soup.find("link", rel="canonical") or soup.find("meta", property="og:url")
+    if canonical is not None:
+        href = canonical.get("href") or canonical.get("content")
+        if href:
+            product["url"] = urljoin(url or "", href)
+
+    for node in _json_ld_products(soup):
+        product["title"] = product["title"] or node.get("name")
+        offers = node.get("offers") or {}
+        if isinstance(offers, list):
+            offers = offers[0] if offers else {}
+        price = offers.get("price") or offers.get("lowPrice")
+        if price is not None and product["price"] is None:
+            product["price"] = parse_price(price)
+            product["currency"] = offers.get("priceCurrency") or product["currency"]
+        for prop in node.get("additionalProperty") or []:
+            if isinstance(prop, dict) and prop.get("name"):
+                product["specs"][str(prop["name"]).strip()] = str(prop.get("value", "")).strip()
+
+    if not product["title"]:
+        og_title = soup.find("meta", property="og:title")
+        heading = soup.find("h1")
+        if og_title is not None and og_title.get("content"):
+            product["title"] = og_title["content"].strip()
+        elif heading is not None:
+            product["title"] = heading.get_text(" ", strip=True)
+        elif soup.title is not None:
+            product["title"] = soup.title.get_text(" ", strip=True)
+
+    if product["price"] is None:
+        meta_price = soup.find("meta", property="product:price:amount") or soup.find(itemprop="price")
+        if meta_price is not None:
+            product["price"] = parse_price(meta_price.get("content") or meta_price.get_text(" ", strip=True))
+    if product["price"] is None:
+        for element in soup.find_all(class_=re.compile("price", re.IGNORECASE), limit=20):
+            price = parse_price(element.get_text(" ", strip=True))
+            if price:
+                product["price"] = price
+                break
+
+    # Spec tables (two-cell rows) and definition lists
+    if not product["specs"]:
+        for row in soup.select("table tr"):
+            cells = row.find_all(["th", "td"])
+            if len(cells) == 2:
+                key, value = (cell.get_text(" ", strip=True) for cell in cells)
+                if key and value:
+                    product["specs"][key] = value
+        for term in soup.find_all("dt"):
+            definition = term.find_next_sibling("dd")
+            if definition is not None:
+                product["specs"][term.get_text(" ", strip=True)] = definition.get_text(" ", strip=True)
+    product["specs"] = dict(list(product["specs"].items())[:50])
+    return product
+
+
+# Hostname of a URL without the leading "www."
+def url_domain(url):
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def domain_allowed(domain, allowed_domains):
+    return any(domain == allowed or domain.endswith("." + allowed) for allowed in allowed_domains)
+
+
+# Whether a listing with the terms `found` matches a parsed query: every
+# numeric term and at least half of the terms, an OR group counting as its
+# best matched alternative among those whose numeric terms are all found
+def _matches(common, groups, found):
+    if not all(term in found for term in common if term.isdigit()):
+        return False
+    expected, hits = len(common), sum(1 for term in common if term in found)
+    for alternatives in groups:
+        best = None
+        for terms in alternatives:
+            if not all(term in found for term in terms if term.isdigit()):
+                continue
+            alternative_hits = sum(1 for term in terms if term in found)
+            if best is None or alternative_hits / len(terms) > best[0] / best[1]:
+                best = (alternative_hits, len(terms))
+        if best is None:
+            return False
+        hits += best[0]
+        expected += best[1]
+    return hits >= math.ceil(expected / 2)
+
+
+# SQLite-backed inverted index: one row per listing plus (term, listing) postings
+class ShopIndex:
+    def __init__(self, path=SHOP_INDEX_PATH, max_age=SHOP_INDEX_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                source TEXT NOT NULL,
+                shop TEXT NOT NULL,
+                title TEXT NOT NULL,
+                price REAL,
+                specs TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                indexed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+            CREATE INDEX IF NOT EXISTS docs_source ON docs (source);
+        """)
+        conn.commit()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # Index one page fetched from (or saved as) `source`. Pages whose raw HTML
+    # did not change since the last ingestion are not parsed again, only their
+    # timestamp is refreshed. Returns "added", "updated", "unchanged" or "skipped".
+    def ingest_html(self, source, html, allowed_domains=None):
+        content_hash = hashlib.sha256(html.encode("utf-8", errors="replace")).hexdigest()
+        conn = self._connect()
+        now = time.time()
+        known = conn.execute("SELECT id, content_hash FROM docs WHERE source = ?", (source,)).fetchone()
+        if known is not None and known[1] == content_hash:
+            conn.execute("UPDATE docs SET indexed_at = ? WHERE id = ?", (now, known[0]))
+            conn.commit()
+            return "unchanged"
+
+        product = extract_product(html, source)
+        url = product["url"] or source
+        shop = url_domain(url or "")
+        # Listings of this page under another URL (its canonical link changed)
+        # or that it no longer yields are dropped
+        stale = [doc_id for doc_id, in conn.execute("SELECT id FROM docs WHERE source = ? AND url != ?", (source, url))]
+        skipped = not url or not product["title"] or (allowed_domains and not domain_allowed(shop, allowed_domains))
+        if skipped and known is not None:
+            stale.append(known[0])
+        if stale:
+            with conn:
+                conn.executemany("DELETE FROM postings WHERE doc_id = ?", [(doc_id,) for doc_id in stale])
+                conn.executemany("DELETE FROM docs WHERE id = ?", [(doc_id,) for doc_id in stale])
+        if skipped:
+            return "skipped"
+        existing = conn.execute("SELECT id FROM docs WHERE url = ?", (url,)).fetchone()
+
+        terms = {}
+        for token in tokenize(" ".join([product["title"], shop, *product["specs"].values()])):
+            terms[token] = terms.get(token, 0) + 1
+
+        with conn:
+            if existing is not None:
+                conn.execute("DELETE FROM postings WHERE doc_id = ?", (existing[0],))
+                conn.execute(
+                    "UPDATE docs SET source = ?, shop = ?, title = ?, price = ?, specs = ?, length = ?, "
+                    "content_hash = ?, indexed_at = ? WHERE id = ?",
+                    (source, shop, product["title"], product["price"], json.dumps(product["specs"], ensure_ascii=False),
+                     sum(terms.values()), content_hash, now, existing[0]),
+                )
+                doc_id = existing[0]
+            else:
+                doc_id = conn.execute(
+                    "INSERT INTO docs (url, source, shop, title, price, specs, length, content_hash, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, source, shop, product["title"], product["price"], json.dumps(product["specs"], ensure_ascii=False),
+                     sum(terms.values()), content_hash, now),
+                ).lastrowid
+            conn.executemany(
+                "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                [(term, doc_id, tf) for term, tf in terms.items()],
+            )
+        return "updated" if existing is not None else "added"
+
+    # Ingest saved pages from a directory tree of .html files. The page URL comes
+    # from its canonical link, or from the path as <dir>/<domain>/<path>.html.
+    def ingest_directory(self, directory, allowed_domains=None):
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                if not filename.endswith((".html", ".htm")):
+                    continue
+                path = os.path.join(root, filename)
+                relative = os.path.relpath(path, directory).replace(os.sep, "/")
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    html = f.read()
+                status = self.ingest_html(f"https://{relative}", html, allowed_domains)
+                counts[status] += 1
+        return counts
+
+    # Fetch product pages over HTTP and ingest them
+    def ingest_urls(self, urls, session, allowed_domains=None, timeout=(3.05, 15)):
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+        for url in urls:
+            try:
+                response = session.get(url, timeout=timeout)
+                response.raise_for_status()
+            except Exception:
+                counts["failed"] += 1
+                continue
+            counts[self.ingest_html(response.url or url, response.text, allowed_domains)] += 1
+        return counts
+
+    # Rank listings with BM25 over the query terms. Only fresh listings matching
+    # every numeric term (sizes, Hz, resolutions) and at least half of all terms
+    # are returned; an OR group counts as the alternative a listing matches
+    # best. An empty list is a miss.
+    def search(self, query, shops=None, price_range=None, limit=10):
+        common, groups = parse_query(query)
+        terms = list(dict.fromkeys(common + [term for alternatives in groups for terms in alternatives
+                                             for term in terms]))
+        if not terms:
+            return []
+        conn = self._connect()
+        total_docs, average_length = conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+        if not total_docs:
+            return []
+
+        placeholders = ",".join("?" * len(terms))
+        document_frequency = dict(conn.execute(
+            f"SELECT term, COUNT(*) FROM postings WHERE term IN ({placeholders}) GROUP BY term", terms
+        ).fetchall())
+        if not document_frequency:
+            return []
+
+        rows = conn.execute(
+            f"SELECT p.doc_id, p.term, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc_id "
+            f"WHERE p.term IN ({placeholders}) AND d.indexed_at >= ?",
+            [*terms, time.time() - self.max_age],
+        ).fetchall()
+
+        scores, matched = {}, {}
+        for doc_id, term, tf, length in rows:
+            df = document_frequency[term]
+            idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            norm = tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * length / (average_length or 1)))
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * norm
+            matched.setdefault(doc_id, set()).add(term)
+
+        candidates = [doc_id for doc_id in scores if _matches(common, groups, matched[doc_id])]
+        if not candidates:
+            return []
+        candidates.sort(key=lambda doc_id: (len(matched[doc_id]), scores[doc_id]), reverse=True)
+
+        results = []
+        for doc_id in candidates:
+            url, shop, title, price, specs = conn.execute(
+                "SELECT url, shop, title, price, specs FROM docs WHERE id = ?", (doc_id,)
+            ).fetchone()
+            if shops and not domain_allowed(shop, shops):
+                continue
+            if price_range and price is not None and not price_range[0] <= price <= price_range[1]:
+                continue
+            specs = json.loads(specs)
+            snippet = "; ".join(f"{key}: {value}" for key, value in list(specs.items())[:4])
+            results.append({
+                "title": title,
+                "link": url,
+                "snippet": snippet or shop,
+                "price": price,
+                "shop": shop,
+                "specs": specs,
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    def stats(self):
+        docs, shops = self._connect().execute("SELECT COUNT(*), COUNT(DISTINCT shop) FROM docs").fetchone()
+        return {"listings": docs, "shops": shops}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the local shop listings index")
+    parser.add_argument("--index", default=SHOP_INDEX_PATH, help="index database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="ingest saved HTML pages from a directory")
+    ingest.add_argument("directory")
+    ingest.add_argument("--domains", default=DOMAIN_POLICY_PATH, help="domain policy with the shops to index")
+    search = commands.add_parser("search", help="query the index")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    index = ShopIndex(args.index)
+    if args.command == "ingest":
+        # Only pages of the shops of the domain policy are indexed, as in the app
+        print(json.dumps(index.ingest_directory(args.directory, DomainPolicy.from_file(args.domains).shops)))
+    else:
+        started = time.perf_counter()
+        results = index.search(args.query, limit=args.limit)
+        for result in results:
+            print(f"{result['price'] or '-':>10}  {result['title']}  {result['link']}")
+        print(f"{len(results)} rezultate în {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Catalog spec option holding each typed column's source text
+RESOLUTION_OPTION = "Rezolutie"
+REFRESH_OPTION = "Rata refresh"
+RESPONSE_OPTION = "Timp de raspuns tipic"
+BRIGHTNESS_OPTION = "Luminozitate"
+CONTRAST_OPTION = "Raport de contrast static"
+DIAGONAL_OPTION = "Diagonala ecran"
+PANEL_OPTION = "Tehnologie ecran"
+CONNECTIVITY_OPTION = "Conectivitate"
+HEIGHT_OPTION = "Inaltime ajustabila"
+PIVOT_OPTION = "Pivotare"
+WARRANTY_OPTION = "Garantie produs"
+
+PANEL_TYPES = ("OLED", "IPS", "VA", "TN")
+
+# Regex per special feature of the tab2 filter, matched against all spec text
+FEATURE_PATTERNS = {
+    "Adaptive-Sync": r"adaptive[\s-]?sync",
+    "G-Sync": r"g[\s-]?sync",
+    "FreeSync": r"free[\s-]?sync",
+    "HDR": r"\bhdr",
+    "USB-C": r"usb[\s-]?c\b|type[\s-]?c",
+    "Boxe încorporate": r"boxe|difuzoare|speaker",
+    "VESA": r"\bvesa",
+}
+
+# Port counts extracted from the connectivity text ("1 x HDMI", "USB-C X1", "2xUSB")
+PORT_PATTERNS = {
+    "hdmi_ports": r"(?:(\d+)\s*x\s*)?hdmi(?:\s*x\s*(\d+))?",
+    "displayport_ports": r"(?:(\d+)\s*x\s*)?display\s?port(?:\s*x\s*(\d+))?",
+    "usb_c_ports": r"(?:(\d+)\s*x\s*)?usb[\s-]?c(?:\s*x\s*(\d+))?",
+}
+
+# Names shops give the catalog spec options on their product pages, matched
+# against the start of a spec name without diacritics ("Diagonala",
+# "Rata de refresh", "Tip panou"); a "dinamic" spec (dynamic contrast) is
+# never the static one of the catalog
+SHOP_SPEC_NAMES = {
+    DIAGONAL_OPTION: ("diagonala", "dimensiune ecran", "marime ecran"),
+    RESOLUTION_OPTION: ("rezolutie",),
+    REFRESH_OPTION: ("rata refresh", "rata de refresh", "rata de reimprospatare", "frecventa", "refresh rate"),
+    RESPONSE_OPTION: ("timp de raspuns", "timp raspuns"),
+    BRIGHTNESS_OPTION: ("luminozitate",),
+    CONTRAST_OPTION: ("raport de contrast", "contrast"),
+    PANEL_OPTION: ("tehnologie ecran", "tehnologie panou", "tip panou", "tip ecran", "tip matrice", "panel"),
+    CONNECTIVITY_OPTION: ("conectivitate", "porturi", "interfete", "intrari"),
+    HEIGHT_OPTION: ("inaltime ajustabila", "reglaj inaltime", "ajustare inaltime"),
+    PIVOT_OPTION: ("pivotare", "pivot"),
+    WARRANTY_OPTION: ("garantie",),
+}
+
+_NUMBER = r"(\d+(?:[.,]\d+)?)"
+
+
+# Real catalogs repeat the same spec strings across many SKUs, so each
+# distinct value is parsed once and the result broadcast back by its code.
+def _parse_distinct(series, parse, dtype):
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    parsed = np.array([parse(value) for value in uniques] + [parse(None)], dtype=dtype)
+    return parsed[codes]
+
+
+def _number(series, pattern):
+    regex = re.compile(pattern, re.IGNORECASE)
+
+    def parse(value):
+        match = regex.search(value) if value is not None else None
+        return float(match.group(1).replace(",", ".")) if match else np.nan
+
+    return _parse_distinct(series, parse, np.float64)
+
+
+def _count_ports(series, pattern):
+    regex = re.compile(pattern, re.IGNORECASE)
+
+    def parse(value):
+        if value is None:
+            return 0
+        return sum(int(before or after or 1) for before, after in regex.findall(value))
+
+    return _parse_distinct(series, parse, np.int16)
+
+
+# Parse single free-text values (also used for the tab2 widget labels)
+def parse_hz(text):
+    match = re.search(_NUMBER + r"\s*hz", str(text), re.IGNORECASE)
+    return float(match.group(1).replace(",", ".")) if match else None
+
+
+def parse_ms(text):
+    match = re.search(_NUMBER + r"\+?\s*ms", str(text), re.IGNORECASE)
+    return float(match.group(1).replace(",", ".")) if match else None
+
+
+def parse_resolution(text):
+    match = re.search(r"(\d{3,5})\s*[x×]\s*(\d{3,5})", str(text))
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+# Catalog option a shop spec name stands for, or None
+@lru_cache(maxsize=1024)
+def shop_spec_option(name):
+    text = unicodedata.normalize("NFKD", str(name).lower())
+    text = " ".join(re.findall(r"[a-z0-9]+", "".join(char for char in text if not unicodedata.combining(char))))
+    if "dinamic" in text:
+        return None
+    for option, names in SHOP_SPEC_NAMES.items():
+        if any(text == prefix or text.startswith(prefix + " ") for prefix in names):
+            return option
+    return None
+
+
+# Specs of a product page under the catalog option names where the shop's
+# name is known, so they parse into the typed columns; other specs are kept
+# as they are (they still count for the special features)
+def catalog_specs(specs):
+    mapped = {}
+    for name, value in specs.items():
+        option = name if name in SHOP_SPEC_NAMES else shop_spec_option(name)
+        if option is None:
+            mapped.setdefault(name, value)
+        elif option not in mapped:
+            mapped[option] = value
+    return mapped
+
+
+# Convert the catalog into a DataFrame with typed numeric/categorical columns.
+# Runs once per catalog version; filtering then works on these columns only.
+def parse_catalog(catalog):
+    names = catalog.names
+    text = pd.DataFrame.from_records(
+        [catalog.specs[name] for name in names], index=pd.Index(names, name="name")
+    ).reindex(columns=list(catalog.options)).astype(object)
+    text = text.where(text.notna(), None)
+
+    frame = pd.DataFrame(index=text.index)
+    frame["diagonal_in"] = _number(text[DIAGONAL_OPTION], _NUMBER + r"\s*(?:inch|\"|”|'')")
+    frame["resolution_width"] = _number(text[RESOLUTION_OPTION], r"(\d{3,5})\s*[x×]\s*\d{3,5}")
+    frame["resolution_height"] = _number(text[RESOLUTION_OPTION], r"\d{3,5}\s*[x×]\s*(\d{3,5})")
+    frame["refresh_hz"] = _number(text[REFRESH_OPTION], _NUMBER + r"\s*hz")
+    frame["response_ms"] = _number(text[RESPONSE_OPTION], _NUMBER + r"\s*ms")
+    frame["brightness_nits"] = _number(text[BRIGHTNESS_OPTION], _NUMBER + r"\s*(?:cd/m|nit)")
+    frame["contrast_ratio"] = _number(text[CONTRAST_OPTION], r"(\d+(?:[.,]\d+)?)\s*:\s*1\b")
+    frame["height_adjust_mm"] = _number(text[HEIGHT_OPTION], _NUMBER + r"\s*mm")
+    frame["pivot_deg"] = _number(text[PIVOT_OPTION], _NUMBER + r"\s*°")
+    frame["warranty_years"] = _number(text[WARRANTY_OPTION], _NUMBER + r"\s*an")
+
+    panel_regex = re.compile(r"\b(" + "|".join(PANEL_TYPES) + r")\b", re.IGNORECASE)
+
+    def parse_panel(value):
+        match = panel_regex.search(value) if value is not None else None
+        return match.group(1).upper() if match else None
+
+    frame["panel"] = pd.Categorical(_parse_distinct(text[PANEL_OPTION], parse_panel, object), categories=PANEL_TYPES)
+
+    for column, pattern in PORT_PATTERNS.items():
+        frame[column] = _count_ports(text[CONNECTIVITY_OPTION], pattern)
+
+    full_text = pd.Series([" ".join(catalog.specs[name].values()) for name in names], index=text.index)
+    for feature, pattern in FEATURE_PATTERNS.items():
+        regex = re.compile(pattern, re.IGNORECASE)
+        frame[feature] = _parse_distinct(full_text, lambda value: bool(value and regex.search(value)), bool)
+    frame["Pivot"] = frame["pivot_deg"].notna().to_numpy()
+    frame["Înălțime ajustabilă"] = (frame["height_adjust_mm"].fillna(0) > 0).to_numpy()
+
+    prices = [catalog.monitors[name].get("price") for name in names]
+    frame["price_ron"] = pd.to_numeric(pd.Series(prices, index=text.index, dtype="object"), errors="coerce")
+
+    float_columns = [
+        "diagonal_in", "resolution_width", "resolution_height", "refresh_hz", "response_ms",
+        "brightness_nits", "contrast_ratio", "height_adjust_mm", "pivot_deg", "warranty_years", "price_ron",
+    ]
+    frame[float_columns] = frame[float_columns].astype("float64")
+    return frame
+
+
+# Evaluate the tab2 filters as vectorized masks over the typed catalog.
+# Missing numeric values never match a numeric bound, except the price:
+# monitors without a known price stay visible when a price range is set.
+def filter_catalog(frame, resolution=None, panel=None, min_refresh=None, min_response=None,
+                   max_response=None, price_range=None, features=()):
+    mask = np.ones(len(frame), dtype=bool)
+
+    if resolution is not None:
+        mask &= frame["resolution_width"].to_numpy() == resolution[0]
+        mask &= frame["resolution_height"].to_numpy() == resolution[1]
+    if panel is not None:
+        mask &= (frame["panel"] == panel).to_numpy(dtype=bool, na_value=False)
+    if min_refresh is not None:
+        mask &= frame["refresh_hz"].to_numpy() >= min_refresh
+    if min_response is not None:
+        mask &= frame["response_ms"].to_numpy() >= min_response
+    if max_response is not None:
+        mask &= frame["response_ms"].to_numpy() <= max_response
+    if price_range is not None:
+        prices = frame["price_ron"].to_numpy()
+        mask &= np.isnan(prices) | ((prices >= price_range[0]) & (prices <= price_range[1]))
+    for feature in features:
+        if feature in frame.columns:
+            mask &= frame[feature].to_numpy(dtype=bool)
+
+    return frame[mask]
@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Saved product pages laid out as <dir>/<shop domain>/<page>.html
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pages")
+
+# Stand-ins for the upstreams and a throwaway cache directory, set before
+# the modules read their configuration at import time
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="monitors-tests-")
+os.environ.setdefault("GEMINI_FAKE_MODEL", "1")
+os.environ.setdefault("GEMINI_FAKE_FIRST_DELAY", "0")
+os.environ.setdefault("GEMINI_FAKE_CHUNK_DELAY", "0")
+os.environ.setdefault("GEMINI_RATE", "1000")
+os.environ.setdefault("GEMINI_BURST", "1000")
+os.environ.setdefault("SERPER_API_URL", "http://127.0.0.1:9/search")
+
+
+@pytest.fixture
+def service(tmp_path):
+    from service import MonitorService
+
+    service = MonitorService(serper_api_key="test", gemini_api_key="test",
+                             shop_index_path=str(tmp_path / "shop_index.sqlite3"),
+                             price_history_dir=str(tmp_path / "price_history"))
+    for cache in (service.search_cache, service.gemini_cache, service.report_cache):
+        cache.clear()
+    yield service
+    service.search_executor.shutdown(wait=False)
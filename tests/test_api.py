@@ -0,0 +1,121 @@
+import pytest
+from starlette.testclient import TestClient
+
+from api import create_app
+from clients import FakeGeminiModel
+from conftest import PAGES_DIR
+
+CATEGORIES = ["Monitor 24 inch", "Monitor 27 inch"]
+
+
+@pytest.fixture
+def client(service):
+    service.shop_index.ingest_directory(PAGES_DIR, service.shops)
+    with TestClient(create_app(service, workers=4, pdf_workers=1)) as client:
+        yield client
+
+
+def test_health_and_catalog(client):
+    assert client.get("/health").json()["status"] == "ok"
+    catalog = client.get("/catalog").json()
+    assert set(CATEGORIES) <= set(catalog["categories"])
+    assert "Analiză generală" in catalog["analysis_types"]
+
+
+def test_search_is_answered_from_the_shop_index(client, service):
+    service.index_min_hits = 1
+    response = client.post("/search", json={"categories": ["Monitor 27 inch"], "options": ["Rata refresh"],
+                                            "price_range": [1000, 2500]})
+    assert response.status_code == 200
+    outcome = response.json()
+    assert outcome["source"] == "index"
+    assert [result["link"] for result in outcome["results"]] == ["https://www.emag.ro/monitor-lg-ultragear-27gp850/pd/D1B2C3/"]
+
+
+def test_too_few_index_hits_fall_back_to_serper(client, service, monkeypatch):
+    monkeypatch.setattr(service, "search_task", lambda queries, use_cache=True, optimize=None: {
+        "results": [], "extra": [], "cached": False, "enhanced_query": None, "enhanced_cached": False,
+        "enhance_error": None})
+    response = client.post("/search", json={"categories": ["Monitor 27 inch"], "options": ["Rata refresh"],
+                                            "price_range": [1000, 2500]})
+    assert response.json()["source"] == "serper"
+
+
+@pytest.mark.parametrize("selection", [
+    {"categories": CATEGORIES, "price_range": 5},
+    {"categories": CATEGORIES, "price_range": [2500, 1000]},
+    {"categories": CATEGORIES, "price_range": ["ieftin", 1000]},
+    {"categories": "Monitor 24 inch"},
+    {"categories": CATEGORIES, "panel": 3},
+    {"categories": CATEGORIES, "colour": "negru"},
+    {"categories": ["Monitor de 99 inch"]},
+    {"categories": []},
+    {"categories": [" ", ""], "options": ["Rata refresh"]},
+    {"options": ["Rata refresh"], "text": "monitor"},
+])
+def test_search_rejects_malformed_selections(client, selection):
+    response = client.post("/search", json=selection)
+    assert response.status_code == 400
+    assert response.json()["error"]
+
+
+def test_compare(client):
+    response = client.post("/compare", json={"categories": CATEGORIES, "specs": ["Rata refresh", "Rezolutie"]})
+    table = response.json()
+    assert table["columns"] == ["Specificație"] + CATEGORIES
+    assert [row[0] for row in table["rows"]] == ["Rata refresh", "Rezolutie"]
+
+
+@pytest.mark.parametrize("k", ["trei", None, [3], True, 0])
+def test_rank_rejects_invalid_k(client, k):
+    response = client.post("/rank", json={"weights": {"Rata refresh": 5}, "k": k})
+    assert response.status_code == 400
+
+
+def test_rank(client):
+    table = client.post("/rank", json={"weights": {"Rata refresh": 5}, "k": 3}).json()
+    assert table["columns"][:2] == ["Monitor", "Scor"]
+    assert len(table["rows"]) == 3
+
+
+def test_structured_analyses_feed_the_report(client):
+    response = client.post("/analyze", json={"categories": CATEGORIES, "options": ["Rata refresh"],
+                                             "analysis_types": ["Analiză generală"], "per_category": True})
+    analyses = response.json()["analyses"]
+    assert [analysis["categories"] for analysis in analyses] == [[category] for category in CATEGORIES]
+
+    body = {"kind": "analysis", "categories": CATEGORIES, "options": ["Rata refresh"],
+            "analysis": [[analysis["analysis_type"], analysis["sections"]] for analysis in analyses]}
+    first = client.post("/report", json=body)
+    assert first.status_code == 200 and first.content.startswith(b"%PDF")
+    assert first.headers["X-Report-Cache"] == "miss"
+    assert client.post("/report", json=body).headers["X-Report-Cache"] == "hit"
+
+
+def test_failed_render_is_a_server_error(client, service, monkeypatch):
+    monkeypatch.setattr(service, "report", lambda categories, options, analysis=None: {
+        "version": 0, "blocks": [["chart", "Prețuri"]]})
+    response = client.post("/report", json={"kind": "specs", "categories": CATEGORIES})
+    assert response.status_code == 500
+    assert "chart" in response.json()["error"]
+
+
+def test_report_rejects_malformed_analysis(client):
+    response = client.post("/report", json={"kind": "analysis", "categories": CATEGORIES,
+                                            "analysis": [["Analiză", {"caracteristici": 1}]]})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("answer", ["Nu pot răspunde în JSON.", "[]", '{"caracteristici": ""}'])
+def test_analysis_without_a_valid_answer_is_an_upstream_error(client, service, monkeypatch, answer):
+    class BrokenModel(FakeGeminiModel):
+        def answer(self, prompt):
+            return answer
+
+    monkeypatch.setattr(service.clients, "gemini_model",
+                        lambda model_name, generation_config=None: BrokenModel(model_name, first_delay=0,
+                                                                              chunk_delay=0))
+    response = client.post("/analyze", json={"categories": CATEGORIES, "options": ["Rata refresh"],
+                                             "analysis_types": ["Analiză generală"], "single_call": True})
+    assert response.status_code == 502
+    assert response.json()["error"].startswith("Gemini")
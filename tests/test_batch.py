@@ -0,0 +1,37 @@
+import csv
+
+import pytest
+
+from batch import process_item, read_items, summary
+
+
+@pytest.fixture
+def items(tmp_path):
+    path = tmp_path / "selections.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["categories", "options", "price_min", "price_max", "analysis_type"])
+        writer.writerow(["Monitor 24 inch; Monitor 27 inch", "Rata refresh", "799.99", "1500", ""])
+        writer.writerow(["Monitor 27 inch", "", "", "1299,50", "Analiză generală"])
+        writer.writerow(["Monitor 27 inch", "", "ieftin", "", ""])
+    return read_items(str(path))
+
+
+def test_csv_rows(items):
+    assert items[0]["categories"] == ["Monitor 24 inch", "Monitor 27 inch"]
+    assert items[0]["price_range"] == [799.99, 1500]
+    assert items[1]["price_range"] == [0, 1299.5]
+    assert "options" not in items[1] and items[1]["analysis_type"] == "Analiză generală"
+    assert len({item["id"] for item in items}) == 3
+
+
+def test_invalid_price_fails_its_item_only(service, items):
+    with pytest.raises(ValueError, match="price_range"):
+        process_item(service, items[2], True, None, None, None)
+
+
+@pytest.mark.parametrize("latencies, p95", [([1.0], 1.0), ([1.0, 2.0], 2.0), ([float(n) for n in range(1, 21)], 19.0),
+                                             ([float(n) for n in range(1, 22)], 20.0)])
+def test_summary_reports_the_nearest_rank_p95(latencies, p95):
+    records = [{"status": "ok", "seconds": seconds} for seconds in latencies]
+    assert f"p95 {p95:.2f} s" in summary(records, 0, 1.0)
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from cache import DiskCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+def test_free_text_keys_are_normalized(path):
+    cache = DiskCache("search", path=path)
+    cache.set("Monitor  27 inch IPS", [1, 2])
+    assert cache.get(" monitor 27 INCH ips ") == [1, 2]
+    assert cache.stats()["hits"] == 1
+
+
+def test_url_keys_are_case_sensitive(path):
+    cache = DiskCache("pages", path=path, normalize=False)
+    cache.set("https://shop.ro/p/AbC", {"price": 1})
+    cache.set("https://shop.ro/p/abc", {"price": 2})
+    assert cache.get("https://shop.ro/p/AbC") == {"price": 1}
+    assert cache.get("https://shop.ro/p/abc") == {"price": 2}
+    assert cache.entries()[0]["label"] == "https://shop.ro/p/abc"
+
+
+def test_expired_entries_are_dropped(path):
+    cache = DiskCache("search", ttl=1, path=path)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    cache._connect().execute("UPDATE entries SET created = ?", (time.time() - 2,))
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 0, "bytes": 0}
+
+
+def test_least_recently_used_entries_are_evicted(path):
+    cache = DiskCache("search", ttl=0, max_bytes=2500, path=path)
+    for key in ("a", "b"):
+        cache.set_bytes(key, b"x" * 1000)
+        time.sleep(0.01)
+    cache.get_bytes("a")
+    cache.set_bytes("c", b"x" * 1000)
+    assert cache.get_bytes("b") is None
+    assert cache.get_bytes("a") == cache.get_bytes("c") == b"x" * 1000
+
+
+def test_namespaces_are_separate(path):
+    search, reports = DiskCache("search", path=path), DiskCache("reports", path=path)
+    search.set("a", 1)
+    assert reports.get("a") is None
+    reports.clear()
+    assert search.get("a") == 1
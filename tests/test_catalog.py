@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+
+from catalog import CatalogError, CatalogStore, load_catalog
+
+MONITOR = {"name": "Monitor 27 inch", "description": "QHD", "price": 1499,
+           "specs": {"Diagonala ecran": "27 inch", "Rata refresh": "165 Hz"}}
+
+
+def write_json(path, raw):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(raw, f)
+    # A new modification time even on filesystems with a coarse clock
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "catalog.json")
+    write_json(path, {"monitors": [MONITOR]})
+    return path
+
+
+@pytest.mark.parametrize("raw", [
+    [MONITOR],
+    {"monitors": {"Monitor 27 inch": MONITOR}},
+    {"monitors": ["Monitor 27 inch"]},
+    {"monitors": [{**MONITOR, "specs": ["27 inch"]}]},
+    {"monitors": [{**MONITOR, "specs": {"Culoare": "negru"}}]},
+    {"monitors": [MONITOR], "options": ["Culoare"]},
+    {"monitors": []},
+])
+def test_malformed_catalogs_are_rejected(path, raw):
+    write_json(path, raw)
+    with pytest.raises(CatalogError):
+        load_catalog(path)
+
+
+@pytest.mark.parametrize("content", ['[{"name": "Monitor"}]', '{"monitors": [{"name": "M", "specs": 3}]}',
+                                     '{"monitors": ', "\x00\x01"])
+def test_reload_keeps_the_previous_catalog(path, content):
+    store = CatalogStore(path, reload_interval=0)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 2_000_000_000))
+    assert store.get().names == ["Monitor 27 inch"]
+    assert store.last_error
+
+    write_json(path, {"monitors": [MONITOR, {**MONITOR, "name": "Monitor 32 inch"}]})
+    assert store.get().names == ["Monitor 27 inch", "Monitor 32 inch"]
+    assert store.last_error is None
+
+
+def test_empty_cells_of_tabular_catalogs_are_missing(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text("name,description,price,url,Diagonala ecran,Rata refresh\n"
+                    "Monitor 24 inch,,,,24 inch,\n"
+                    "Monitor 27 inch,QHD,1499,https://www.emag.ro/p,27 inch,165 Hz\n", encoding="utf-8")
+    catalog = load_catalog(str(path))
+    assert catalog.monitors["Monitor 24 inch"] == {"name": "Monitor 24 inch", "description": "",
+                                                   "specs": {"Diagonala ecran": "24 inch"}}
+    assert catalog.monitors["Monitor 27 inch"]["price"] == "1499"
+
+
+def test_nan_in_json_catalogs_is_missing(path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"monitors": [{"name": "Monitor 27 inch", "description": NaN, "price": NaN, '
+                '"specs": {"Diagonala ecran": "27 inch", "Rata refresh": NaN}}]}')
+    monitor = load_catalog(path).monitors["Monitor 27 inch"]
+    assert monitor == {"name": "Monitor 27 inch", "description": "", "specs": {"Diagonala ecran": "27 inch"}}
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from cache import DiskCache
+from conftest import PAGES_DIR
+from enrichment import DomainThrottle, PageEnricher
+
+URL = "https://www.emag.ro/monitor-lg-27gp850.html"
+
+with open(os.path.join(PAGES_DIR, "emag.ro", "monitor-lg-27gp850.html"), encoding="utf-8") as f:
+    HTML = f.read()
+
+
+class Response:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+# Serves the fixture page with an ETag and answers 304 when it is sent back
+class Session:
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append((url, headers))
+        if headers.get("If-None-Match") == '"v1"':
+            return Response(304)
+        return Response(200, HTML, {"ETag": '"v1"', "Last-Modified": "Mon, 12 Oct 2026 08:00:00 GMT"})
+
+
+@pytest.fixture
+def session():
+    return Session()
+
+
+def enricher(session, tmp_path, fresh_for=0, on_page=None):
+    cache = DiskCache("pages", path=str(tmp_path / "cache.sqlite3"), normalize=False)
+    return PageEnricher(session, cache, throttle=DomainThrottle(delay=0), fresh_for=fresh_for, on_page=on_page)
+
+
+def test_repeat_visit_is_a_conditional_get(session, tmp_path):
+    pages = []
+    enrich = enricher(session, tmp_path, on_page=lambda url, html: pages.append(url))
+    product, status = enrich.fetch(URL)
+    assert status == "fetched" and product["price"] == 1899.99
+    assert enrich.fetch(URL) == (product, "revalidated")
+    assert session.requests[1][1]["If-None-Match"] == '"v1"'
+    assert session.requests[1][1]["If-Modified-Since"] == "Mon, 12 Oct 2026 08:00:00 GMT"
+    assert pages == [URL]
+
+
+def test_fresh_pages_are_not_requested(session, tmp_path):
+    enrich = enricher(session, tmp_path, fresh_for=300)
+    enrich.fetch(URL)
+    assert enrich.fetch(URL)[1] == "cached"
+    assert len(session.requests) == 1
+
+
+def test_urls_differing_in_case_are_fetched_separately(session, tmp_path):
+    enrich = enricher(session, tmp_path, fresh_for=300)
+    enrich.fetch(URL)
+    assert enrich.fetch(URL.replace("lg", "LG"))[1] == "fetched"
+    assert "If-None-Match" not in session.requests[1][1]
+
+
+def test_enrich_reports_failures_per_result(tmp_path):
+    class Failing(Session):
+        def get(self, url, headers=None, timeout=None):
+            return Response(503) if "broken" in url else super().get(url, headers, timeout)
+
+    enrich = enricher(Failing(), tmp_path)
+    outcome = sorted(enrich.enrich([{"link": URL}, {"link": "https://www.emag.ro/broken"}, {"title": "fără link"}]),
+                     key=lambda item: item[0])
+    assert [(position, status) for position, _, status, _ in outcome] == [(0, "fetched"), (1, "failed")]
+    assert isinstance(outcome[1][3], RuntimeError)
@@ -0,0 +1,44 @@
+import io
+import os
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from conftest import PAGES_DIR
+from exports import export_bytes, result_schema, result_tables
+from shop_index import extract_product
+
+PAGE = os.path.join(PAGES_DIR, "emag.ro", "monitor-lg-27gp850.html")
+
+
+def enriched_result():
+    with open(PAGE, encoding="utf-8") as f:
+        product = extract_product(f.read(), "https://www.emag.ro/monitor-lg-ultragear-27gp850/pd/D1B2C3/")
+    return {"title": product["title"], "link": product["url"], "snippet": "", "price": product["price"],
+            "specs": product["specs"]}
+
+
+def test_shop_specs_fill_the_typed_columns():
+    table = pa.concat_tables(result_tables([enriched_result(), {"title": "Fără pagină", "link": "https://altex.ro/x"}]))
+    rows = table.to_pylist()
+    assert rows[0]["shop"] == "emag.ro"
+    assert rows[0]["price_ron"] == 1899.99
+    assert rows[0]["diagonal_in"] == 27
+    assert (rows[0]["resolution_width"], rows[0]["resolution_height"]) == (2560, 1440)
+    assert rows[0]["refresh_hz"] == 165
+    assert rows[0]["response_ms"] == 1
+    assert rows[0]["panel"] == "IPS"
+    assert rows[1]["price_ron"] is None and rows[1]["refresh_hz"] is None
+    assert [row["position"] for row in rows] == [1, 2]
+
+
+def test_export_formats_round_trip():
+    results = [enriched_result()] * 3
+    schema = result_schema()
+    parquet = pq.read_table(io.BytesIO(export_bytes(result_tables(results, chunk_rows=2), "parquet", schema)))
+    assert parquet.num_rows == 3 and parquet.schema.names == schema.names
+    arrow = pa.ipc.open_file(io.BytesIO(export_bytes(result_tables(results, chunk_rows=2), "arrow", schema))).read_all()
+    assert arrow.column("refresh_hz").to_pylist() == [165.0] * 3
+    csv = pa_csv.read_csv(io.BytesIO(export_bytes(result_tables(results), "csv", schema)))
+    assert csv.column("panel").to_pylist() == ["IPS"] * 3
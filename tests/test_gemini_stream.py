@@ -0,0 +1,51 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+PROMPT = "Analizează monitorul LG 27GP850\ncu panou IPS și 165 Hz"
+
+
+def test_chunks_are_assembled_and_cached(service):
+    stats = {}
+    chunks = list(service.gemini_stream(PROMPT, stats=stats))
+    assert len(chunks) > 1 and stats["cached"] is False
+    assert stats["first_chunk"] <= stats["total"]
+
+    stats = {}
+    assert list(service.gemini_stream(PROMPT, stats=stats)) == ["".join(chunks)]
+    assert stats["cached"] is True
+
+
+def test_followers_share_the_streamed_answer(service):
+    leader = service.gemini_stream(PROMPT)
+    first = next(leader)
+    with ThreadPoolExecutor(1) as executor:
+        follower = executor.submit(lambda: list(service.gemini_stream(PROMPT)))
+        text = first + "".join(leader)
+        assert follower.result(timeout=5) == [text]
+
+
+def test_followers_are_released_when_the_answer_cannot_be_stored(service, monkeypatch):
+    def fail(*args):
+        raise OSError("disk plin")
+
+    monkeypatch.setattr(service, "store_gemini_answer", fail)
+    leader = service.gemini_stream(PROMPT)
+    next(leader)
+    joined = threading.Event()
+    with ThreadPoolExecutor(1) as executor:
+        def follow():
+            joined.set()
+            return list(service.gemini_stream(PROMPT))
+
+        follower = executor.submit(follow)
+        joined.wait(5)
+        time.sleep(0.2)
+        with pytest.raises(OSError):
+            list(leader)
+        with pytest.raises(OSError):
+            follower.result(timeout=5)
+    monkeypatch.undo()
+    assert list(service.gemini_stream(PROMPT))
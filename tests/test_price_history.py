@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from conftest import PAGES_DIR
+from enrichment import DomainThrottle
+from price_history import FAILED, HISTORY_SCHEMA, UNCHANGED, UPDATED, PriceHistory, PriceTracker
+
+URL = "https://www.emag.ro/monitor-lg-27gp850.html"
+DAY = 24 * 3600
+
+with open(os.path.join(PAGES_DIR, "emag.ro", "monitor-lg-27gp850.html"), encoding="utf-8") as f:
+    HTML = f.read()
+
+
+class Response:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class Session:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.requests = 0
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests += 1
+        if headers.get("If-None-Match") == '"v1"':
+            return Response(304)
+        return Response(self.status_code, HTML, {"ETag": '"v1"'})
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = PriceHistory(str(tmp_path / "price_history"))
+    history.watch(URL, "emag.ro")
+    return history
+
+
+def tracker(history, session):
+    return PriceTracker(history, session, throttle=DomainThrottle(delay=0), max_workers=2, interval=3600)
+
+
+def test_points_sharing_a_second_are_merged(history):
+    history.append([(URL, 1_000_000, 100.0), (URL, 1_000_000 + DAY, 110.0)])
+    history.compact(now=1_000_000 + DAY)
+    history.append([(URL, 1_000_000 + DAY, 90.0)])
+    series = history.series(URL)
+    assert list(series["price"]) == [100.0, 90.0]
+    assert list(series["low"]) == [100.0, 90.0] and list(series["high"]) == [100.0, 110.0]
+    assert list(series["samples"]) == [1, 2]
+
+
+def test_old_points_are_downsampled(history):
+    now = 1_000_000_000
+    history.append([(URL, now - 400 * DAY + hour * 3600, 100.0 + hour) for hour in range(3)])
+    history.compact(now=now)
+    series = history.series(URL)
+    assert len(series) == 1
+    assert series.iloc[0].to_dict() == {"price": 102.0, "low": 100.0, "high": 102.0, "samples": 3}
+
+
+def test_unchanged_pages_cost_a_conditional_get(history):
+    session = Session()
+    assert tracker(history, session).run() == {UPDATED: 1, UNCHANGED: 0, "no_price": 0, FAILED: 0}
+    assert tracker(history, session).run(force=True)[UNCHANGED] == 1
+    assert history.entry(URL)["price"] == 1899.99
+    assert list(history.series(URL)["price"]) == [1899.99] * len(history.series(URL))
+
+
+def test_failed_pages_wait_for_the_next_interval(history):
+    session = Session(503)
+    assert tracker(history, session).run()[FAILED] == 1
+    entry = history.entry(URL)
+    assert entry["status"] == FAILED and entry["checked"] is not None
+    assert tracker(history, session).run() == {UPDATED: 0, UNCHANGED: 0, "no_price": 0, FAILED: 0}
+    assert session.requests == 1
+    assert tracker(history, session).run(now=entry["checked"] + 3600)[FAILED] == 1
+
+
+def test_empty_history(history):
+    series = history.series(URL)
+    assert series.empty and list(series.columns) == [name for name in HISTORY_SCHEMA.names if name not in ("url", "ts")]
+
+
+def test_page_without_price_keeps_the_last_price_and_validators(history):
+    session = Session()
+    tracker(history, session).run()
+    known = history.entry(URL)
+
+    def without_price(url, headers=None, timeout=None):
+        session.requests += 1
+        return Response(200, "<html><body>Stoc epuizat</body></html>", {"ETag": '"v2"'})
+
+    session.get = without_price
+    assert tracker(history, session).run(force=True)["no_price"] == 1
+    entry = history.entry(URL)
+    assert entry["status"] == "no_price" and entry["checked"] > known["checked"]
+    assert (entry["price"], entry["etag"], entry["last_modified"], entry["hash"]) == (
+        known["price"], known["etag"], known["last_modified"], known["hash"])
+    assert list(history.series(URL)["price"]) == [1899.99]
+    assert tracker(history, session).run() == {UPDATED: 0, UNCHANGED: 0, "no_price": 0, FAILED: 0}
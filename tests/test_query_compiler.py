@@ -0,0 +1,56 @@
+import pytest
+
+from domain_policy import DomainPolicy
+from query_compiler import QUERY_MAX_WORDS, compile_query, finalize_query, rewrite_differs
+
+POLICY = DomainPolicy(shops=["emag.ro"], allowed_suffixes=["ro"],
+                      excluded_domains=[f"forum{number}.ro" for number in range(40)])
+
+
+def test_identical_selections_give_identical_queries():
+    first = compile_query({"categories": ["Monitor 27 inch", "Monitor 24 inch"], "panel": "IPS",
+                           "features": ["Boxe", "HDR"], "specs": ["165 Hz", "1 ms"]}, POLICY)
+    second = compile_query({"specs": ["1 ms", "165 Hz", "1 ms"], "features": ["HDR", "Boxe"], "panel": " IPS ",
+                            "categories": ["Monitor 24 inch", "Monitor 27 inch"]}, POLICY)
+    assert first == second
+    assert first.queries[0].startswith("(Monitor 24 inch OR Monitor 27 inch) IPS Boxe HDR 1 ms 165 Hz site:.ro")
+    assert first.keywords == "(Monitor 24 inch OR Monitor 27 inch) IPS Boxe HDR"
+
+
+def test_queries_are_bounded_and_exclusions_fit_the_budget():
+    compiled = compile_query({"categories": ["Monitor"], "price_range": (500, 1500)}, POLICY)
+    query = compiled.queries[0]
+    assert len(query.split()) == QUERY_MAX_WORDS
+    assert query.startswith("Monitor pret 500-1500 RON site:.ro -site:forum0.ro")
+    assert compiled.params == {"gl": "ro", "hl": "ro"}
+
+
+@pytest.mark.parametrize("specs", [["100 Hz", "100 Hz minim"], ["100 Hz minim", "100hz"], ["100 Hz", "100 HZ minim", "Minim 100hz"]])
+def test_near_duplicate_spec_values_are_collapsed(specs):
+    compiled = compile_query({"categories": ["Monitor"], "specs": specs}, POLICY)
+    assert compiled.queries[0].count("100") == 1
+
+
+def test_spec_values_already_selected_are_dropped():
+    compiled = compile_query({"categories": ["Monitor"], "refresh": "144 Hz",
+                              "specs": ["144Hz minim", "Timp de răspuns 1 ms"]}, POLICY)
+    assert compiled.queries[0].startswith("Monitor 144 Hz Timp de răspuns 1 ms site:.ro")
+
+
+def test_specs_that_do_not_fit_go_to_subqueries():
+    specs = [f"spec{number} valoare" for number in range(20)]
+    compiled = compile_query({"categories": ["Monitor"], "specs": specs}, POLICY)
+    assert len(compiled.queries) == 2
+    assert all(query.startswith("Monitor spec") for query in compiled.queries)
+    assert all(len(query.split()) <= QUERY_MAX_WORDS for query in compiled.queries)
+
+
+def test_finalize_query_is_idempotent():
+    query = finalize_query("monitor  IPS site:eMAG.ro -site:forum3.ro &lr=lang_ro", POLICY)
+    assert query.startswith("monitor IPS site:emag.ro -site:forum0.ro")
+    assert finalize_query(query, POLICY) == query
+
+
+def test_rewrite_differs():
+    assert not rewrite_differs("monitor IPS 27 inch site:.ro", "27 inch IPS Monitor")
+    assert rewrite_differs("monitor IPS 27 inch", "monitor gaming 27 inch 165 Hz")
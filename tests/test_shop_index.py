@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from conftest import PAGES_DIR
+from shop_index import ShopIndex, extract_product, parse_price, parse_query, tokenize
+
+SHOPS = ["emag.ro", "altex.ro"]
+LG = "https://www.emag.ro/monitor-lg-ultragear-27gp850/pd/D1B2C3/"
+DELL = "https://www.emag.ro/monitor-dell-s2421h/pd/E4F5G6/"
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = ShopIndex(str(tmp_path / "index.sqlite3"))
+    assert index.ingest_directory(PAGES_DIR, SHOPS) == {"added": 2, "updated": 0, "unchanged": 0, "skipped": 1}
+    return index
+
+
+def links(results):
+    return [result["link"] for result in results]
+
+
+@pytest.mark.parametrize("text, price", [("1.299,99 lei", 1299.99), ("1299 RON", 1299.0), ("749,99", 749.99),
+                                         ("2.499 lei", 2499.0), (1899, 1899.0), ("la cerere", None)])
+def test_parse_price(text, price):
+    assert parse_price(text) == price
+
+
+def test_tokenize_strips_diacritics_and_stopwords():
+    assert tokenize("Monitor 27\" cu rată de reîmprospătare 165Hz") == ["monitor", "27", "rata", "reimprospatare",
+                                                                         "165", "hz"]
+
+
+def test_extract_product_from_json_ld_and_tables():
+    with open(os.path.join(PAGES_DIR, "emag.ro", "monitor-dell-s2421h.html"), encoding="utf-8") as f:
+        product = extract_product(f.read(), "https://emag.ro/monitor-dell-s2421h.html")
+    assert product["url"] == DELL
+    assert product["title"].startswith("Monitor LED IPS Dell S2421H")
+    assert product["price"] == 749.99
+    assert product["specs"]["Frecventa"] == "75 Hz"
+
+
+def test_parse_query_or_groups():
+    assert parse_query("(Monitor 24 inch OR Monitor 27 inch) IPS") == (
+        ["ips"], [[["monitor", "24", "inch"], ["monitor", "27", "inch"]]])
+
+
+def test_hit(index):
+    assert links(index.search("Monitor 27 inch 165 Hz")) == [LG]
+    assert links(index.search("Monitor IPS 75 Hz", shops=["emag.ro"])) == [DELL]
+
+
+def test_numeric_terms_are_required(index):
+    assert index.search("Monitor 32 inch 165 Hz") == []
+    assert index.search("Monitor 27 inch 240 Hz") == []
+
+
+def test_or_groups_are_alternatives(index):
+    assert links(index.search("(Monitor 24 inch OR Monitor 27 inch)")) == [LG]
+    assert set(links(index.search("(Monitor 75 Hz OR Monitor 165 Hz) IPS"))) == {LG, DELL}
+    assert links(index.search("(Monitor 27 inch OR Monitor 32 inch) 165 Hz")) == [LG]
+    assert index.search("(Monitor 32 inch OR Monitor 34 inch) IPS") == []
+
+
+def test_filters_and_freshness(index):
+    assert index.search("Monitor 27 inch", shops=["altex.ro"]) == []
+    assert index.search("Monitor 27 inch", price_range=(500, 1000)) == []
+    assert links(index.search("Monitor 27 inch", price_range=(1000, 2000))) == [LG]
+    index.max_age = -1
+    assert index.search("Monitor 27 inch") == []
+
+
+def test_unchanged_page_is_not_parsed_again(index):
+    assert index.ingest_directory(PAGES_DIR, SHOPS)["unchanged"] == 2
+
+
+def test_changed_canonical_url_replaces_the_listing(index):
+    source = "https://emag.ro/monitor-lg-27gp850.html"
+    with open(os.path.join(PAGES_DIR, "emag.ro", "monitor-lg-27gp850.html"), encoding="utf-8") as f:
+        html = f.read().replace("/pd/D1B2C3/", "/pd/NEW123/")
+    assert index.ingest_html(source, html, SHOPS) == "added"
+    assert links(index.search("Monitor 27 inch 165 Hz")) == [LG.replace("D1B2C3", "NEW123")]
+    assert index.stats()["listings"] == 2
@@ -0,0 +1,66 @@
+import math
+
+import pytest
+
+from catalog import OPTIONS, Catalog, validate_monitors
+from spec_parser import catalog_specs, filter_catalog, parse_hz, parse_ms, parse_resolution, shop_spec_option
+
+RECORDS = [
+    {"name": "LG 27GP850", "price": 1899.99, "specs": {
+        "Diagonala ecran": "27 inch", "Tehnologie ecran": "Nano IPS", "Rezolutie": "2560 x 1440 QHD",
+        "Rata refresh": "165 Hz", "Timp de raspuns tipic": "1 ms", "Luminozitate": "400 cd/mp",
+        "Raport de contrast static": "1000:1", "Conectivitate": "2 x HDMI, 1 x DisplayPort, USB-C X1",
+        "Tehnologii": "AMD FreeSync Premium, HDR10", "Pivotare": "90°", "Inaltime ajustabila": "110 mm"}},
+    {"name": "Dell S2421H", "price": "749.99", "specs": {
+        "Diagonala ecran": "23,8\"", "Tehnologie ecran": "IPS", "Rezolutie": "1920x1080 Full HD",
+        "Rata refresh": "75 Hz", "Timp de raspuns tipic": "4 ms", "Conectivitate": "HDMI", "Accesorii": "Boxe 2 x 3W"}},
+    {"name": "Samsung Odyssey G5", "specs": {
+        "Diagonala ecran": "32 inch", "Tehnologie ecran": "VA", "Rezolutie": "2560x1440",
+        "Rata refresh": "144Hz", "Timp de raspuns tipic": "1ms", "Tehnologii": "G-Sync compatible"}},
+]
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return Catalog(validate_monitors(RECORDS, OPTIONS), OPTIONS).frame
+
+
+def test_typed_columns(frame):
+    lg, dell, samsung = (frame.loc[name] for name in ("LG 27GP850", "Dell S2421H", "Samsung Odyssey G5"))
+    assert (lg["diagonal_in"], lg["resolution_width"], lg["resolution_height"]) == (27, 2560, 1440)
+    assert (lg["refresh_hz"], lg["response_ms"], lg["brightness_nits"], lg["contrast_ratio"]) == (165, 1, 400, 1000)
+    assert (lg["hdmi_ports"], lg["displayport_ports"], lg["usb_c_ports"]) == (2, 1, 1)
+    assert lg["panel"] == "IPS" and lg["Pivot"] and lg["Înălțime ajustabilă"] and lg["FreeSync"] and lg["HDR"]
+    assert dell["diagonal_in"] == 23.8 and dell["price_ron"] == 749.99 and dell["Boxe încorporate"]
+    assert samsung["panel"] == "VA" and samsung["G-Sync"] and not samsung["Pivot"]
+    assert math.isnan(samsung["price_ron"]) and math.isnan(samsung["brightness_nits"])
+
+
+def test_filter_catalog(frame):
+    assert list(filter_catalog(frame, min_refresh=144, max_response=1).index) == ["LG 27GP850", "Samsung Odyssey G5"]
+    assert list(filter_catalog(frame, resolution=(2560, 1440), panel="VA").index) == ["Samsung Odyssey G5"]
+    assert list(filter_catalog(frame, features=["HDR"]).index) == ["LG 27GP850"]
+    # Monitors without a known price stay visible under a price range
+    assert list(filter_catalog(frame, price_range=(500, 1000)).index) == ["Dell S2421H", "Samsung Odyssey G5"]
+
+
+@pytest.mark.parametrize("parse, text, value", [
+    (parse_hz, "144Hz", 144), (parse_hz, "Rata 59,94 Hz", 59.94), (parse_hz, "fără", None),
+    (parse_ms, "0.5 ms GtG", 0.5), (parse_ms, "5+ ms", 5),
+    (parse_resolution, "3840×2160 4K", (3840, 2160)), (parse_resolution, "Full HD", None),
+])
+def test_single_values(parse, text, value):
+    assert parse(text) == value
+
+
+@pytest.mark.parametrize("name, option", [
+    ("Diagonala", "Diagonala ecran"), ("Rată de reîmprospătare", "Rata refresh"), ("Tip panou", "Tehnologie ecran"),
+    ("Timp de răspuns (GtG)", "Timp de raspuns tipic"), ("Contrast dinamic", None), ("Culoare", None),
+])
+def test_shop_spec_option(name, option):
+    assert shop_spec_option(name) == option
+
+
+def test_catalog_specs_keeps_the_first_mapped_value():
+    assert catalog_specs({"Frecventa": "75 Hz", "Rata de refresh": "60 Hz", "Culoare": "Negru"}) == {
+        "Rata refresh": "75 Hz", "Culoare": "Negru"}
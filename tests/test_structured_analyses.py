@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from clients import FakeGeminiModel
+from reports import ANALYSIS_SECTION_KEYS
+from service import AnalysisError
+
+CATEGORIES = ["Monitor 24 inch"]
+OPTIONS = ["Rezolutie"]
+REQUESTS = [("Analiză generală", CATEGORIES), ("Comparație pentru gaming", CATEGORIES)]
+
+
+# Fake model whose combined answer lacks the analyses in `drop`
+class PartialModel(FakeGeminiModel):
+    def __init__(self, model_name, generation_config=None, drop=()):
+        super().__init__(model_name, first_delay=0, chunk_delay=0, generation_config=generation_config)
+        self.drop = drop
+
+    def answer(self, prompt):
+        answer = json.loads(super().answer(prompt))
+        for analysis_id in self.drop:
+            answer.pop(analysis_id, None)
+        return json.dumps(answer, ensure_ascii=False)
+
+
+def test_concurrent_analyses_are_cached_per_analysis(service):
+    first = service.structured_analyses(REQUESTS, OPTIONS)
+    assert [cached for _, cached in first] == [False, False]
+    assert all(set(sections) == set(ANALYSIS_SECTION_KEYS) and all(sections.values()) for sections, _ in first)
+
+    again = service.structured_analyses(REQUESTS[:1], OPTIONS, single_call=True)
+    assert again == [(first[0][0], True)]
+
+
+def test_partial_single_call_answer_is_not_cached(service, monkeypatch):
+    calls = []
+
+    def gemini_model(model_name, generation_config=None):
+        calls.append(generation_config)
+        return PartialModel(model_name, generation_config, drop=("a2",))
+
+    monkeypatch.setattr(service.clients, "gemini_model", gemini_model)
+    outcomes = service.structured_analyses(REQUESTS, OPTIONS, single_call=True)
+
+    # The missing analysis is asked on its own, and both end up complete
+    assert len(calls) == 2
+    assert [cached for _, cached in outcomes] == [False, False]
+    assert all(all(sections.values()) for sections, _ in outcomes)
+    assert [cached for _, cached in service.structured_analyses(REQUESTS, OPTIONS)] == [True, True]
+
+
+def test_empty_analysis_is_not_cached(service, monkeypatch):
+    class EmptyModel(FakeGeminiModel):
+        def answer(self, prompt):
+            return json.dumps(dict.fromkeys(ANALYSIS_SECTION_KEYS, ""))
+
+    monkeypatch.setattr(service.clients, "gemini_model",
+                        lambda model_name, generation_config=None: EmptyModel(model_name, first_delay=0,
+                                                                             chunk_delay=0))
+    with pytest.raises(AnalysisError):
+        service.structured_analyses(REQUESTS[:1], OPTIONS)
+    assert service.gemini_cache.stats()["entries"] == 0